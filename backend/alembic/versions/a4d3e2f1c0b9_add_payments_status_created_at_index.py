@@ -0,0 +1,27 @@
+"""Add index on payments (status, created_at)
+
+La reconciliación programada recorre los pagos pendientes por antigüedad; el índice
+evita recorrer toda la tabla en cada corrida.
+
+Revision ID: a4d3e2f1c0b9
+Revises: f3c2d1e0b9a8
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = 'a4d3e2f1c0b9'
+down_revision: Union[str, Sequence[str], None] = 'f3c2d1e0b9a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_payments_status_created_at', 'payments', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payments_status_created_at', table_name='payments')
@@ -0,0 +1,39 @@
+"""Add user_id and active-job unique index to job_runs
+
+Permite jobs por usuario (generación de gastos fijos a pedido) y garantiza a lo
+sumo un job activo (pending/running) por (job_name, user_id).
+
+Revision ID: a7d6c5b4e3f2
+Revises: f8b7c6d5e4f3
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a7d6c5b4e3f2'
+down_revision: Union[str, Sequence[str], None] = 'f8b7c6d5e4f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVOS = sa.text("status IN ('pending', 'running')")
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('job_runs') as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_job_runs_user_id_users', 'users', ['user_id'], ['id'])
+    op.create_index(
+        'uq_job_runs_activo', 'job_runs', ['job_name', 'user_id'], unique=True,
+        sqlite_where=ACTIVOS, postgresql_where=ACTIVOS,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_job_runs_activo', table_name='job_runs')
+    with op.batch_alter_table('job_runs') as batch_op:
+        batch_op.drop_constraint('fk_job_runs_user_id_users', type_='foreignkey')
+        batch_op.drop_column('user_id')
@@ -0,0 +1,48 @@
+"""Add partial unique index on auto-generated movimientos (gasto_fijo_id, fecha)
+
+El cron, el catch-up de arranque y los backfill / generación por usuario pueden correr
+a la vez; el índice garantiza una sola instancia auto-generada por ocurrencia y los
+inserts usan ON CONFLICT DO NOTHING. Antes de crearlo se borran los duplicados que ya
+existan (queda el de menor id) y se recalcula total_meses de los templates afectados.
+
+Revision ID: b5e4d3c2a1f0
+Revises: a4d3e2f1c0b9
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b5e4d3c2a1f0'
+down_revision: Union[str, Sequence[str], None] = 'a4d3e2f1c0b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AUTO_GENERADO = sa.text("is_auto_generated")
+
+
+def upgrade() -> None:
+    op.execute("""
+        DELETE FROM movimientos
+        WHERE is_auto_generated AND id NOT IN (
+            SELECT MIN(id) FROM movimientos
+            WHERE is_auto_generated
+            GROUP BY gasto_fijo_id, fecha
+        )
+    """)
+    op.execute("""
+        UPDATE gastos_fijos SET total_meses = (
+            SELECT COUNT(*) FROM movimientos WHERE movimientos.gasto_fijo_id = gastos_fijos.id
+        )
+    """)
+    op.create_index(
+        'uq_movimientos_gasto_fijo_fecha_auto', 'movimientos', ['gasto_fijo_id', 'fecha'], unique=True,
+        sqlite_where=AUTO_GENERADO, postgresql_where=AUTO_GENERADO,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_movimientos_gasto_fijo_fecha_auto', table_name='movimientos')
@@ -0,0 +1,47 @@
+"""Add denormalized stats to gastos_fijos
+
+max_importe, ultimo_importe, ultima_fecha y total_meses pasan a ser columnas
+mantenidas incrementalmente; se completan desde movimientos con un solo UPDATE.
+
+Revision ID: b8e7d6c5f4a3
+Revises: a7d6c5b4e3f2
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b8e7d6c5f4a3'
+down_revision: Union[str, Sequence[str], None] = 'a7d6c5b4e3f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('gastos_fijos') as batch_op:
+        batch_op.add_column(sa.Column('max_importe', sa.Numeric(10, 2), nullable=True))
+        batch_op.add_column(sa.Column('ultimo_importe', sa.Numeric(10, 2), nullable=True))
+        batch_op.add_column(sa.Column('ultima_fecha', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('total_meses', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute("""
+        UPDATE gastos_fijos SET
+            total_meses = (SELECT count(*) FROM movimientos m WHERE m.gasto_fijo_id = gastos_fijos.id),
+            max_importe = (SELECT max(m.importe) FROM movimientos m WHERE m.gasto_fijo_id = gastos_fijos.id),
+            ultima_fecha = (SELECT max(m.fecha) FROM movimientos m WHERE m.gasto_fijo_id = gastos_fijos.id),
+            ultimo_importe = (
+                SELECT m.importe FROM movimientos m WHERE m.gasto_fijo_id = gastos_fijos.id
+                ORDER BY m.fecha DESC, m.id DESC LIMIT 1
+            )
+    """)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('gastos_fijos') as batch_op:
+        batch_op.drop_column('total_meses')
+        batch_op.drop_column('ultima_fecha')
+        batch_op.drop_column('ultimo_importe')
+        batch_op.drop_column('max_importe')
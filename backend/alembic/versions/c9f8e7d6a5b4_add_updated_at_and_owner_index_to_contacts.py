@@ -0,0 +1,33 @@
+"""Add updated_at and owner_id index to contacts
+
+updated_at junto con count/max(id) por owner_id forma la huella que valida el
+índice en memoria de nombres de contactos sin desencriptar.
+
+Revision ID: c9f8e7d6a5b4
+Revises: b8e7d6c5f4a3
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c9f8e7d6a5b4'
+down_revision: Union[str, Sequence[str], None] = 'b8e7d6c5f4a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('contacts') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_contacts_owner_id', ['owner_id'], unique=False)
+    op.execute("UPDATE contacts SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('contacts') as batch_op:
+        batch_op.drop_index('ix_contacts_owner_id')
+        batch_op.drop_column('updated_at')
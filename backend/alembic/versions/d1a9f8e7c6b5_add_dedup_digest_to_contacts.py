@@ -0,0 +1,33 @@
+"""Add dedup_digest to contacts
+
+Digest (HMAC) de nombre + CVU normalizados para detectar duplicados al importar
+contactos sin desencriptar la agenda. Las filas existentes quedan en NULL y se
+completan en la primera importación del usuario.
+
+Revision ID: d1a9f8e7c6b5
+Revises: c9f8e7d6a5b4
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd1a9f8e7c6b5'
+down_revision: Union[str, Sequence[str], None] = 'c9f8e7d6a5b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('contacts') as batch_op:
+        batch_op.add_column(sa.Column('dedup_digest', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_contacts_owner_id_dedup_digest', ['owner_id', 'dedup_digest'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('contacts') as batch_op:
+        batch_op.drop_index('ix_contacts_owner_id_dedup_digest')
+        batch_op.drop_column('dedup_digest')
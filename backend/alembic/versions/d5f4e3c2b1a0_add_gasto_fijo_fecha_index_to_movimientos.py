@@ -0,0 +1,32 @@
+"""Add (gasto_fijo_id, fecha) index to movimientos
+
+Reemplaza el índice simple sobre gasto_fijo_id por uno compuesto que sirve
+para las stats por gasto fijo (máximo, último importe) y la deduplicación mensual.
+
+Revision ID: d5f4e3c2b1a0
+Revises: c4e3d2b1a0f9
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd5f4e3c2b1a0'
+down_revision: Union[str, Sequence[str], None] = 'c4e3d2b1a0f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('movimientos') as batch_op:
+        batch_op.create_index('ix_movimientos_gasto_fijo_fecha', ['gasto_fijo_id', 'fecha'], unique=False)
+        batch_op.drop_index('ix_movimientos_gasto_fijo_id')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('movimientos') as batch_op:
+        batch_op.create_index('ix_movimientos_gasto_fijo_id', ['gasto_fijo_id'], unique=False)
+        batch_op.drop_index('ix_movimientos_gasto_fijo_fecha')
@@ -0,0 +1,51 @@
+"""Add mp_notifications and unique mp_payment_id on payments
+
+Las notificaciones del webhook de Mercado Pago se guardan deduplicadas por
+(data_id, x-request-id) y se procesan en la cola de trabajos. payments.mp_payment_id
+pasa a ser único para que aplicar un mismo pago de MP sea idempotente; si hubiera
+duplicados previos se conserva el Payment más reciente.
+
+Revision ID: f3c2d1e0b9a8
+Revises: e2b1c0d9f8a7
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f3c2d1e0b9a8'
+down_revision: Union[str, Sequence[str], None] = 'e2b1c0d9f8a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'mp_notifications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('data_id', sa.String(), nullable=False),
+        sa.Column('request_id', sa.String(), nullable=False),
+        sa.Column('topic', sa.String(), nullable=False),
+        sa.Column('body', sa.JSON(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('data_id', 'request_id', name='uq_mp_notifications_data_id_request_id'),
+    )
+    op.create_index('ix_mp_notifications_id', 'mp_notifications', ['id'], unique=False)
+
+    op.execute(
+        "UPDATE payments SET mp_payment_id = NULL "
+        "WHERE mp_payment_id IS NOT NULL AND id NOT IN ("
+        "SELECT MAX(id) FROM payments WHERE mp_payment_id IS NOT NULL GROUP BY mp_payment_id)"
+    )
+    op.create_index('uq_payments_mp_payment_id', 'payments', ['mp_payment_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_payments_mp_payment_id', table_name='payments')
+    op.drop_index('ix_mp_notifications_id', table_name='mp_notifications')
+    op.drop_table('mp_notifications')
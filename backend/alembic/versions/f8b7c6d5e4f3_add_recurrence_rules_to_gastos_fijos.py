@@ -0,0 +1,57 @@
+"""Add recurrence rules and next_run_at to gastos_fijos
+
+Agrega la regla de recurrencia (frecuencia, intervalo, dia_mes) y la próxima
+ocurrencia indexada. Los templates existentes quedan mensuales, con next_run_at
+en el primer día del mes siguiente a su última instancia.
+
+Revision ID: f8b7c6d5e4f3
+Revises: e7a6b5c4d3e2
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f8b7c6d5e4f3'
+down_revision: Union[str, Sequence[str], None] = 'e7a6b5c4d3e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('gastos_fijos') as batch_op:
+        batch_op.add_column(sa.Column('frecuencia', sa.String(), nullable=False, server_default='monthly'))
+        batch_op.add_column(sa.Column('intervalo', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.add_column(sa.Column('dia_mes', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('next_run_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_gastos_fijos_activo_next_run_at', ['activo', 'next_run_at'], unique=False)
+
+    gastos_fijos = sa.table('gastos_fijos', sa.column('id', sa.Integer), sa.column('next_run_at', sa.DateTime))
+    movimientos = sa.table('movimientos', sa.column('gasto_fijo_id', sa.Integer), sa.column('fecha', sa.DateTime))
+    conn = op.get_bind()
+    ultimas = conn.execute(
+        sa.select(movimientos.c.gasto_fijo_id, sa.func.max(movimientos.c.fecha))
+        .where(movimientos.c.gasto_fijo_id.isnot(None))
+        .group_by(movimientos.c.gasto_fijo_id)
+    ).all()
+    for gasto_fijo_id, ultima in ultimas:
+        if isinstance(ultima, str):
+            ultima = datetime.fromisoformat(ultima)
+        anio, mes = divmod(ultima.year * 12 + ultima.month, 12)
+        conn.execute(
+            gastos_fijos.update().where(gastos_fijos.c.id == gasto_fijo_id)
+            .values(next_run_at=datetime(anio, mes + 1, 1))
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('gastos_fijos') as batch_op:
+        batch_op.drop_index('ix_gastos_fijos_activo_next_run_at')
+        batch_op.drop_column('next_run_at')
+        batch_op.drop_column('dia_mes')
+        batch_op.drop_column('intervalo')
+        batch_op.drop_column('frecuencia')
@@ -0,0 +1,28 @@
+"""
+Script de backfill de gastos fijos: genera los meses faltantes entre la última
+instancia de cada gasto fijo activo y el mes actual.
+Uso: python backfill_gastos_fijos.py [--user-id ID] [--meses-max N]
+"""
+import argparse
+
+from database import SessionLocal
+from services.scheduler_service import MAX_MESES_BACKFILL, ejecutar_backfill
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de gastos fijos")
+    parser.add_argument("--user-id", type=int, default=None, help="Limitar a un usuario")
+    parser.add_argument("--meses-max", type=int, default=MAX_MESES_BACKFILL,
+                        help="Meses hacia atrás a cubrir (default: %(default)s)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        creados = ejecutar_backfill(db, user_id=args.user_id, meses_max=args.meses_max)
+    finally:
+        db.close()
+    print(f"Backfill completado. Movimientos creados: {creados}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark del núcleo de dinero en centavos vs la aritmética Decimal anterior.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_money
+"""
+import random
+import time
+from decimal import Decimal, ROUND_DOWN
+from types import SimpleNamespace
+
+from money import a_centavos, a_decimal
+from services.split_service import calcular_shares
+
+CANT_GASTOS = 20000
+TAMANIOS_GRUPO = [10, 100, 500]
+GASTOS_POR_GRUPO = 2000
+
+
+def _calcular_shares_decimal(importe: Decimal, n: int) -> list[Decimal]:
+    share_base = (importe / n).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+    remainder = importe - share_base * n
+    return [share_base + (remainder if i == 0 else Decimal('0')) for i in range(n)]
+
+
+def _balances_decimal(members, expenses):
+    total_paid = {m: Decimal('0') for m in members}
+    total_share = {m: Decimal('0') for m in members}
+    for expense in expenses:
+        total_paid[expense.paid_by_member_id] += expense.importe
+        for p in expense.participants:
+            total_share[p.member_id] += p.share_amount
+    return {
+        m: (total_paid[m] - total_share[m]).quantize(Decimal('0.01'))
+        for m in members
+    }
+
+
+def _balances_centavos(members, expenses):
+    total_paid = {m: Decimal('0') for m in members}
+    total_share = {m: Decimal('0') for m in members}
+    for expense in expenses:
+        total_paid[expense.paid_by_member_id] += expense.importe
+        for p in expense.participants:
+            total_share[p.member_id] += p.share_amount
+    return {m: a_decimal(a_centavos(total_paid[m]) - a_centavos(total_share[m])) for m in members}
+
+
+def _balances_centavos_por_fila(members, expenses):
+    """Variante descartada: convertir cada fila a centavos cuesta más que sumar Decimal."""
+    total_paid = {m: 0 for m in members}
+    total_share = {m: 0 for m in members}
+    for expense in expenses:
+        total_paid[expense.paid_by_member_id] += a_centavos(expense.importe)
+        for p in expense.participants:
+            total_share[p.member_id] += a_centavos(p.share_amount)
+    return {m: a_decimal(total_paid[m] - total_share[m]) for m in members}
+
+
+def _grupo(n: int, rng: random.Random):
+    members = list(range(n))
+    expenses = []
+    for _ in range(GASTOS_POR_GRUPO):
+        importe = Decimal(rng.randint(100, 10_000_000)) / 100
+        participantes = rng.sample(members, rng.randint(1, min(n, 8)))
+        shares = calcular_shares(importe, len(participantes))
+        expenses.append(SimpleNamespace(
+            importe=importe,
+            paid_by_member_id=rng.choice(members),
+            participants=[SimpleNamespace(member_id=m, share_amount=s) for m, s in zip(participantes, shares)],
+        ))
+    return members, expenses
+
+
+def _cronometrar(fn, *args) -> tuple[object, float]:
+    inicio = time.perf_counter()
+    resultado = fn(*args)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    rng = random.Random(42)
+
+    gastos = [(Decimal(rng.randint(1, 10_000_000)) / 100, rng.randint(1, 300)) for _ in range(CANT_GASTOS)]
+    ref, ms_dec = _cronometrar(lambda: [_calcular_shares_decimal(i, n) for i, n in gastos])
+    nuevo, ms_cent = _cronometrar(lambda: [calcular_shares(i, n) for i, n in gastos])
+    assert [sum(s) for s in ref] == [sum(s) for s in nuevo]
+    print(f"calcular_shares x{CANT_GASTOS}: decimal {ms_dec:.1f} ms | centavos {ms_cent:.1f} ms "
+          f"| x{ms_dec / ms_cent:.2f}")
+
+    for n in TAMANIOS_GRUPO:
+        pesos = [Decimal(rng.randint(1, 400)) / 4 for _ in range(n)]
+        shares, ms = _cronometrar(calcular_shares, Decimal("987654.32"), n, "weights", pesos)
+        assert sum(shares) == Decimal("987654.32")
+        print(f"calcular_shares weights {n:>3} participantes: {ms:.2f} ms")
+
+    for n in TAMANIOS_GRUPO:
+        members, expenses = _grupo(n, rng)
+        ref, ms_dec = _cronometrar(_balances_decimal, members, expenses)
+        nuevo, ms_cent = _cronometrar(_balances_centavos, members, expenses)
+        por_fila, ms_fila = _cronometrar(_balances_centavos_por_fila, members, expenses)
+        assert ref == nuevo == por_fila
+        print(f"balances grupo {n:>3} miembros / {GASTOS_POR_GRUPO} gastos: decimal {ms_dec:.1f} ms "
+              f"| centavos por total {ms_cent:.1f} ms | centavos por fila {ms_fila:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
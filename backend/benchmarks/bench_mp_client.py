@@ -0,0 +1,76 @@
+"""
+Prueba de carga del cliente de Mercado Pago contra el stand-in local (mp_fake.py) por
+HTTP real: cliente compartido con keep-alive vs un cliente nuevo por llamada (como el
+SDK anterior, que se armaba en cada request).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_mp_client [--url http://localhost:8081]
+Sin --url levanta mp_fake en un hilo en 127.0.0.1:8081.
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import httpx
+import uvicorn
+
+import mp_fake
+from services.mp_client import MPClient
+
+CONCURRENCIAS = [1, 10, 50]
+LLAMADAS = 500
+
+
+def _levantar_fake(puerto: int) -> None:
+    server = uvicorn.Server(uvicorn.Config(mp_fake.app, host="127.0.0.1", port=puerto, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+async def _correr(llamar, concurrencia: int) -> float:
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def una():
+        async with semaforo:
+            await llamar()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(una() for _ in range(LLAMADAS)))
+    return time.perf_counter() - inicio
+
+
+async def _medir(url: str, pago_id: str) -> None:
+    compartido = MPClient(access_token="TEST-token", base_url=url)
+
+    async def con_pool():
+        await compartido.obtener_pago(pago_id)
+
+    async def sin_pool():
+        async with httpx.AsyncClient(base_url=url) as cliente:
+            (await cliente.get(f"/v1/payments/{pago_id}")).raise_for_status()
+
+    print(f"{'concurrencia':>12} {'compartido (req/s)':>20} {'cliente por llamada (req/s)':>28}")
+    for concurrencia in CONCURRENCIAS:
+        t_pool = await _correr(con_pool, concurrencia)
+        t_nuevo = await _correr(sin_pool, concurrencia)
+        print(f"{concurrencia:>12} {LLAMADAS / t_pool:>20.0f} {LLAMADAS / t_nuevo:>28.0f}")
+    await compartido.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga del cliente de Mercado Pago")
+    parser.add_argument("--url", default=None, help="URL de un mp_fake ya levantado")
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        _levantar_fake(8081)
+        url = "http://127.0.0.1:8081"
+    pago = httpx.post(f"{url}/_fake/payments", json={"external_reference": "payment_1"}).json()
+    asyncio.run(_medir(url, str(pago["id"])))
+
+
+if __name__ == "__main__":
+    main()
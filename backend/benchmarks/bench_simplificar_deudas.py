@@ -0,0 +1,91 @@
+"""
+Benchmark del solver de deudas: transferencias y latencia, exacto vs greedy, y cuántas
+veces el exacto agotó su presupuesto y cayó al greedy (columna "timeouts").
+
+Uso (desde backend/):
+    python -m benchmarks.bench_simplificar_deudas
+"""
+import random
+import time
+
+from services import balance_service
+from services.balance_service import _greedy, calcular_transferencias
+
+TAMANIOS = [4, 8, 12, 16, 20, 40]
+REPETICIONES = 5
+
+
+def _saldos_aleatorios(n: int, rng: random.Random) -> list[tuple[int, int]]:
+    """Saldos sin estructura: rara vez hay subconjuntos de suma cero."""
+    centavos = [rng.randint(-500000, 500000) for _ in range(n - 1)]
+    centavos.append(-sum(centavos))
+    return list(enumerate(centavos))
+
+
+def _saldos_en_subgrupos(n: int, rng: random.Random) -> list[tuple[int, int]]:
+    """Saldos formados por subgrupos de 2-4 personas que se deben solo entre sí."""
+    centavos = []
+    while len(centavos) < n:
+        k = min(rng.randint(2, 4), n - len(centavos))
+        if k == 1:
+            centavos[-1:] = [centavos[-1], 0]
+            break
+        parte = [rng.randint(-500000, 500000) for _ in range(k - 1)]
+        parte.append(-sum(parte))
+        centavos.extend(parte)
+    rng.shuffle(centavos)
+    return [(i, c) for i, c in enumerate(centavos) if c]
+
+
+def _saldos_repetidos(n: int, rng: random.Random) -> list[tuple[int, int]]:
+    """Gastos divididos en partes iguales: muchos saldos con el mismo monto."""
+    centavos = [rng.choice([-3, -2, -1, 1, 2, 4]) * 100000 for _ in range(n - 1)]
+    centavos.append(-sum(centavos))
+    return [(i, c) for i, c in enumerate(centavos) if c]
+
+
+class _ContarTimeouts:
+    """Envuelve el solver exacto y cuenta las veces que retorna None (presupuesto agotado)."""
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.timeouts = 0
+
+    def __call__(self, *args):
+        grupos = self.solver(*args)
+        self.timeouts += grupos is None
+        return grupos
+
+
+def _medir(fn, saldos) -> tuple[int, float]:
+    inicio = time.perf_counter()
+    transfers = fn(saldos)
+    return len(transfers), (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    rng = random.Random(42)
+    contador = balance_service._particion_optima = _ContarTimeouts(balance_service._particion_optima)
+    print(f"{'escenario':<12} {'n':>3} {'greedy':>7} {'exacto':>7} {'greedy ms':>10} {'exacto ms':>10} {'timeouts':>9}")
+    escenarios = (("aleatorio", _saldos_aleatorios), ("subgrupos", _saldos_en_subgrupos), ("repetidos", _saldos_repetidos))
+    for nombre, generador in escenarios:
+        for n in TAMANIOS:
+            cant_g = cant_e = ms_g = ms_e = 0.0
+            contador.timeouts = 0
+            for _ in range(REPETICIONES):
+                saldos = generador(n, rng)
+                c, ms = _medir(_greedy, saldos)
+                cant_g += c
+                ms_g += ms
+                c, ms = _medir(calcular_transferencias, saldos)
+                cant_e += c
+                ms_e += ms
+            print(
+                f"{nombre:<12} {n:>3} {cant_g / REPETICIONES:>7.1f} {cant_e / REPETICIONES:>7.1f} "
+                f"{ms_g / REPETICIONES:>10.2f} {ms_e / REPETICIONES:>10.2f} "
+                f"{contador.timeouts:>5}/{REPETICIONES}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,56 @@ if IS_PRODUCTION and not ENCRYPTION_KEY:
 # Mercado Pago
 MP_ACCESS_TOKEN = os.getenv("MP_ACCESS_TOKEN", "")
 MP_WEBHOOK_SECRET = os.getenv("MP_WEBHOOK_SECRET", "")
+# Base de la API (apuntar al stand-in local mp_fake.py para pruebas sin red)
+MP_API_URL = os.getenv("MP_API_URL", "https://api.mercadopago.com")
+MP_TIMEOUT_SECONDS = float(os.getenv("MP_TIMEOUT_SECONDS", "10"))
+MP_MAX_RETRIES = int(os.getenv("MP_MAX_RETRIES", "2"))
+# Circuit breaker: fallos seguidos para abrirlo y segundos que queda abierto
+MP_BREAKER_FAILURES = int(os.getenv("MP_BREAKER_FAILURES", "5"))
+MP_BREAKER_RESET_SECONDS = float(os.getenv("MP_BREAKER_RESET_SECONDS", "30"))
+# GET /payments/{id}/status: segundos sin volver a consultar MP y tope de consultas por pago
+PAYMENT_STATUS_TTL_SECONDS = float(os.getenv("PAYMENT_STATUS_TTL_SECONDS", "5"))
+PAYMENT_STATUS_MAX_LOOKUPS_PER_MINUTE = int(os.getenv("PAYMENT_STATUS_MAX_LOOKUPS_PER_MINUTE", "6"))
+# Reconciliación programada de pagos pendientes sin webhook (solo con MP_ACCESS_TOKEN)
+PAYMENT_RECONCILE_INTERVAL_MINUTES = int(os.getenv("PAYMENT_RECONCILE_INTERVAL_MINUTES", "10"))
+PAYMENT_RECONCILE_MIN_AGE_MINUTES = float(os.getenv("PAYMENT_RECONCILE_MIN_AGE_MINUTES", "10"))
+PAYMENT_RECONCILE_MAX_AGE_HOURS = float(os.getenv("PAYMENT_RECONCILE_MAX_AGE_HOURS", "72"))
+PAYMENT_RECONCILE_CONCURRENCY = int(os.getenv("PAYMENT_RECONCILE_CONCURRENCY", "8"))
 
 # URLs
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+
+# Observabilidad: sentencias SQL más lentas que este umbral se loguean
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+# Categorías del sistema: se cachean en memoria y se sirven con Cache-Control/ETag.
+# Subir CATEGORIES_VERSION al cambiar el seed invalida el registro y los ETag de los clientes.
+CATEGORIES_VERSION = os.getenv("CATEGORIES_VERSION", "1")
+CATEGORIES_MAX_AGE = int(os.getenv("CATEGORIES_MAX_AGE", "3600"))
+
+# Contactos: usuarios con índice de nombres en memoria por proceso (LRU)
+CONTACT_INDEX_MAX_USERS = int(os.getenv("CONTACT_INDEX_MAX_USERS", "256"))
+
+# Contactos: máximo de filas por archivo en /contacts/import
+CONTACT_IMPORT_MAX_ROWS = int(os.getenv("CONTACT_IMPORT_MAX_ROWS", "5000"))
+
+# Scheduler (gastos fijos, reconciliación de pagos); los tests lo apagan
+SCHEDULER_ENABLED = _as_bool(os.getenv("SCHEDULER_ENABLED"), default=True)
+
+# Cola de trabajos en segundo plano (services/job_queue.py)
+# Worker en un hilo del proceso de la API; con workers separados (python worker.py) se puede apagar
+JOB_WORKER_IN_PROCESS = _as_bool(os.getenv("JOB_WORKER_IN_PROCESS"), default=True)
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+# Backoff exponencial entre reintentos: base * 2^(intento - 1)
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "10"))
+# Un trabajo 'running' más viejo que esto se considera de un worker caído y vuelve a la cola
+JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "600"))
+
+# Eventos en vivo para la PWA (GET /events, services/eventos.py)
+# Con varios procesos (workers de uvicorn, worker.py) los eventos viajan por Postgres LISTEN/NOTIFY
+EVENTS_PG_NOTIFY = _as_bool(os.getenv("EVENTS_PG_NOTIFY"), default=False)
+EVENTS_MAX_CONNECTIONS_PER_USER = int(os.getenv("EVENTS_MAX_CONNECTIONS_PER_USER", "5"))
+# Comentario SSE cada tantos segundos sin eventos (mantiene viva la conexión en proxies)
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
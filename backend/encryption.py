@@ -1,5 +1,8 @@
+import hashlib
+import hmac
+
 from cryptography.fernet import Fernet
-from sqlalchemy import String, TypeDecorator
+from sqlalchemy import String, TypeDecorator, Table, column, table
 import config
 
 
@@ -10,6 +13,35 @@ def get_fernet():
     return Fernet(key.encode() if isinstance(key, str) else key)
 
 
+def encrypt_many(values: list) -> list:
+    """Encripta una lista de valores con una sola instancia de Fernet (None se mantiene)."""
+    f = get_fernet()
+    return [None if v is None else f.encrypt(v.encode()).decode() for v in values]
+
+
+def blind_index(value: str) -> str:
+    """
+    HMAC-SHA256 (hex) de `value` con una clave derivada de ENCRYPTION_KEY. Permite
+    comparar por igualdad valores encriptados sin guardarlos en claro.
+    """
+    key = config.ENCRYPTION_KEY
+    if not key:
+        raise ValueError("ENCRYPTION_KEY no configurada en .env")
+    derived = hashlib.sha256(b"blind-index:" + (key.encode() if isinstance(key, str) else key)).digest()
+    return hmac.new(derived, value.encode(), hashlib.sha256).hexdigest()
+
+
+def plain_table(source: Table):
+    """
+    Vista Core de `source` donde las columnas EncryptedString son String plano.
+    Sirve para inserts en lote con valores ya encriptados por encrypt_many.
+    """
+    return table(source.name, *(
+        column(c.name, String() if isinstance(c.type, EncryptedString) else c.type)
+        for c in source.columns
+    ))
+
+
 class EncryptedString(TypeDecorator):
     """Columna que encripta/desencripta transparentemente con Fernet."""
     impl = String
@@ -28,19 +28,22 @@ logger = logging.getLogger("finanzaapp")
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from database import engine, get_db, Base
+from database import engine, Base, SessionLocal
 import models
 import config
+import sql_metrics
 from dependencies import limiter
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
-from services.scheduler_service import create_scheduler, ejecutar_generacion_mensual
+from services import category_registry, eventos, job_queue, mp_client, tareas  # noqa: F401 (tareas registra los handlers)
+from services.scheduler_service import create_scheduler, detener_scheduler
 
 # Routers
 from routers import auth, categorias, movimientos, contactos
-from routers import split_groups, split_expenses, balances, payments, gastos_fijos
+from routers import split_groups, split_expenses, balances, payments, gastos_fijos, events
 
 # Crear todas las tablas en la base de datos si no existen
 # ⚠️ Las migraciones de esquema se manejan con Alembic (ver carpeta alembic/).
@@ -49,20 +52,35 @@ Base.metadata.create_all(bind=engine)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Al arrancar: ejecutar generación como catch-up (idempotente)
-    db = next(get_db())
+    # Cargar el registro de categorías del sistema (seed de solo lectura)
+    db = SessionLocal()
     try:
-        ejecutar_generacion_mensual(db)
+        category_registry.recargar(db)
     finally:
         db.close()
 
-    # Iniciar scheduler (día 1 de cada mes a las 00:01)
-    scheduler = create_scheduler()
-    scheduler.start()
+    # Iniciar scheduler (gastos fijos vencidos, cada hora). Solo el proceso con el lease
+    # ejecuta los jobs; el catch-up de arranque corre en segundo plano.
+    scheduler = create_scheduler() if config.SCHEDULER_ENABLED else None
+    if scheduler:
+        scheduler.start()
+
+    # Worker de la cola de trabajos en este proceso (se apaga si hay workers separados)
+    worker = job_queue.iniciar_worker_en_proceso() if config.JOB_WORKER_IN_PROCESS else None
+    # Eventos publicados por otros procesos (LISTEN en Postgres)
+    puente = eventos.iniciar_puente_pg() if config.EVENTS_PG_NOTIFY else None
 
     yield
 
-    scheduler.shutdown()
+    # Las esperas a los hilos van al threadpool para no frenar el event loop (streams SSE,
+    # tareas en segundo plano) mientras el worker termina el trabajo en curso
+    if puente:
+        await run_in_threadpool(eventos.detener_puente_pg, *puente)
+    if worker:
+        await run_in_threadpool(job_queue.detener_worker, *worker)
+    if scheduler:
+        detener_scheduler(scheduler)
+    await mp_client.cerrar()
 
 
 # Crear la aplicación FastAPI
@@ -94,10 +112,23 @@ app.add_middleware(
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         start = time.perf_counter()
-        response = await call_next(request)
+        sql_stats, token = sql_metrics.iniciar_request()
+        try:
+            response = await call_next(request)
+        finally:
+            sql_metrics.finalizar_request(token)
         duration_ms = round((time.perf_counter() - start) * 1000)
         level = logging.WARNING if response.status_code >= 400 else logging.INFO
-        logger.log(level, "%s %s → %d (%dms)", request.method, request.url.path, response.status_code, duration_ms)
+        logger.log(
+            level, "%s %s → %d (%dms, %d queries, %.1fms db)",
+            request.method, request.url.path, response.status_code, duration_ms,
+            sql_stats.queries, sql_stats.db_time_ms,
+        )
+        if not config.IS_PRODUCTION:
+            response.headers["Server-Timing"] = (
+                f'db;dur={sql_stats.db_time_ms:.1f};desc="{sql_stats.queries} queries", '
+                f"app;dur={duration_ms}"
+            )
         return response
 
 
@@ -113,6 +144,7 @@ app.include_router(split_expenses.router)
 app.include_router(balances.router)
 app.include_router(payments.router)
 app.include_router(gastos_fijos.router)
+app.include_router(events.router)
 
 
 @app.get("/")
@@ -1,5 +1,5 @@
 # Importamos tipos de columnas y herramientas de SQLAlchemy
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Boolean, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Boolean, ForeignKey, Index, JSON, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 # CONEXIÓN: Importamos Base desde database.py (la clase padre de todos los modelos)
 from database import Base
@@ -112,6 +112,23 @@ class GastoFijo(Base):
     activo = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime, default=datetime.now)
 
+    # REGLA DE RECURRENCIA (ver services/recurrence_service.py)
+    frecuencia = Column(String, default="monthly", nullable=False)  # weekly, biweekly, monthly, yearly
+    intervalo = Column(Integer, default=1, nullable=False)  # Cada N semanas/quincenas/meses/años
+    dia_mes = Column(Integer, nullable=True)  # Día del mes para monthly/yearly (None = día 1 / mismo día)
+    next_run_at = Column(DateTime, nullable=True)  # Próxima ocurrencia a generar
+
+    # STATS DESNORMALIZADAS (ver services/gasto_fijo_service.py)
+    max_importe = Column(Numeric(10, 2), nullable=True)  # Máximo histórico
+    ultimo_importe = Column(Numeric(10, 2), nullable=True)  # Importe de la última instancia
+    ultima_fecha = Column(DateTime, nullable=True)  # Fecha de la última instancia
+    total_meses = Column(Integer, default=0, nullable=False)  # Cantidad de instancias
+
+    # Índice: el scheduler solo lee los templates activos vencidos
+    __table_args__ = (
+        Index('ix_gastos_fijos_activo_next_run_at', 'activo', 'next_run_at'),
+    )
+
     # RELACIONES
     usuario = relationship("User")
     categoria = relationship("Category")
@@ -144,9 +161,21 @@ class Movimiento(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
 
     # GASTO FIJO: FK opcional al template (si fue generado automáticamente)
-    gasto_fijo_id = Column(Integer, ForeignKey("gastos_fijos.id"), nullable=True, index=True)
+    gasto_fijo_id = Column(Integer, ForeignKey("gastos_fijos.id"), nullable=True)
     is_auto_generated = Column(Boolean, default=False, nullable=False)
 
+    # Índice compuesto: stats por gasto fijo (máximo, último por fecha) y dedupe mensual.
+    # El único parcial impide dos instancias auto-generadas de la misma ocurrencia aunque
+    # el cron, el catch-up y un backfill corran a la vez (se insertan con ON CONFLICT DO NOTHING)
+    __table_args__ = (
+        Index('ix_movimientos_gasto_fijo_fecha', 'gasto_fijo_id', 'fecha'),
+        Index(
+            'uq_movimientos_gasto_fijo_fecha_auto', 'gasto_fijo_id', 'fecha', unique=True,
+            sqlite_where=text("is_auto_generated"),
+            postgresql_where=text("is_auto_generated"),
+        ),
+    )
+
     # RELACIONES
     categoria = relationship("Category", back_populates="movimientos")  # Categoría del sistema
     user_category = relationship("UserCategory", back_populates="movimientos")  # Categoría personalizada
@@ -168,17 +197,25 @@ class Contact(Base):
     __tablename__ = "contacts"
 
     id = Column(Integer, primary_key=True, index=True)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     nombre = Column(EncryptedString, nullable=False)
     alias_bancario = Column(EncryptedString, nullable=True)
     cvu = Column(EncryptedString, nullable=True)
     linked_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.now)
+    # Junto con count/max(id) es la huella del índice de nombres (services/contact_index.py)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # Digest de nombre + CVU normalizados para detectar duplicados (services/contact_import.py)
+    dedup_digest = Column(String(64), nullable=True)
 
     # RELACIONES
     owner = relationship("User", foreign_keys=[owner_id], backref="contacts")
     linked_user = relationship("User", foreign_keys=[linked_user_id])
 
+    __table_args__ = (
+        Index('ix_contacts_owner_id_dedup_digest', 'owner_id', 'dedup_digest'),
+    )
+
 
 # MODELO: Grupo para dividir gastos
 class SplitGroup(Base):
@@ -258,7 +295,7 @@ class Payment(Base):
 
     # Mercado Pago
     mp_preference_id = Column(String, nullable=True)
-    mp_payment_id = Column(String, nullable=True)
+    mp_payment_id = Column(String, nullable=True)  # Único: un pago de MP es de un solo Payment
     status = Column(String, default="pending")  # pending, approved, rejected, cancelled
 
     created_at = Column(DateTime, default=datetime.now)
@@ -267,4 +304,98 @@ class Payment(Base):
     # RELACIONES
     group = relationship("SplitGroup")
     from_member = relationship("SplitGroupMember", foreign_keys=[from_member_id])
-    to_member = relationship("SplitGroupMember", foreign_keys=[to_member_id])
\ No newline at end of file
+    to_member = relationship("SplitGroupMember", foreign_keys=[to_member_id])
+
+    __table_args__ = (
+        Index('uq_payments_mp_payment_id', 'mp_payment_id', unique=True),
+        # Reconciliación: pendientes por antigüedad
+        Index('ix_payments_status_created_at', 'status', 'created_at'),
+    )
+
+
+class MPNotification(Base):
+    """
+    Notificación de webhook de Mercado Pago tal como llegó. Se guarda y se responde 200
+    al instante; la consulta del pago la hace la cola de trabajos. Las reentregas de la
+    misma notificación (mismo data.id y x-request-id) no se vuelven a procesar.
+    """
+    __tablename__ = "mp_notifications"
+
+    id = Column(Integer, primary_key=True, index=True)
+    data_id = Column(String, nullable=False)  # data.id: id del pago en MP
+    request_id = Column(String, nullable=False)  # Header x-request-id
+    topic = Column(String, nullable=False)  # type: payment, ...
+    body = Column(JSON, nullable=False)
+    received_at = Column(DateTime, nullable=False, default=datetime.now)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('data_id', 'request_id', name='uq_mp_notifications_data_id_request_id'),
+    )
+
+# ============== MODELOS DEL SCHEDULER ==============
+
+class SchedulerLease(Base):
+    """
+    Lease del scheduler: solo el proceso que lo tiene vigente ejecuta los jobs
+    programados (un solo líder entre workers y réplicas).
+    """
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    acquired_at = Column(DateTime, default=datetime.now)
+
+
+class JobRun(Base):
+    """Historial de ejecuciones de jobs programados."""
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Jobs por usuario (None = globales)
+    holder = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="running")  # pending, running, success, error
+    started_at = Column(DateTime, nullable=False, default=datetime.now)
+    finished_at = Column(DateTime, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    rows_created = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index('ix_job_runs_job_name_started_at', 'job_name', 'started_at'),
+        # Coalescing: a lo sumo un job activo por (job_name, user_id)
+        Index(
+            'uq_job_runs_activo', 'job_name', 'user_id', unique=True,
+            sqlite_where=text("status IN ('pending', 'running')"),
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+
+
+# ============== COLA DE TRABAJOS EN SEGUNDO PLANO ==============
+
+class BackgroundJob(Base):
+    """
+    Trabajo encolado para ejecutarse fuera del request (emails, Mercado Pago, generación).
+    Lo toma un worker (en proceso o separado); ver services/job_queue.py.
+    """
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # Nombre de la tarea registrada
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String, nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False, default=datetime.now)  # No antes de (backoff)
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_background_jobs_status_run_at', 'status', 'run_at'),
+    )
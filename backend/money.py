@@ -0,0 +1,41 @@
+"""
+Núcleo de dinero en centavos enteros.
+
+Los cálculos internos (shares, netos, deudas) operan sobre int (centavos) y solo
+se convierten a Decimal en el borde de los schemas (MoneyDecimal). Las sumas de
+columnas Numeric se acumulan en Decimal (exacto y rápido en C) y se convierten
+una vez por total, no por fila.
+"""
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Union
+
+Monto = Union[Decimal, int, float, str]
+
+
+def a_centavos(valor: Monto) -> int:
+    """Convierte un monto en pesos a centavos (redondeo bancario, igual que quantize)."""
+    if not isinstance(valor, Decimal):
+        valor = Decimal(str(valor))
+    return int(valor.scaleb(2).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def a_decimal(centavos: int) -> Decimal:
+    """Convierte centavos a Decimal con 2 decimales (equivale a quantize(Decimal('0.01')))."""
+    return Decimal(centavos).scaleb(-2)
+
+
+def repartir_proporcional(total: int, pesos: list[int]) -> list[int]:
+    """
+    Reparte `total` centavos en proporción a `pesos` (enteros positivos) con el
+    método del mayor resto: cada parte recibe el piso de su cuota y los centavos
+    sobrantes van a las partes con mayor resto (empates por orden). La suma es exacta.
+    """
+    suma_pesos = sum(pesos)
+    cuotas = [divmod(total * p, suma_pesos) for p in pesos]
+    partes = [q for q, _ in cuotas]
+    faltan = total - sum(partes)
+    if faltan:
+        orden = sorted(range(len(cuotas)), key=lambda i: cuotas[i][1], reverse=True)
+        for i in orden[:faltan]:
+            partes[i] += 1
+    return partes
@@ -0,0 +1,136 @@
+"""
+Stand-in local de la API de Mercado Pago (preferencias, pagos y búsqueda) para tests y
+pruebas de carga sin red. Guarda todo en memoria.
+
+Uso: uvicorn mp_fake:app --port 8081  y en la API  MP_API_URL=http://localhost:8081
+(MP_ACCESS_TOKEN puede ser cualquier valor).
+
+Endpoints de control (/_fake/...): crear o cambiar pagos, inyectar fallas (status HTTP
+o latencia) y resetear el estado. En tests se usa en proceso con httpx.ASGITransport.
+"""
+import asyncio
+import itertools
+import os
+from datetime import datetime
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class FakeMP:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.preferencias: dict[str, dict] = {}
+        self.por_idempotencia: dict[str, dict] = {}
+        self.pagos: dict[str, dict] = {}
+        self.fallas: list[int] = []  # Status a responder en los próximos pedidos
+        self.latencia_ms = float(os.getenv("MP_FAKE_LATENCY_MS", "0"))
+        self.pedidos = 0
+        self._ids = itertools.count(1_000_001)
+
+    def crear_pago(self, external_reference: str, status: str = "approved", transaction_amount: float = 0) -> dict:
+        pago = {
+            "id": next(self._ids),
+            "external_reference": external_reference,
+            "status": status,
+            "transaction_amount": transaction_amount,
+            "date_created": datetime.now().isoformat(),
+        }
+        self.pagos[str(pago["id"])] = pago
+        return pago
+
+
+estado = FakeMP()
+app = FastAPI(title="Mercado Pago (fake)")
+
+
+@app.middleware("http")
+async def _simular(request: Request, call_next):
+    if request.url.path.startswith("/_fake"):
+        return await call_next(request)
+    estado.pedidos += 1
+    if estado.latencia_ms:
+        await asyncio.sleep(estado.latencia_ms / 1000)
+    if estado.fallas:
+        status = estado.fallas.pop(0)
+        return JSONResponse({"message": "fake failure", "status": status}, status_code=status)
+    return await call_next(request)
+
+
+@app.post("/checkout/preferences", status_code=201)
+def crear_preferencia(preferencia: dict, x_idempotency_key: Optional[str] = Header(None)):
+    if x_idempotency_key and x_idempotency_key in estado.por_idempotencia:
+        return estado.por_idempotencia[x_idempotency_key]
+    pref_id = f"pref-{len(estado.preferencias) + 1}"
+    respuesta = {
+        **preferencia,
+        "id": pref_id,
+        "init_point": f"https://www.mercadopago.com.ar/checkout/v1/redirect?pref_id={pref_id}",
+        "date_created": datetime.now().isoformat(),
+    }
+    estado.preferencias[pref_id] = respuesta
+    if x_idempotency_key:
+        estado.por_idempotencia[x_idempotency_key] = respuesta
+    return respuesta
+
+
+@app.get("/v1/payments/search")
+def buscar_pagos(external_reference: Optional[str] = None, limit: int = 30):
+    resultados = [
+        p for p in estado.pagos.values()
+        if external_reference is None or p["external_reference"] == external_reference
+    ]
+    resultados.sort(key=lambda p: p["date_created"], reverse=True)
+    return {"results": resultados[:limit], "paging": {"total": len(resultados), "limit": limit, "offset": 0}}
+
+
+@app.get("/v1/payments/{payment_id}")
+def obtener_pago(payment_id: str):
+    if payment_id not in estado.pagos:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return estado.pagos[payment_id]
+
+
+# ============== CONTROL ==============
+
+class PagoFake(BaseModel):
+    external_reference: str
+    status: str = "approved"
+    transaction_amount: float = 0
+
+
+class FallasFake(BaseModel):
+    status: int = 500
+    veces: int = 1
+    latencia_ms: Optional[float] = None
+
+
+@app.post("/_fake/payments")
+def fake_crear_pago(pago: PagoFake):
+    return estado.crear_pago(pago.external_reference, pago.status, pago.transaction_amount)
+
+
+@app.put("/_fake/payments/{payment_id}")
+def fake_cambiar_estado(payment_id: str, status: str):
+    if payment_id not in estado.pagos:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    estado.pagos[payment_id]["status"] = status
+    return estado.pagos[payment_id]
+
+
+@app.post("/_fake/failures")
+def fake_fallas(fallas: FallasFake):
+    estado.fallas.extend([fallas.status] * fallas.veces)
+    if fallas.latencia_ms is not None:
+        estado.latencia_ms = fallas.latencia_ms
+    return {"pendientes": len(estado.fallas), "latencia_ms": estado.latencia_ms}
+
+
+@app.post("/_fake/reset")
+def fake_reset():
+    estado.reset()
+    return {"status": "ok"}
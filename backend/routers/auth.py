@@ -2,7 +2,7 @@
 from datetime import datetime, timedelta
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
@@ -26,7 +26,8 @@ from auth import (
 )
 from database import get_db
 from dependencies import limiter
-from email_service import send_password_reset_email
+from services import job_queue
+from services.tareas import TAREA_EMAIL_RESET
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -153,9 +154,10 @@ def get_me(current_user: models.User = Depends(get_current_active_user)):
 
 @router.post("/forgot-password")
 @limiter.limit("3/minute")
-async def forgot_password(
+def forgot_password(
     request: Request,
     payload: schemas.PasswordResetRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     user = get_user_by_email(db, payload.email)
@@ -173,17 +175,12 @@ async def forgot_password(
         expires_at=expires_at,
     )
     db.add(reset_token)
-    db.commit()
+    db.flush()
 
-    try:
-        await send_password_reset_email(
-            email=user.email,
-            username=user.username,
-            reset_token=token_str,
-            expires_in_hours=1,
-        )
-    except Exception as e:
-        print(f"⚠️ Error enviando email a {user.email}: {str(e)}")
+    # El email se envía fuera del request (cola de trabajos, con reintentos)
+    trabajo = job_queue.encolar(db, TAREA_EMAIL_RESET, {"reset_token_id": reset_token.id})
+    db.commit()
+    job_queue.despachar(background_tasks, db, trabajo)
 
     return {"message": message}
 
@@ -1,6 +1,4 @@
 """Router de balances: /split-groups/{group_id}/balances"""
-from decimal import Decimal
-
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
 
@@ -8,7 +6,8 @@ import models
 import schemas
 from auth import get_current_active_user
 from database import get_db
-from services.balance_service import simplificar_deudas
+from money import a_centavos, a_decimal
+from services.balance_service import calcular_saldos_grupo, simplificar_deudas
 
 router = APIRouter(tags=["balances"])
 
@@ -35,72 +34,62 @@ def get_group_balances(
         models.SplitGroupMember.group_id == group_id,
     ).all()
 
-    expenses = db.query(models.SplitExpense).options(
-        joinedload(models.SplitExpense.participants),
-    ).filter(
-        models.SplitExpense.group_id == group_id,
-    ).all()
-
-    # Deduplicar (joinedload puede producir duplicados)
-    seen_expenses = set()
-    unique_expenses = []
-    for e in expenses:
-        if e.id not in seen_expenses:
-            seen_expenses.add(e.id)
-            unique_expenses.append(e)
-    expenses = unique_expenses
-
-    # Calcular balances individuales
-    total_paid = {m.id: Decimal('0') for m in members}
-    total_share = {m.id: Decimal('0') for m in members}
-
-    for expense in expenses:
-        total_paid[expense.paid_by_member_id] += expense.importe
-        for p in expense.participants:
-            total_share[p.member_id] += p.share_amount
+    # Gastos, participaciones y pagos aprobados agregados por miembro en SQL (centavos)
+    saldos = calcular_saldos_grupo(db, group_id)
+    total_expenses_amount = sum(pagado for pagado, _, _ in saldos.values())
 
     balances = []
     member_map = {m.id: m for m in members}
 
     for member in members:
-        net = total_paid[member.id] - total_share[member.id]
+        pagado, consumido, liquidado = saldos.get(member.id, (0, 0, 0))
         balances.append(schemas.MemberBalance(
             member_id=member.id,
             display_name=member.display_name,
-            total_paid=total_paid[member.id].quantize(Decimal('0.01')),
-            total_share=total_share[member.id].quantize(Decimal('0.01')),
-            net_balance=net.quantize(Decimal('0.01')),
+            total_paid=a_decimal(pagado),
+            total_share=a_decimal(consumido),
+            total_settled=a_decimal(liquidado),
+            net_balance=a_decimal(pagado - consumido + liquidado),
             contact=member.contact,
         ))
 
-    # Simplificar deudas (algoritmo greedy en balance_service)
+    # Simplificar deudas (algoritmo greedy en balance_service); lo ya pagado no vuelve a aparecer
     transfers = simplificar_deudas(balances, member_map, group.creator)
 
-    # Enriquecer transfers con info de pagos existentes
-    payments = db.query(models.Payment).filter(
+    # Pagos del grupo indexados por (deudor, acreedor): lo aprobado ya está descontado del
+    # monto de la transferencia y se informa en paid_amount; un pendiente marca la transferencia
+    pagos = db.query(
+        models.Payment.id,
+        models.Payment.from_member_id,
+        models.Payment.to_member_id,
+        models.Payment.amount,
+        models.Payment.status,
+    ).filter(
         models.Payment.group_id == group_id,
         models.Payment.status.in_(["pending", "approved"]),
     ).all()
 
-    for transfer in transfers:
-        for payment in payments:
-            if (payment.from_member_id == transfer.from_member_id
-                    and payment.to_member_id == transfer.to_member_id):
-                if payment.status == "approved":
-                    transfer.paid_amount = payment.amount
-                    transfer.payment_status = "approved"
-                    transfer.payment_id = payment.id
-                    break
-                elif payment.status == "pending" and not transfer.payment_status:
-                    transfer.payment_status = "pending"
-                    transfer.payment_id = payment.id
+    aprobados: dict[tuple[int, int], int] = {}
+    pendientes: dict[tuple[int, int], int] = {}
+    for payment_id, from_member_id, to_member_id, amount, status in pagos:
+        par = (from_member_id, to_member_id)
+        if status == "approved":
+            aprobados[par] = aprobados.get(par, 0) + a_centavos(amount)
+        else:
+            pendientes.setdefault(par, payment_id)
 
-    total_expenses_amount = sum((e.importe for e in expenses), Decimal('0'))
+    for transfer in transfers:
+        par = (transfer.from_member_id, transfer.to_member_id)
+        if par in aprobados:
+            transfer.paid_amount = a_decimal(aprobados[par])
+        if par in pendientes:
+            transfer.payment_status = "pending"
+            transfer.payment_id = pendientes[par]
 
     return schemas.GroupBalanceSummary(
         group_id=group_id,
         group_name=group.nombre,
-        total_expenses=total_expenses_amount.quantize(Decimal('0.01')),
+        total_expenses=a_decimal(total_expenses_amount),
         balances=balances,
         simplified_debts=transfers,
     )
@@ -2,25 +2,46 @@
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
+import config
 import models
 import schemas
 from auth import get_current_active_user
 from database import get_db
+from services import category_registry
+from services.category_service import recategorizar
 
 router = APIRouter(tags=["categorias"])
 
 
 # ============== CATEGORÍAS DEL SISTEMA ==============
 
+def _etag_coincide(if_none_match: str, etag: str) -> bool:
+    """Compara If-None-Match (lista, comodín o validadores débiles) con el ETag actual."""
+    candidatos = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidatos or etag in candidatos
+
+
 @router.get("/categories/", response_model=List[schemas.CategoryRead])
-def list_system_categories(db: Session = Depends(get_db)):
-    """Devuelve todas las categorías del sistema. No requiere autenticación."""
-    return db.query(models.Category).filter(
-        models.Category.es_predeterminada == True
-    ).all()
+def list_system_categories(request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    Devuelve todas las categorías del sistema. No requiere autenticación.
+    Se sirven desde el registro en memoria con Cache-Control y ETag; si el cliente
+    envía un If-None-Match vigente responde 304 sin cuerpo.
+    """
+    categorias, etag = category_registry.obtener(db)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={config.CATEGORIES_MAX_AGE}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_coincide(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return categorias
 
 
 # ============== CATEGORÍAS PERSONALIZADAS DEL USUARIO ==============
@@ -146,3 +167,32 @@ def delete_user_category(
     db.delete(category)
     db.commit()
     return None
+
+
+@router.post("/user-categories/{category_id}/merge-into/{target_id}", response_model=schemas.RecategorizeResult)
+def merge_user_category(
+    category_id: int,
+    target_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Fusiona una categoría personalizada en otra: sus movimientos y gastos fijos pasan
+    a la categoría destino (un UPDATE por tabla) y la categoría origen se elimina.
+    """
+    if category_id == target_id:
+        raise HTTPException(status_code=400, detail="La categoría destino debe ser distinta")
+
+    categorias = db.query(models.UserCategory).filter(
+        models.UserCategory.id.in_([category_id, target_id]),
+        models.UserCategory.user_id == current_user.id,
+    ).all()
+    if len(categorias) != 2:
+        raise HTTPException(status_code=404, detail="Categoría no encontrada")
+
+    n_movimientos, n_gastos_fijos = recategorizar(
+        db, current_user.id, user_category_id=target_id, actual_user_category_id=category_id,
+    )
+    db.query(models.UserCategory).filter(models.UserCategory.id == category_id).delete(synchronize_session=False)
+    db.commit()
+    return schemas.RecategorizeResult(movimientos=n_movimientos, gastos_fijos=n_gastos_fijos)
@@ -1,13 +1,17 @@
 """Router de contactos: /contacts/"""
-from typing import List
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
 
 import models
 import schemas
 from auth import get_current_active_user
 from database import get_db
+from money import a_decimal
+from services import contact_index
+from services.balance_service import calcular_balances_contactos
+from services.contact_import import digest_contacto, importar_contactos, leer_filas
 
 router = APIRouter(prefix="/contacts", tags=["contactos"])
 
@@ -24,6 +28,7 @@ def create_contact(
         alias_bancario=contact.alias_bancario,
         cvu=contact.cvu,
         linked_user_id=contact.linked_user_id,
+        dedup_digest=digest_contacto(current_user.id, contact.nombre, contact.cvu),
     )
     db.add(db_contact)
     db.commit()
@@ -31,14 +36,101 @@ def create_contact(
     return db_contact
 
 
+@router.post("/import", response_model=schemas.ContactImportResult)
+def import_contacts(
+    archivo: UploadFile = File(...),
+    formato: Optional[Literal["csv", "vcard"]] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Importa contactos desde CSV (columnas nombre, alias, cvu) o vCard (FN/N, X-ALIAS,
+    X-CVU). Se guarda por lotes; los duplicados (mismo nombre y CVU) no se crean.
+    Retorna el resultado de cada fila.
+    """
+    filas = importar_contactos(
+        db, current_user.id, leer_filas(archivo.file, archivo.filename or "", formato)
+    )
+    return schemas.ContactImportResult(
+        creados=sum(f["estado"] == "creado" for f in filas),
+        duplicados=sum(f["estado"] == "duplicado" for f in filas),
+        errores=sum(f["estado"] == "error" for f in filas),
+        filas=filas,
+    )
+
+
 @router.get("/", response_model=List[schemas.ContactRead])
 def list_contacts(
+    q: Optional[str] = Query(None, max_length=100),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Contactos ordenados por nombre, con búsqueda por prefijo de palabra (`q`) y paginado.
+    El orden sale del índice en memoria (el nombre está encriptado en la BD); solo se
+    leen y desencriptan las filas de la página.
+    """
+    ids = contact_index.buscar(db, current_user.id, q, limit, offset)
+    if not ids:
+        return []
+
+    query = db.query(models.Contact).filter(models.Contact.owner_id == current_user.id)
+    if q or limit is not None or offset:
+        query = query.filter(models.Contact.id.in_(ids))
+    por_id = {c.id: c for c in query}
+    return [por_id[i] for i in ids if i in por_id]
+
+
+@router.get("/balances", response_model=List[schemas.ContactBalance])
+def list_contact_balances(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """Balance consolidado de cada contacto con movimientos en los grupos del usuario."""
+    balances = calcular_balances_contactos(db, current_user.id)
+    if not balances:
+        return []
+
+    contactos = db.query(models.Contact).filter(
+        models.Contact.id.in_(balances.keys()),
+        models.Contact.owner_id == current_user.id,
+    ).all()
+
+    return [
+        schemas.ContactBalance(
+            contact_id=c.id,
+            nombre=c.nombre,
+            net_balance=a_decimal(balances[c.id][0]),
+            group_count=balances[c.id][1],
+        )
+        for c in contactos
+    ]
+
+
+@router.get("/{contact_id}/balance", response_model=schemas.ContactBalance)
+def get_contact_balance(
+    contact_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
-    return db.query(models.Contact).filter(
-        models.Contact.owner_id == current_user.id
-    ).order_by(models.Contact.nombre).all()
+    """Balance consolidado de un contacto en todos los grupos del usuario."""
+    db_contact = db.query(models.Contact).filter(
+        models.Contact.id == contact_id,
+        models.Contact.owner_id == current_user.id,
+    ).first()
+
+    if not db_contact:
+        raise HTTPException(status_code=404, detail="Contacto no encontrado")
+
+    neto, grupos = calcular_balances_contactos(db, current_user.id, contact_id).get(contact_id, (0, 0))
+    return schemas.ContactBalance(
+        contact_id=db_contact.id,
+        nombre=db_contact.nombre,
+        net_balance=a_decimal(neto),
+        group_count=grupos,
+    )
 
 
 @router.put("/{contact_id}", response_model=schemas.ContactRead)
@@ -60,6 +152,7 @@ def update_contact(
     db_contact.alias_bancario = contact_update.alias_bancario
     db_contact.cvu = contact_update.cvu
     db_contact.linked_user_id = contact_update.linked_user_id
+    db_contact.dedup_digest = digest_contacto(current_user.id, contact_update.nombre, contact_update.cvu)
 
     db.commit()
     db.refresh(db_contact)
@@ -0,0 +1,51 @@
+"""Router de eventos en vivo: GET /events (Server-Sent Events)"""
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+import config
+import models
+from auth import get_current_active_user
+from services import eventos
+
+router = APIRouter(tags=["events"])
+
+# Espera sugerida al navegador antes de reconectar (EventSource reconecta solo)
+RECONEXION_MS = 3000
+
+
+async def _stream(request: Request, suscripcion: eventos.Suscripcion):
+    try:
+        yield f"retry: {RECONEXION_MS}\n\n"
+        while True:
+            try:
+                evento = await asyncio.wait_for(suscripcion.cola.get(), timeout=config.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": ping\n\n"
+                continue
+            yield eventos.formatear(evento)
+    finally:
+        eventos.desuscribir(suscripcion)
+
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Eventos de cambios del usuario (pagos, gastos, miembros y saldos de sus grupos).
+    La autenticación es la cookie de sesión, que EventSource envía sola. El stream no
+    usa la DB: la sesión del request se libera antes de empezar a emitir.
+    """
+    suscripcion = eventos.suscribir(current_user.id)
+    if suscripcion is None:
+        raise HTTPException(status_code=429, detail="Demasiadas conexiones de eventos abiertas")
+    return StreamingResponse(
+        _stream(request, suscripcion),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,61 +1,40 @@
 """Router de gastos fijos recurrentes: /gastos-fijos/"""
+from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
 
 import models
 import schemas
 from auth import get_current_active_user
 from database import get_db
-from services.scheduler_service import ejecutar_generacion_mensual
+from services import job_queue
+from services.recurrence_service import siguiente_ocurrencia
+from services.scheduler_service import (
+    JOB_GENERACION_USUARIO,
+    MAX_MESES_BACKFILL,
+    ejecutar_backfill,
+    encolar_generacion_usuario,
+)
+from services.tareas import TAREA_GENERACION_USUARIO
 
 router = APIRouter(prefix="/gastos-fijos", tags=["gastos-fijos"])
 
 
-def _gasto_fijo_to_dict(gf, db: Session) -> dict:
-    """Construye el dict con stats para GastoFijoRead."""
-    stats = db.query(
-        func.max(models.Movimiento.importe).label("max_importe"),
-        func.count(models.Movimiento.id).label("total_meses"),
-    ).filter(models.Movimiento.gasto_fijo_id == gf.id).one()
-
-    ultimo = (
-        db.query(models.Movimiento.importe)
-        .filter(models.Movimiento.gasto_fijo_id == gf.id)
-        .order_by(models.Movimiento.fecha.desc())
-        .first()
-    )
-
-    return {
-        "id": gf.id,
-        "user_id": gf.user_id,
-        "descripcion": gf.descripcion,
-        "categoria_id": gf.categoria_id,
-        "user_category_id": gf.user_category_id,
-        "activo": gf.activo,
-        "created_at": gf.created_at,
-        "categoria": gf.categoria,
-        "user_category": gf.user_category,
-        "max_importe": stats.max_importe,
-        "ultimo_importe": ultimo[0] if ultimo else None,
-        "total_meses": stats.total_meses,
-    }
-
-
 @router.get("/", response_model=List[schemas.GastoFijoRead])
 def list_gastos_fijos(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
+    # Las stats (max_importe, ultimo_importe, total_meses) son columnas del template
     gastos_fijos = (
         db.query(models.GastoFijo)
         .filter(models.GastoFijo.user_id == current_user.id)
         .options(joinedload(models.GastoFijo.categoria), joinedload(models.GastoFijo.user_category))
         .all()
     )
-    return [_gasto_fijo_to_dict(gf, db) for gf in gastos_fijos]
+    return gastos_fijos
 
 
 @router.put("/{gasto_fijo_id}", response_model=schemas.GastoFijoRead)
@@ -72,11 +51,20 @@ def update_gasto_fijo(
     if not gf:
         raise HTTPException(status_code=404, detail="Gasto fijo no encontrado")
 
-    gf.activo = update.activo
+    cambios = update.model_dump(exclude_unset=True)
+    for campo, valor in cambios.items():
+        if valor is not None or campo == "dia_mes":
+            setattr(gf, campo, valor)
+
+    # Si cambió la regla, la próxima ocurrencia se recalcula desde la última instancia
+    if cambios.keys() & {"frecuencia", "intervalo", "dia_mes"}:
+        gf.next_run_at = siguiente_ocurrencia(
+            gf.ultima_fecha or datetime.now(), gf.frecuencia, gf.intervalo, gf.dia_mes,
+        )
+
     db.commit()
     db.refresh(gf)
-
-    return _gasto_fijo_to_dict(gf, db)
+    return gf
 
 
 @router.delete("/{gasto_fijo_id}")
@@ -101,10 +89,47 @@ def delete_gasto_fijo(
     return {"message": "Gasto fijo eliminado correctamente"}
 
 
-@router.post("/generar-mes")
+@router.post("/generar-mes", status_code=202, response_model=schemas.JobRunRead)
 def generar_mes(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Genera en segundo plano (cola de trabajos) los gastos fijos vencidos del usuario.
+    Retorna el job para consultar su estado; si ya hay uno en curso se retorna ese mismo
+    (no se duplica).
+    """
+    job, creado = encolar_generacion_usuario(db, current_user.id)
+    if creado:
+        trabajo = job_queue.encolar(db, TAREA_GENERACION_USUARIO, {"job_run_id": job.id})
+        db.commit()
+        job_queue.despachar(background_tasks, db, trabajo)
+    return job
+
+
+@router.get("/generar-mes/{job_id}", response_model=schemas.JobRunRead)
+def get_generacion(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    job = db.query(models.JobRun).filter(
+        models.JobRun.id == job_id,
+        models.JobRun.job_name == JOB_GENERACION_USUARIO,
+        models.JobRun.user_id == current_user.id,
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return job
+
+
+@router.post("/backfill")
+def backfill(
+    meses_max: int = Query(MAX_MESES_BACKFILL, ge=1, le=120),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    creados = ejecutar_generacion_mensual(db)
-    return {"message": f"Generación completada. Movimientos creados: {creados}"}
+    """Genera los meses faltantes de los gastos fijos activos del usuario."""
+    creados = ejecutar_backfill(db, user_id=current_user.id, meses_max=meses_max)
+    return {"message": f"Backfill completado. Movimientos creados: {creados}", "creados": creados}
@@ -8,6 +8,10 @@ import models
 import schemas
 from auth import get_current_active_user
 from database import get_db
+from services import category_registry
+from services.category_service import recategorizar
+from services.gasto_fijo_service import recalcular_stats
+from services.recurrence_service import siguiente_ocurrencia
 
 router = APIRouter(prefix="/movimientos", tags=["movimientos"])
 
@@ -22,10 +26,7 @@ def create_movimiento(
         raise HTTPException(status_code=400, detail="Se requiere al menos una categoría (sistema o personalizada)")
 
     if movimiento.categoria_id is not None:
-        category_exists = db.query(models.Category).filter(
-            models.Category.id == movimiento.categoria_id
-        ).first()
-        if not category_exists:
+        if not category_registry.existe(db, movimiento.categoria_id):
             raise HTTPException(status_code=404, detail="Categoría no existe")
     elif movimiento.user_category_id is not None:
         user_cat_exists = db.query(models.UserCategory).filter(
@@ -46,6 +47,11 @@ def create_movimiento(
             descripcion=movimiento.descripcion,
             categoria_id=movimiento.categoria_id,
             user_category_id=movimiento.user_category_id,
+            next_run_at=siguiente_ocurrencia(movimiento.fecha),
+            max_importe=movimiento.importe,
+            ultimo_importe=movimiento.importe,
+            ultima_fecha=movimiento.fecha,
+            total_meses=1,
         )
         db.add(db_gasto_fijo)
         db.flush()
@@ -56,6 +62,34 @@ def create_movimiento(
     return db_movimiento
 
 
+@router.post("/recategorize", response_model=schemas.RecategorizeResult)
+def recategorize_movimientos(
+    datos: schemas.MovimientoRecategorize,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Reasigna en bloque la categoría de los movimientos que cumplen los filtros (y de los
+    gastos fijos con la categoría actual) con un UPDATE por tabla.
+    """
+    if datos.categoria_id is not None:
+        if not category_registry.existe(db, datos.categoria_id):
+            raise HTTPException(status_code=404, detail="Categoría no existe")
+    else:
+        user_cat_exists = db.query(models.UserCategory).filter(
+            models.UserCategory.id == datos.user_category_id,
+            models.UserCategory.user_id == current_user.id
+        ).first()
+        if not user_cat_exists:
+            raise HTTPException(status_code=404, detail="Categoría personalizada no existe")
+
+    n_movimientos, n_gastos_fijos = recategorizar(
+        db, current_user.id, **datos.model_dump(),
+    )
+    db.commit()
+    return schemas.RecategorizeResult(movimientos=n_movimientos, gastos_fijos=n_gastos_fijos)
+
+
 @router.delete("/{movimiento_id}")
 def delete_movimiento(
     movimiento_id: int,
@@ -70,7 +104,11 @@ def delete_movimiento(
     if not movimiento:
         raise HTTPException(status_code=404, detail="Movimiento no encontrado")
 
+    gasto_fijo_id = movimiento.gasto_fijo_id
     db.delete(movimiento)
+    if gasto_fijo_id is not None:
+        db.flush()
+        recalcular_stats(db, [gasto_fijo_id])
     db.commit()
     return {"message": "Movimiento eliminado correctamente"}
 
@@ -91,10 +129,7 @@ def update_movimiento(
         raise HTTPException(status_code=404, detail="Movimiento no encontrado")
 
     if movimiento_update.categoria_id is not None:
-        category_exists = db.query(models.Category).filter(
-            models.Category.id == movimiento_update.categoria_id
-        ).first()
-        if not category_exists:
+        if not category_registry.existe(db, movimiento_update.categoria_id):
             raise HTTPException(status_code=404, detail="Categoría no existe")
     elif movimiento_update.user_category_id is not None:
         user_cat_exists = db.query(models.UserCategory).filter(
@@ -112,6 +147,10 @@ def update_movimiento(
     db_movimiento.categoria_id = movimiento_update.categoria_id
     db_movimiento.user_category_id = movimiento_update.user_category_id
 
+    if db_movimiento.gasto_fijo_id is not None:
+        db.flush()
+        recalcular_stats(db, [db_movimiento.gasto_fijo_id])
+
     db.commit()
     db.refresh(db_movimiento)
     return db_movimiento
@@ -1,26 +1,31 @@
 """Router de pagos Mercado Pago: /payments/"""
 import hmac
 import hashlib
-from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-import mercadopago
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 import config
 import models
 import schemas
 from auth import get_current_active_user
 from database import get_db
+from services import job_queue, payment_status
+from services.mp_client import MPClient, MPError, get_mp_client
+from services.payment_service import ESTADOS_NO_FINALES
+from services.tareas import TAREA_MP_WEBHOOK
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
 
-def get_mp_sdk():
-    if not config.MP_ACCESS_TOKEN:
-        raise HTTPException(status_code=500, detail="Mercado Pago no está configurado. Falta MP_ACCESS_TOKEN.")
-    return mercadopago.SDK(config.MP_ACCESS_TOKEN)
+def get_mp() -> MPClient:
+    try:
+        return get_mp_client()
+    except MPError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 def _is_valid_mp_signature(request: Request, data_id: str) -> bool:
@@ -53,15 +58,11 @@ def _is_valid_mp_signature(request: Request, data_id: str) -> bool:
     return hmac.compare_digest(expected, v1)
 
 
-@router.post("/create-preference", response_model=schemas.PaymentPreferenceResponse)
-def create_payment_preference(
-    payment_data: schemas.PaymentCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user),
-):
+def _registrar_payment(db: Session, payment_data: schemas.PaymentCreate, user_id: int) -> tuple[models.Payment, dict]:
+    """Valida grupo y miembros, crea el Payment pendiente y arma la preferencia de MP."""
     group = db.query(models.SplitGroup).filter(
         models.SplitGroup.id == payment_data.group_id,
-        models.SplitGroup.creator_id == current_user.id,
+        models.SplitGroup.creator_id == user_id,
     ).first()
     if not group:
         raise HTTPException(status_code=404, detail="Grupo no encontrado")
@@ -89,7 +90,6 @@ def create_payment_preference(
     db.commit()
     db.refresh(db_payment)
 
-    sdk = get_mp_sdk()
     preference_data = {
         "items": [
             {
@@ -103,29 +103,41 @@ def create_payment_preference(
         "notification_url": f"{config.BACKEND_URL}/payments/webhook",
         "external_reference": f"payment_{db_payment.id}",
     }
+    return db_payment, preference_data
+
+
+def _descartar_payment(db: Session, db_payment: models.Payment) -> None:
+    db.delete(db_payment)
+    db.commit()
+
+
+def _guardar_preferencia(db: Session, db_payment: models.Payment, preference_id: str) -> None:
+    db_payment.mp_preference_id = preference_id
+    db.commit()
+
+
+@router.post("/create-preference", response_model=schemas.PaymentPreferenceResponse)
+async def create_payment_preference(
+    payment_data: schemas.PaymentCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Crea el Payment y su preferencia en Mercado Pago. La llamada a MP es async (no ocupa
+    un hilo mientras espera) y las escrituras en DB corren en el threadpool.
+    """
+    mp = get_mp()
+    db_payment, preference_data = await run_in_threadpool(_registrar_payment, db, payment_data, current_user.id)
 
     print(f"[MP] Creando preferencia para payment_id={db_payment.id}, monto={payment_data.amount}")
     try:
-        preference_response = sdk.preference().create(preference_data)
-        print(f"[MP] Respuesta status={preference_response['status']}")
-    except Exception as e:
-        print(f"[MP] ERROR al llamar a MP: {e}")
-        db.delete(db_payment)
-        db.commit()
-        raise HTTPException(status_code=500, detail=f"Error de conexión con Mercado Pago: {str(e)}")
-
-    if preference_response["status"] != 201:
-        print(f"[MP] Error response: {preference_response}")
-        db.delete(db_payment)
-        db.commit()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error de Mercado Pago (status {preference_response['status']}): {preference_response.get('response', {})}"
-        )
-
-    preference = preference_response["response"]
-    db_payment.mp_preference_id = preference["id"]
-    db.commit()
+        preference = await mp.crear_preferencia(preference_data)
+    except MPError as e:
+        print(f"[MP] ERROR al crear preferencia: {e}")
+        await run_in_threadpool(_descartar_payment, db, db_payment)
+        raise HTTPException(status_code=500, detail=f"Error de Mercado Pago: {e}")
+
+    await run_in_threadpool(_guardar_preferencia, db, db_payment, preference["id"])
     print(f"[MP] Preferencia creada OK: {preference['id']}")
 
     return schemas.PaymentPreferenceResponse(
@@ -134,8 +146,34 @@ def create_payment_preference(
     )
 
 
+def _registrar_notificacion(db: Session, body: dict, data_id: str, request_id: str) -> Optional[models.BackgroundJob]:
+    """
+    Guarda la notificación y encola su procesamiento en un solo commit. Retorna None si
+    ya se había recibido (mismo data.id y x-request-id): MP reentrega hasta recibir 200.
+    """
+    notificacion = models.MPNotification(data_id=data_id, request_id=request_id, topic=body["type"], body=body)
+    db.add(notificacion)
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        return None
+    trabajo = job_queue.encolar(db, TAREA_MP_WEBHOOK, {"notification_id": notificacion.id})
+    db.commit()
+    return trabajo
+
+
 @router.post("/webhook")
-async def mercadopago_webhook(request: Request, db: Session = Depends(get_db)):
+async def mercadopago_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """
+    Valida la firma, guarda la notificación y responde 200 sin consultar a Mercado Pago:
+    la consulta del pago la hace la cola de trabajos (con reintentos). Las escrituras en
+    DB corren en el threadpool para no bloquear el event loop.
+    """
     try:
         body = await request.json()
     except Exception:
@@ -151,35 +189,11 @@ async def mercadopago_webhook(request: Request, db: Session = Depends(get_db)):
     if not _is_valid_mp_signature(request, str(mp_payment_id)):
         raise HTTPException(status_code=401, detail="Firma de webhook inválida")
 
-    sdk = get_mp_sdk()
-    payment_response = sdk.payment().get(mp_payment_id)
-
-    if payment_response["status"] != 200:
-        return {"status": "error", "message": "No se pudo consultar el pago"}
-
-    mp_payment = payment_response["response"]
-    external_reference = mp_payment.get("external_reference", "")
-    mp_status = mp_payment.get("status", "")
-
-    if not external_reference.startswith("payment_"):
-        return {"status": "ok"}
-
-    try:
-        local_payment_id = int(external_reference.split("_")[1])
-    except (IndexError, ValueError):
-        return {"status": "ok"}
-
-    db_payment = db.query(models.Payment).filter(
-        models.Payment.id == local_payment_id,
-    ).first()
-
-    if not db_payment:
-        return {"status": "ok"}
-
-    db_payment.mp_payment_id = str(mp_payment_id)
-    db_payment.status = mp_status
-    db_payment.updated_at = datetime.now()
-    db.commit()
+    # Sin x-request-id (solo en desarrollo, sin firma) se deduplica por el contenido
+    request_id = request.headers.get("x-request-id") or hashlib.sha256(await request.body()).hexdigest()
+    trabajo = await run_in_threadpool(_registrar_notificacion, db, body, str(mp_payment_id), request_id)
+    if trabajo:
+        job_queue.despachar(background_tasks, db, trabajo)
 
     return {"status": "ok"}
 
@@ -202,12 +216,7 @@ def get_group_payments(
     ).order_by(models.Payment.created_at.desc()).all()
 
 
-@router.get("/{payment_id}/status", response_model=schemas.PaymentRead)
-def get_payment_status(
-    payment_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user),
-):
+def _buscar_payment_propio(db: Session, payment_id: int, user_id: int) -> models.Payment:
     db_payment = db.query(models.Payment).filter(
         models.Payment.id == payment_id,
     ).first()
@@ -217,26 +226,31 @@ def get_payment_status(
 
     group = db.query(models.SplitGroup).filter(
         models.SplitGroup.id == db_payment.group_id,
-        models.SplitGroup.creator_id == current_user.id,
+        models.SplitGroup.creator_id == user_id,
     ).first()
     if not group:
         raise HTTPException(status_code=404, detail="Pago no encontrado")
+    return db_payment
+
 
-    if db_payment.status == "pending" and db_payment.mp_preference_id:
-        try:
-            sdk = get_mp_sdk()
-            search_result = sdk.payment().search({
-                "external_reference": f"payment_{payment_id}"
-            })
-            if search_result["status"] == 200:
-                results = search_result["response"].get("results", [])
-                if results:
-                    latest = results[0]
-                    db_payment.mp_payment_id = str(latest["id"])
-                    db_payment.status = latest["status"]
-                    db_payment.updated_at = datetime.now()
-                    db.commit()
-        except Exception:
-            pass
+@router.get("/{payment_id}/status", response_model=schemas.PaymentRead)
+async def get_payment_status(
+    payment_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Estado del pago. Mientras no tenga estado final (pending, in_process, authorized) se
+    busca en Mercado Pago con caché corta, coalescing y tope por minuto
+    (services/payment_status.py).
+    """
+    db_payment = await run_in_threadpool(_buscar_payment_propio, db, payment_id, current_user.id)
+
+    if db_payment.status in ESTADOS_NO_FINALES and db_payment.mp_preference_id:
+        if await payment_status.refrescar(db.get_bind(), payment_id, background_tasks):
+            await run_in_threadpool(db.refresh, db_payment)
+    else:
+        payment_status.olvidar(payment_id)
 
     return db_payment
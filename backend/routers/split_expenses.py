@@ -4,17 +4,59 @@ from decimal import Decimal
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 import models
 import schemas
 from auth import get_current_active_user
 from database import get_db
+from services import eventos
 from services.split_service import calcular_shares
 
 router = APIRouter(tags=["split-expenses"])
 
 
+def _validar_y_calcular_shares(
+    db: Session,
+    group_id: int,
+    expense: schemas.SplitExpenseCreate,
+) -> list[Decimal]:
+    """
+    Valida pagador y participantes con una sola consulta y calcula los shares
+    en el orden de participant_member_ids.
+    """
+    ids = set(expense.participant_member_ids)
+    ids.add(expense.paid_by_member_id)
+    miembros_validos = {
+        member_id for (member_id,) in db.query(models.SplitGroupMember.id).filter(
+            models.SplitGroupMember.id.in_(ids),
+            models.SplitGroupMember.group_id == group_id,
+        )
+    }
+
+    if expense.paid_by_member_id not in miembros_validos:
+        raise HTTPException(status_code=400, detail="El pagador no es miembro del grupo")
+
+    if not expense.participant_member_ids:
+        raise HTTPException(status_code=400, detail="Debe haber al menos un participante")
+
+    if (len(set(expense.participant_member_ids)) != len(expense.participant_member_ids)
+            or not miembros_validos.issuperset(expense.participant_member_ids)):
+        raise HTTPException(status_code=400, detail="Uno o más participantes no son válidos")
+
+    return calcular_shares(
+        expense.importe,
+        len(expense.participant_member_ids),
+        expense.split_mode,
+        expense.participant_values,
+    )
+
+
+def _publicar_gasto(user_id: int, group_id: int, expense_id: int, accion: str) -> None:
+    eventos.publicar(user_id, "gasto", group_id=group_id, expense_id=expense_id, accion=accion)
+    eventos.publicar(user_id, "saldos", group_id=group_id)
+
+
 @router.post("/split-groups/{group_id}/expenses", response_model=schemas.SplitExpenseRead)
 def create_split_expense(
     group_id: int,
@@ -31,26 +73,7 @@ def create_split_expense(
     if not db_group:
         raise HTTPException(status_code=404, detail="Grupo no encontrado")
 
-    payer = db.query(models.SplitGroupMember).filter(
-        models.SplitGroupMember.id == expense.paid_by_member_id,
-        models.SplitGroupMember.group_id == group_id,
-    ).first()
-
-    if not payer:
-        raise HTTPException(status_code=400, detail="El pagador no es miembro del grupo")
-
-    if not expense.participant_member_ids:
-        raise HTTPException(status_code=400, detail="Debe haber al menos un participante")
-
-    participants = db.query(models.SplitGroupMember).filter(
-        models.SplitGroupMember.id.in_(expense.participant_member_ids),
-        models.SplitGroupMember.group_id == group_id,
-    ).all()
-
-    if len(participants) != len(expense.participant_member_ids):
-        raise HTTPException(status_code=400, detail="Uno o más participantes no son válidos")
-
-    shares = calcular_shares(expense.importe, len(participants))
+    shares = _validar_y_calcular_shares(db, group_id, expense)
 
     db_expense = models.SplitExpense(
         group_id=group_id,
@@ -62,19 +85,20 @@ def create_split_expense(
     db.add(db_expense)
     db.flush()
 
-    for participant, amount in zip(participants, shares):
+    for member_id, amount in zip(expense.participant_member_ids, shares):
         db_participant = models.SplitExpenseParticipant(
             expense_id=db_expense.id,
-            member_id=participant.id,
+            member_id=member_id,
             share_amount=amount,
         )
         db.add(db_participant)
 
     db.commit()
+    _publicar_gasto(current_user.id, group_id, db_expense.id, "creado")
 
     db_expense = db.query(models.SplitExpense).options(
         joinedload(models.SplitExpense.paid_by).joinedload(models.SplitGroupMember.contact),
-        joinedload(models.SplitExpense.participants).joinedload(models.SplitExpenseParticipant.member).joinedload(models.SplitGroupMember.contact),
+        selectinload(models.SplitExpense.participants).joinedload(models.SplitExpenseParticipant.member).joinedload(models.SplitGroupMember.contact),
     ).filter(models.SplitExpense.id == db_expense.id).first()
 
     return db_expense
@@ -96,19 +120,12 @@ def list_split_expenses(
 
     expenses = db.query(models.SplitExpense).options(
         joinedload(models.SplitExpense.paid_by).joinedload(models.SplitGroupMember.contact),
-        joinedload(models.SplitExpense.participants).joinedload(models.SplitExpenseParticipant.member),
+        selectinload(models.SplitExpense.participants).joinedload(models.SplitExpenseParticipant.member).joinedload(models.SplitGroupMember.contact),
     ).filter(
         models.SplitExpense.group_id == group_id,
     ).order_by(models.SplitExpense.fecha.desc()).all()
 
-    seen = set()
-    unique = []
-    for e in expenses:
-        if e.id not in seen:
-            seen.add(e.id)
-            unique.append(e)
-
-    return unique
+    return expenses
 
 
 @router.put("/split-groups/{group_id}/expenses/{expense_id}", response_model=schemas.SplitExpenseRead)
@@ -136,26 +153,7 @@ def update_split_expense(
     if not db_expense:
         raise HTTPException(status_code=404, detail="Gasto no encontrado")
 
-    payer = db.query(models.SplitGroupMember).filter(
-        models.SplitGroupMember.id == expense_update.paid_by_member_id,
-        models.SplitGroupMember.group_id == group_id,
-    ).first()
-
-    if not payer:
-        raise HTTPException(status_code=400, detail="El pagador no es miembro del grupo")
-
-    if not expense_update.participant_member_ids:
-        raise HTTPException(status_code=400, detail="Debe haber al menos un participante")
-
-    participants = db.query(models.SplitGroupMember).filter(
-        models.SplitGroupMember.id.in_(expense_update.participant_member_ids),
-        models.SplitGroupMember.group_id == group_id,
-    ).all()
-
-    if len(participants) != len(expense_update.participant_member_ids):
-        raise HTTPException(status_code=400, detail="Uno o más participantes no son válidos")
-
-    shares = calcular_shares(expense_update.importe, len(participants))
+    shares = _validar_y_calcular_shares(db, group_id, expense_update)
 
     db_expense.descripcion = expense_update.descripcion
     db_expense.importe = expense_update.importe
@@ -166,19 +164,20 @@ def update_split_expense(
         models.SplitExpenseParticipant.expense_id == expense_id,
     ).delete()
 
-    for participant, amount in zip(participants, shares):
+    for member_id, amount in zip(expense_update.participant_member_ids, shares):
         db_participant = models.SplitExpenseParticipant(
             expense_id=expense_id,
-            member_id=participant.id,
+            member_id=member_id,
             share_amount=amount,
         )
         db.add(db_participant)
 
     db.commit()
+    _publicar_gasto(current_user.id, group_id, expense_id, "actualizado")
 
     db_expense = db.query(models.SplitExpense).options(
         joinedload(models.SplitExpense.paid_by).joinedload(models.SplitGroupMember.contact),
-        joinedload(models.SplitExpense.participants).joinedload(models.SplitExpenseParticipant.member).joinedload(models.SplitGroupMember.contact),
+        selectinload(models.SplitExpense.participants).joinedload(models.SplitExpenseParticipant.member).joinedload(models.SplitGroupMember.contact),
     ).filter(models.SplitExpense.id == expense_id).first()
 
     return db_expense
@@ -210,4 +209,5 @@ def delete_split_expense(
 
     db.delete(db_expense)
     db.commit()
+    _publicar_gasto(current_user.id, group_id, expense_id, "eliminado")
     return {"message": "Gasto eliminado correctamente"}
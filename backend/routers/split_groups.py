@@ -1,13 +1,16 @@
 """Router de grupos divididos: /split-groups/ (grupos + miembros)"""
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 import models
 import schemas
 from auth import get_current_active_user
 from database import get_db
+from services import eventos
+from services.balance_service import calcular_resumenes
+from services.contact_import import digest_contacto
 
 router = APIRouter(prefix="/split-groups", tags=["split-groups"])
 
@@ -56,7 +59,7 @@ def create_split_group(
     db.commit()
 
     db_group = db.query(models.SplitGroup).options(
-        joinedload(models.SplitGroup.members).joinedload(models.SplitGroupMember.contact),
+        selectinload(models.SplitGroup.members).joinedload(models.SplitGroupMember.contact),
     ).filter(models.SplitGroup.id == db_group.id).first()
 
     return db_group
@@ -64,23 +67,25 @@ def create_split_group(
 
 @router.get("/", response_model=List[schemas.SplitGroupRead])
 def list_split_groups(
+    include: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
+    """Lista los grupos del usuario. Con ?include=summary agrega el resumen de cada grupo."""
     groups = db.query(models.SplitGroup).options(
-        joinedload(models.SplitGroup.members).joinedload(models.SplitGroupMember.contact),
+        selectinload(models.SplitGroup.members).joinedload(models.SplitGroupMember.contact),
     ).filter(
         models.SplitGroup.creator_id == current_user.id,
     ).order_by(models.SplitGroup.is_active.desc(), models.SplitGroup.created_at.desc()).all()
 
-    seen = set()
-    unique_groups = []
-    for g in groups:
-        if g.id not in seen:
-            seen.add(g.id)
-            unique_groups.append(g)
+    if include and "summary" in include.split(","):
+        resumenes = calcular_resumenes(db, [g.id for g in groups])
+        return [
+            schemas.SplitGroupRead.model_validate(g).model_copy(update={"summary": resumenes[g.id]})
+            for g in groups
+        ]
 
-    return unique_groups
+    return groups
 
 
 @router.get("/{group_id}", response_model=schemas.SplitGroupRead)
@@ -90,7 +95,7 @@ def get_split_group(
     current_user: models.User = Depends(get_current_active_user),
 ):
     group = db.query(models.SplitGroup).options(
-        joinedload(models.SplitGroup.members).joinedload(models.SplitGroupMember.contact),
+        selectinload(models.SplitGroup.members).joinedload(models.SplitGroupMember.contact),
     ).filter(
         models.SplitGroup.id == group_id,
         models.SplitGroup.creator_id == current_user.id,
@@ -120,9 +125,10 @@ def update_split_group(
     db_group.nombre = group_update.nombre
     db_group.descripcion = group_update.descripcion
     db.commit()
+    eventos.publicar(current_user.id, "grupo", group_id=group_id, accion="actualizado")
 
     db_group = db.query(models.SplitGroup).options(
-        joinedload(models.SplitGroup.members).joinedload(models.SplitGroupMember.contact),
+        selectinload(models.SplitGroup.members).joinedload(models.SplitGroupMember.contact),
     ).filter(models.SplitGroup.id == group_id).first()
 
     return db_group
@@ -144,6 +150,7 @@ def delete_split_group(
 
     db_group.is_active = False
     db.commit()
+    eventos.publicar(current_user.id, "grupo", group_id=group_id, accion="eliminado")
     return {"message": "Grupo eliminado correctamente"}
 
 
@@ -154,7 +161,7 @@ def toggle_group_active(
     current_user: models.User = Depends(get_current_active_user),
 ):
     db_group = db.query(models.SplitGroup).options(
-        joinedload(models.SplitGroup.members).joinedload(models.SplitGroupMember.contact),
+        selectinload(models.SplitGroup.members).joinedload(models.SplitGroupMember.contact),
     ).filter(
         models.SplitGroup.id == group_id,
         models.SplitGroup.creator_id == current_user.id,
@@ -165,10 +172,16 @@ def toggle_group_active(
 
     db_group.is_active = not db_group.is_active
     db.commit()
+    eventos.publicar(current_user.id, "grupo", group_id=group_id, accion="actualizado")
     db.refresh(db_group)
     return db_group
 
 
+def _publicar_miembro(user_id: int, group_id: int, member_id: int, accion: str) -> None:
+    eventos.publicar(user_id, "miembro", group_id=group_id, member_id=member_id, accion=accion)
+    eventos.publicar(user_id, "saldos", group_id=group_id)
+
+
 @router.post("/{group_id}/members", response_model=schemas.SplitGroupMemberRead)
 def add_group_member(
     group_id: int,
@@ -209,6 +222,7 @@ def add_group_member(
     )
     db.add(member)
     db.commit()
+    _publicar_miembro(current_user.id, group_id, member.id, "agregado")
     db.refresh(member)
     return member
 
@@ -252,6 +266,7 @@ def remove_group_member(
 
     db.delete(member)
     db.commit()
+    _publicar_miembro(current_user.id, group_id, member_id, "eliminado")
     return {"message": "Miembro eliminado del grupo"}
 
 
@@ -276,6 +291,7 @@ def quick_add_group_member(
         nombre=payload.nombre,
         alias_bancario=payload.alias_bancario,
         cvu=payload.cvu,
+        dedup_digest=digest_contacto(current_user.id, payload.nombre, payload.cvu),
     )
     db.add(db_contact)
     db.flush()
@@ -296,6 +312,7 @@ def quick_add_group_member(
     )
     db.add(member)
     db.commit()
+    _publicar_miembro(current_user.id, group_id, member.id, "agregado")
 
     member = db.query(models.SplitGroupMember).options(
         joinedload(models.SplitGroupMember.contact),
@@ -1,8 +1,8 @@
 # Pydantic valida que los datos recibidos/enviados por la API sean correctos
-from pydantic import BaseModel, EmailStr, field_validator, PlainSerializer
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator, PlainSerializer
 from datetime import datetime
 from decimal import Decimal
-from typing import Annotated, Optional, List
+from typing import Annotated, Literal, Optional, List
 import re
 
 # Tipo para montos de dinero: precisión Decimal internamente, serializa como float en JSON
@@ -142,6 +142,12 @@ class UserCategoryRead(UserCategoryBase):
 
 
 
+# Reasignación masiva de categoría (merge y recategorize)
+class RecategorizeResult(BaseModel):
+    movimientos: int  # Movimientos actualizados
+    gastos_fijos: int  # Templates de gastos fijos actualizados
+
+
 # ============== SCHEMAS PARA MOVIMIENTO ==============
 
 # Schema BASE: Campos comunes
@@ -158,6 +164,32 @@ class MovimientoBase(BaseModel):
 class MovimientoCreate(MovimientoBase):
     es_fijo: bool = False  # Si True, crea un GastoFijo template asociado
 
+# Schema para RECATEGORIZAR movimientos en bloque (POST /movimientos/recategorize)
+class MovimientoRecategorize(BaseModel):
+    # Destino: exactamente una categoría (del sistema o personalizada)
+    categoria_id: Optional[int] = None
+    user_category_id: Optional[int] = None
+    # Filtros (al menos uno)
+    actual_categoria_id: Optional[int] = None
+    actual_user_category_id: Optional[int] = None
+    desde: Optional[datetime] = None  # Inclusive
+    hasta: Optional[datetime] = None  # Inclusive
+    tipo: Optional[Literal["gasto", "ingreso"]] = None
+    incluir_gastos_fijos: bool = True  # También los templates con la categoría actual (si se filtra por ella)
+
+    @model_validator(mode='after')
+    def validate_destino_y_filtros(self) -> 'MovimientoRecategorize':
+        if (self.categoria_id is None) == (self.user_category_id is None):
+            raise ValueError("Indica exactamente una categoría destino (categoria_id o user_category_id)")
+        filtros = (self.actual_categoria_id, self.actual_user_category_id, self.desde, self.hasta, self.tipo)
+        if all(f is None for f in filtros):
+            raise ValueError("Indica al menos un filtro (categoría actual, fechas o tipo)")
+        # Los gastos fijos no tienen fecha: solo se pueden elegir por categoría actual
+        sin_categoria = self.actual_categoria_id is None and self.actual_user_category_id is None
+        if sin_categoria and self.incluir_gastos_fijos and "incluir_gastos_fijos" in self.model_fields_set:
+            raise ValueError("incluir_gastos_fijos requiere filtrar por categoría actual")
+        return self
+
 # Schema para LEER un movimiento (GET)
 # Incluye el ID y la categoría completa relacionada
 class MovimientoRead(MovimientoBase):
@@ -177,6 +209,9 @@ class MovimientoRead(MovimientoBase):
 
 # ============== SCHEMAS PARA GASTO FIJO ==============
 
+# Frecuencias de recurrencia soportadas (ver services/recurrence_service.py)
+Frecuencia = Literal["weekly", "biweekly", "monthly", "yearly"]
+
 class GastoFijoRead(BaseModel):
     id: int
     user_id: int
@@ -187,6 +222,10 @@ class GastoFijoRead(BaseModel):
     created_at: datetime
     categoria: Optional[CategoryRead] = None
     user_category: Optional[UserCategoryRead] = None
+    frecuencia: Frecuencia = "monthly"
+    intervalo: int = 1
+    dia_mes: Optional[int] = None
+    next_run_at: Optional[datetime] = None  # Próxima ocurrencia a generar
     max_importe: Optional[MoneyDecimal] = None    # Máximo histórico (calculado en endpoint)
     ultimo_importe: Optional[MoneyDecimal] = None  # Importe del último mes (calculado en endpoint)
     total_meses: int = 0                   # Cantidad de meses registrados
@@ -196,9 +235,28 @@ class GastoFijoRead(BaseModel):
 
 
 class GastoFijoUpdate(BaseModel):
-    activo: bool
+    """Actualización parcial: activo y/o regla de recurrencia (solo los campos enviados)."""
+    activo: Optional[bool] = None
+    frecuencia: Optional[Frecuencia] = None
+    intervalo: Optional[int] = Field(None, ge=1, le=52)
+    dia_mes: Optional[int] = Field(None, ge=1, le=31)
 
 
+
+class JobRunRead(BaseModel):
+    """Estado de un job en segundo plano (ej: generación de gastos fijos)."""
+    id: int
+    job_name: str
+    status: str  # pending, running, success, error
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[int] = None
+    rows_created: Optional[int] = None
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
 # ============== SCHEMAS PARA CONTACT ==============
 
 class ContactBase(BaseModel):
@@ -221,6 +279,28 @@ class ContactRead(ContactBase):
         from_attributes = True
 
 
+class ContactImportRow(BaseModel):
+    fila: int  # Línea del archivo (en vCard, la del BEGIN:VCARD)
+    estado: Literal["creado", "duplicado", "error"]
+    nombre: Optional[str] = None
+    contact_id: Optional[int] = None  # Creado, o el existente si es duplicado
+    detalle: Optional[str] = None
+
+
+class ContactImportResult(BaseModel):
+    creados: int
+    duplicados: int
+    errores: int
+    filas: List[ContactImportRow]
+
+
+class ContactBalance(BaseModel):
+    contact_id: int
+    nombre: str
+    net_balance: MoneyDecimal  # > 0: al contacto le deben; < 0: el contacto debe
+    group_count: int  # Grupos del usuario con movimientos del contacto
+
+
 # ============== SCHEMAS PARA SPLIT GROUP ==============
 
 class SplitGroupMemberRead(BaseModel):
@@ -244,12 +324,20 @@ class SplitGroupCreate(SplitGroupBase):
     member_contact_ids: List[int] = []
 
 
+class SplitGroupSummary(BaseModel):
+    total_expenses: MoneyDecimal = Decimal('0')
+    expense_count: int = 0
+    creator_net_balance: MoneyDecimal = Decimal('0')  # > 0: al creador le deben
+    pending_payments: int = 0
+
+
 class SplitGroupRead(SplitGroupBase):
     id: int
     creator_id: int
     is_active: bool
     created_at: datetime
     members: List[SplitGroupMemberRead] = []
+    summary: Optional[SplitGroupSummary] = None  # Solo con ?include=summary
 
     class Config:
         from_attributes = True
@@ -293,6 +381,46 @@ class SplitExpenseBase(BaseModel):
 
 class SplitExpenseCreate(SplitExpenseBase):
     participant_member_ids: List[int]
+    split_mode: Literal["equal", "weights", "percentages", "amounts"] = "equal"
+    # Un valor por participante, en el mismo orden que participant_member_ids:
+    # peso relativo (weights), porcentaje (percentages) o monto (amounts)
+    participant_values: Optional[List[Decimal]] = None
+
+    @field_validator('participant_values')
+    @classmethod
+    def validate_escala_valores(cls, valores: Optional[List[Decimal]]) -> Optional[List[Decimal]]:
+        # Acota el exponente para que escalar pesos a enteros y cuantizar montos sea barato.
+        # Se mira as_tuple() y no max_digits/decimal_places: pydantic normaliza el Decimal
+        # y 1e-9999999 pasaría como 0.
+        for v in valores or ():
+            if not v.is_finite() or v.as_tuple().exponent < -4:
+                raise ValueError('Los valores de la división admiten hasta 4 decimales')
+            if v.adjusted() >= 8:
+                raise ValueError('Los valores de la división no pueden superar 99.999.999')
+        return valores
+
+    @model_validator(mode='after')
+    def validate_split_values(self) -> 'SplitExpenseCreate':
+        if self.split_mode == "equal":
+            if self.participant_values is not None:
+                raise ValueError('participant_values no aplica a la división en partes iguales')
+            return self
+
+        valores = self.participant_values
+        if valores is None or len(valores) != len(self.participant_member_ids):
+            raise ValueError('Debe indicar un valor por cada participante')
+        if any(v <= 0 for v in valores):
+            raise ValueError('Los valores de la división deben ser mayores a 0')
+
+        total = sum(valores, Decimal('0'))
+        if self.split_mode == "percentages" and total != 100:
+            raise ValueError('Los porcentajes deben sumar 100')
+        if self.split_mode == "amounts":
+            if any(v != v.quantize(Decimal('0.01')) for v in valores):
+                raise ValueError('Los montos no pueden tener más de 2 decimales')
+            if total != self.importe:
+                raise ValueError('Los montos deben sumar exactamente el importe')
+        return self
 
 
 class SplitExpenseRead(SplitExpenseBase):
@@ -313,6 +441,8 @@ class MemberBalance(BaseModel):
     display_name: str
     total_paid: MoneyDecimal
     total_share: MoneyDecimal
+    # Pagos aprobados enviados menos recibidos (ya incluidos en net_balance)
+    total_settled: MoneyDecimal = Decimal('0')
     net_balance: MoneyDecimal
     contact: Optional[ContactRead] = None
 
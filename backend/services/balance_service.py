@@ -1,27 +1,44 @@
-"""Servicio de cálculo de balances y deudas simplificadas (algoritmo greedy)."""
-from decimal import Decimal
-from typing import List
+"""Servicio de cálculo de balances y deudas simplificadas.
 
+Para grupos chicos se usa un solver exacto que minimiza la cantidad de
+transferencias; para grupos grandes, o si el solver excede su presupuesto de
+tiempo, se usa el algoritmo greedy.
+"""
+import time
+from collections import Counter
+from math import prod
+from typing import List, Optional
+
+from sqlalchemy import and_, case, func, literal, select, union_all
+from sqlalchemy.orm import Session, aliased
+
+import models
 import schemas
+from money import a_centavos, a_decimal
 
+# Máximo de saldos no nulos para intentar el solver exacto (hasta 2^n subconjuntos)
+MAX_SALDOS_EXACTO = 20
+# Presupuesto de tiempo del solver exacto antes de caer al greedy
+PRESUPUESTO_EXACTO_SEG = 0.25
+# Con saldos repetidos el DP va sobre cuántos quedan de cada monto (multiconjunto) si
+# estados x montos distintos no supera este tope (~0.1 s); si no, sobre los subconjuntos
+# de suma cero, que con saldos distintos son pocos
+MAX_PASOS_MULTICONJUNTO = 1 << 19
 
-def simplificar_deudas(
-    balances: List[schemas.MemberBalance],
-    member_map: dict,
-    group_creator,
-) -> List[schemas.DebtTransfer]:
+
+def _saldos_pendientes(balances: List[schemas.MemberBalance]) -> list[tuple[int, int]]:
+    """Filtra los balances con saldo pendiente, en centavos (ignora el centavo residual)."""
+    saldos = [(b.member_id, a_centavos(b.net_balance)) for b in balances]
+    return [(member_id, net) for member_id, net in saldos if net > 1 or net < -1]
+
+
+def _greedy(saldos: list[tuple[int, int]]) -> list[tuple[int, int, int]]:
     """
-    Aplica el algoritmo greedy para minimizar las transferencias de deuda.
-    Recibe la lista de balances y retorna las transferencias simplificadas.
+    Empareja el mayor acreedor con el mayor deudor hasta saldar todo.
+    Recibe saldos en centavos y retorna tuplas (deudor, acreedor, centavos).
     """
-    creditors = []
-    debtors = []
-
-    for b in balances:
-        if b.net_balance > Decimal('0.01'):
-            creditors.append([b.member_id, b.net_balance])
-        elif b.net_balance < Decimal('-0.01'):
-            debtors.append([b.member_id, -b.net_balance])
+    creditors = [[member_id, net] for member_id, net in saldos if net > 0]
+    debtors = [[member_id, -net] for member_id, net in saldos if net < 0]
 
     creditors.sort(key=lambda x: x[1], reverse=True)
     debtors.sort(key=lambda x: x[1], reverse=True)
@@ -34,6 +51,185 @@ def simplificar_deudas(
         debtor_id, debt_amount = debtors[j]
         settle_amount = min(credit_amount, debt_amount)
 
+        transfers.append((debtor_id, creditor_id, settle_amount))
+
+        creditors[i][1] -= settle_amount
+        debtors[j][1] -= settle_amount
+
+        if creditors[i][1] < 1:
+            i += 1
+        if debtors[j][1] < 1:
+            j += 1
+
+    return transfers
+
+
+def _particion_por_ceros(centavos: list[int], limite: float) -> Optional[list[list[int]]]:
+    """
+    Partición óptima recorriendo solo los subconjuntos de suma cero, que son los únicos
+    que cierran grupos: mejor[z] = 1 + max(mejor[z']) sobre los z' de suma cero
+    contenidos en z. Las sumas de los 2^n subconjuntos se arman duplicando la lista por
+    cada saldo (una comprensión por elemento, no un paso de Python por máscara). Lo que
+    no cierra en cero (p. ej. el centavo residual) queda como un grupo más.
+    Rápido si hay pocos subconjuntos de suma cero (saldos distintos entre sí).
+    """
+    n = len(centavos)
+    sumas = [0]
+    for c in centavos:
+        sumas += [s + c for s in sumas]
+    ceros = [mask for mask, s in enumerate(sumas) if not s][1:]
+    del sumas
+
+    # Las submáscaras son numéricamente menores: `ceros` ya está en orden topológico
+    mejor = {0: 0}
+    previo = {}
+    for i, z in enumerate(ceros):
+        if time.perf_counter() > limite:
+            return None
+        padre = 0
+        if 1 << bin(z).count("1") < i:
+            # Menos submáscaras de z que ceros anteriores: se recorren las submáscaras
+            sub = (z - 1) & z
+            while sub:
+                if sub in mejor and mejor[sub] > mejor[padre]:
+                    padre = sub
+                sub = (sub - 1) & z
+        else:
+            for z_previo in ceros[:i]:
+                if z_previo & z == z_previo and mejor[z_previo] > mejor[padre]:
+                    padre = z_previo
+        mejor[z] = mejor[padre] + 1
+        previo[z] = padre
+
+    # Reconstrucción: cada eslabón de la cadena es un grupo (diferencia entre máscaras)
+    completo = (1 << n) - 1
+    tope = max(mejor, key=lambda z: mejor[z])
+    grupos = []
+    if completo ^ tope:
+        grupos.append(completo ^ tope)
+    while tope:
+        grupos.append(tope ^ previo[tope])
+        tope = previo[tope]
+    return [[i for i in range(n) if grupo >> i & 1] for grupo in grupos]
+
+
+def _particion_por_multiconjunto(centavos: list[int], limite: float) -> Optional[list[list[int]]]:
+    """
+    Partición óptima con un DP sobre cuántos saldos quedan de cada monto: los saldos
+    iguales son intercambiables, así que con montos repetidos (todos deben lo mismo)
+    hay prod(repeticiones + 1) estados en vez de 2^n. El estado se codifica en base
+    mixta; quitar un saldo resta su base, así que el orden numérico es topológico.
+    """
+    indices: dict[int, list[int]] = {}
+    for i, c in enumerate(centavos):
+        indices.setdefault(c, []).append(i)
+    valores = list(indices)
+    cantidades = [len(indices[v]) for v in valores]
+    bases = []
+    base = 1
+    for cantidad in cantidades:
+        bases.append(base)
+        base *= cantidad + 1
+
+    suma = [0] * base
+    dp = [0] * base
+    for estado in range(1, base):
+        if estado & 0x3FF == 1 and time.perf_counter() > limite:
+            return None
+        mejor = -1
+        for v, b, cantidad in zip(valores, bases, cantidades):
+            if estado // b % (cantidad + 1):
+                if mejor < 0:
+                    suma[estado] = suma[estado - b] + v
+                if dp[estado - b] > mejor:
+                    mejor = dp[estado - b]
+        dp[estado] = mejor + (suma[estado] == 0)
+
+    # Reconstrucción como en la cadena de subconjuntos: se cierra un grupo en cada suma cero
+    grupos = []
+    actual = []
+    estado = base - 1
+    while estado:
+        cierra = suma[estado] == 0
+        if cierra and actual:
+            grupos.append(actual)
+            actual = []
+        for v, b, cantidad in zip(valores, bases, cantidades):
+            if estado // b % (cantidad + 1) and dp[estado - b] == dp[estado] - cierra:
+                actual.append(indices[v].pop())
+                estado -= b
+                break
+    if actual:
+        grupos.append(actual)
+    return grupos
+
+
+def _particion_optima(centavos: list[int], presupuesto_seg: float) -> Optional[list[list[int]]]:
+    """
+    Particiona los índices de `centavos` en la máxima cantidad de subconjuntos de suma cero,
+    de modo que un subconjunto de k saldos se salda con k-1 transferencias.
+    Retorna None si se excede el presupuesto de tiempo.
+    """
+    limite = time.perf_counter() + presupuesto_seg
+    repeticiones = Counter(centavos).values()
+    estados = prod(m + 1 for m in repeticiones)
+    if estados < 1 << len(centavos) and estados * len(repeticiones) <= MAX_PASOS_MULTICONJUNTO:
+        return _particion_por_multiconjunto(centavos, limite)
+    return _particion_por_ceros(centavos, limite)
+
+
+def calcular_transferencias(
+    saldos: list[tuple[int, int]],
+    max_exacto: int = MAX_SALDOS_EXACTO,
+    presupuesto_seg: float = PRESUPUESTO_EXACTO_SEG,
+) -> list[tuple[int, int, int]]:
+    """
+    Calcula las transferencias (deudor, acreedor, centavos) que saldan los balances.
+
+    Primero salda los pares con montos exactamente opuestos (siempre es óptimo), luego
+    aplica el solver exacto si quedan hasta `max_exacto` saldos. Si hay más o se agota
+    el presupuesto de tiempo, usa el greedy.
+    """
+    transfers = []
+    restantes = []
+    opuestos: dict[int, list[int]] = {}
+    for idx, (member_id, net) in enumerate(saldos):
+        pendientes = opuestos.get(-net)
+        if pendientes:
+            otro_id, otro_net = saldos[pendientes.pop()]
+            if net < 0:
+                transfers.append((member_id, otro_id, otro_net))
+            else:
+                transfers.append((otro_id, member_id, net))
+        else:
+            opuestos.setdefault(net, []).append(idx)
+    for pendientes in opuestos.values():
+        restantes.extend(saldos[idx] for idx in pendientes)
+
+    if len(restantes) > max_exacto:
+        return transfers + _greedy(restantes)
+
+    grupos = _particion_optima([net for _, net in restantes], presupuesto_seg)
+    if grupos is None:
+        return transfers + _greedy(restantes)
+
+    for grupo in grupos:
+        transfers.extend(_greedy([restantes[i] for i in grupo]))
+    return transfers
+
+
+def simplificar_deudas(
+    balances: List[schemas.MemberBalance],
+    member_map: dict,
+    group_creator,
+) -> List[schemas.DebtTransfer]:
+    """
+    Minimiza las transferencias de deuda del grupo.
+    Recibe la lista de balances y retorna las transferencias simplificadas.
+    """
+    transfers = []
+
+    for debtor_id, creditor_id, settle_amount in calcular_transferencias(_saldos_pendientes(balances)):
         creditor_member = member_map[creditor_id]
         debtor_member = member_map[debtor_id]
 
@@ -52,17 +248,169 @@ def simplificar_deudas(
             from_display_name=debtor_member.display_name,
             to_member_id=creditor_id,
             to_display_name=creditor_member.display_name,
-            amount=settle_amount.quantize(Decimal('0.01')),
+            amount=a_decimal(settle_amount),
             to_alias_bancario=to_alias,
             to_cvu=to_cvu,
         ))
 
-        creditors[i][1] -= settle_amount
-        debtors[j][1] -= settle_amount
+    return transfers
 
-        if creditors[i][1] < Decimal('0.01'):
-            i += 1
-        if debtors[j][1] < Decimal('0.01'):
-            j += 1
 
-    return transfers
+def calcular_resumenes(db: Session, group_ids: List[int]) -> dict[int, schemas.SplitGroupSummary]:
+    """
+    Calcula el resumen (totales, balance neto del creador, pagos pendientes) de varios
+    grupos con una consulta agrupada por métrica, sin importar la cantidad de grupos.
+    El balance del creador incluye los pagos aprobados, igual que los saldos del grupo.
+    """
+    if not group_ids:
+        return {}
+
+    gastos = {
+        group_id: (total, cantidad) for group_id, total, cantidad in db.query(
+            models.SplitExpense.group_id,
+            func.sum(models.SplitExpense.importe),
+            func.count(models.SplitExpense.id),
+        ).filter(
+            models.SplitExpense.group_id.in_(group_ids),
+        ).group_by(models.SplitExpense.group_id)
+    }
+
+    pagado_creador = dict(
+        db.query(models.SplitExpense.group_id, func.sum(models.SplitExpense.importe))
+        .join(models.SplitGroupMember, models.SplitGroupMember.id == models.SplitExpense.paid_by_member_id)
+        .filter(
+            models.SplitExpense.group_id.in_(group_ids),
+            models.SplitGroupMember.is_creator == True,
+        ).group_by(models.SplitExpense.group_id)
+    )
+
+    share_creador = dict(
+        db.query(models.SplitGroupMember.group_id, func.sum(models.SplitExpenseParticipant.share_amount))
+        .join(models.SplitGroupMember, models.SplitGroupMember.id == models.SplitExpenseParticipant.member_id)
+        .filter(
+            models.SplitGroupMember.group_id.in_(group_ids),
+            models.SplitGroupMember.is_creator == True,
+        ).group_by(models.SplitGroupMember.group_id)
+    )
+
+    # Pagos pendientes y liquidación del creador (pagos aprobados enviados menos recibidos)
+    desde = aliased(models.SplitGroupMember)
+    hacia = aliased(models.SplitGroupMember)
+    aprobado = models.Payment.status == "approved"
+    pagos = {
+        group_id: (pendientes, liquidado) for group_id, pendientes, liquidado in db.query(
+            models.Payment.group_id,
+            func.sum(case((models.Payment.status == "pending", 1), else_=0)),
+            func.sum(case(
+                (and_(aprobado, desde.is_creator == True), models.Payment.amount),
+                (and_(aprobado, hacia.is_creator == True), -models.Payment.amount),
+                else_=0,
+            )),
+        ).join(desde, desde.id == models.Payment.from_member_id)
+        .join(hacia, hacia.id == models.Payment.to_member_id)
+        .filter(
+            models.Payment.group_id.in_(group_ids),
+            models.Payment.status.in_(["pending", "approved"]),
+        ).group_by(models.Payment.group_id)
+    }
+
+    resumenes = {}
+    for group_id in group_ids:
+        total, cantidad = gastos.get(group_id, (0, 0))
+        pendientes, liquidado = pagos.get(group_id, (0, 0))
+        neto = (
+            a_centavos(pagado_creador.get(group_id) or 0)
+            - a_centavos(share_creador.get(group_id) or 0)
+            + a_centavos(liquidado or 0)
+        )
+        resumenes[group_id] = schemas.SplitGroupSummary(
+            total_expenses=a_decimal(a_centavos(total or 0)),
+            expense_count=cantidad,
+            creator_net_balance=a_decimal(neto),
+            pending_payments=pendientes or 0,
+        )
+    return resumenes
+
+
+def calcular_saldos_grupo(db: Session, group_id: int) -> dict[int, tuple[int, int, int]]:
+    """
+    Totales por miembro de un grupo con una sola agregación SQL: lo pagado en gastos,
+    lo consumido (shares) y lo liquidado con pagos aprobados (enviado menos recibido),
+    que entran como asientos de liquidación. El neto es pagado - consumido + liquidado.
+    Retorna {member_id: (pagado, consumido, liquidado)} en centavos; los miembros sin
+    movimientos no aparecen.
+    """
+    cero = literal(0, models.SplitExpense.importe.type)
+    aprobado = and_(models.Payment.group_id == group_id, models.Payment.status == "approved")
+    entradas = union_all(
+        select(
+            models.SplitExpense.paid_by_member_id.label("member_id"),
+            models.SplitExpense.importe.label("pagado"),
+            cero.label("consumido"),
+            cero.label("liquidado"),
+        ).where(models.SplitExpense.group_id == group_id),
+        select(models.SplitExpenseParticipant.member_id, cero, models.SplitExpenseParticipant.share_amount, cero)
+        .join(models.SplitExpense)
+        .where(models.SplitExpense.group_id == group_id),
+        select(models.Payment.from_member_id, cero, cero, models.Payment.amount).where(aprobado),
+        select(models.Payment.to_member_id, cero, cero, -models.Payment.amount).where(aprobado),
+    ).subquery()
+
+    filas = db.query(
+        entradas.c.member_id,
+        func.sum(entradas.c.pagado),
+        func.sum(entradas.c.consumido),
+        func.sum(entradas.c.liquidado),
+    ).group_by(entradas.c.member_id)
+
+    return {
+        member_id: (a_centavos(pagado or 0), a_centavos(consumido or 0), a_centavos(liquidado or 0))
+        for member_id, pagado, consumido, liquidado in filas
+    }
+
+
+def calcular_balances_contactos(
+    db: Session,
+    owner_id: int,
+    contact_id: Optional[int] = None,
+) -> dict[int, tuple[int, int]]:
+    """
+    Balance neto consolidado por contacto en todos los grupos del usuario, con una
+    sola agregación SQL: lo pagado suma, lo consumido resta y los pagos aprobados
+    mueven el saldo entre pagador y receptor.
+    Retorna {contact_id: (neto en centavos, cantidad de grupos)}.
+    """
+    miembros = select(models.SplitGroupMember.id).join(
+        models.SplitGroup, models.SplitGroup.id == models.SplitGroupMember.group_id,
+    ).where(
+        models.SplitGroup.creator_id == owner_id,
+        models.SplitGroupMember.contact_id.isnot(None),
+    )
+    if contact_id is not None:
+        miembros = miembros.where(models.SplitGroupMember.contact_id == contact_id)
+
+    aprobado = models.Payment.status == "approved"
+    entradas = union_all(
+        select(
+            models.SplitExpense.paid_by_member_id.label("member_id"),
+            models.SplitExpense.importe.label("monto"),
+        ).where(models.SplitExpense.paid_by_member_id.in_(miembros)),
+        select(
+            models.SplitExpenseParticipant.member_id,
+            -models.SplitExpenseParticipant.share_amount,
+        ).where(models.SplitExpenseParticipant.member_id.in_(miembros)),
+        select(models.Payment.from_member_id, models.Payment.amount)
+        .where(aprobado, models.Payment.from_member_id.in_(miembros)),
+        select(models.Payment.to_member_id, -models.Payment.amount)
+        .where(aprobado, models.Payment.to_member_id.in_(miembros)),
+    ).subquery()
+
+    filas = db.query(
+        models.SplitGroupMember.contact_id,
+        func.sum(entradas.c.monto),
+        func.count(func.distinct(models.SplitGroupMember.group_id)),
+    ).join(
+        entradas, entradas.c.member_id == models.SplitGroupMember.id,
+    ).group_by(models.SplitGroupMember.contact_id)
+
+    return {cid: (a_centavos(neto or 0), grupos) for cid, neto, grupos in filas}
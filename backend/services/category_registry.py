@@ -0,0 +1,77 @@
+"""Registro en memoria de las categorías del sistema.
+
+La tabla `categories` es seed de solo lectura: se carga una vez por proceso (al
+arrancar o en el primer uso) y se sirve desde memoria, con un ETag derivado del
+contenido y de config.CATEGORIES_VERSION. Se recarga a pedido (invalidar/recargar),
+cuando cambia CATEGORIES_VERSION o cuando se consulta un id que no conoce y sí existe.
+"""
+import hashlib
+import json
+import threading
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+import config
+import models
+import schemas
+
+_lock = threading.Lock()
+_categorias: Optional[List[schemas.CategoryRead]] = None
+_ids: frozenset = frozenset()
+_etag: Optional[str] = None
+_version: Optional[str] = None
+
+
+def recargar(db: Session) -> None:
+    """Carga las categorías del sistema desde la BD y recalcula el ETag."""
+    global _categorias, _ids, _etag, _version
+    filas = db.query(models.Category).filter(
+        models.Category.es_predeterminada == True
+    ).order_by(models.Category.id).all()
+    categorias = [schemas.CategoryRead.model_validate(c) for c in filas]
+
+    contenido = json.dumps(
+        [c.model_dump(mode="json") for c in categorias], sort_keys=True, ensure_ascii=False,
+    )
+    digest = hashlib.sha256(f"{config.CATEGORIES_VERSION}:{contenido}".encode()).hexdigest()[:32]
+
+    with _lock:
+        _categorias = categorias
+        _ids = frozenset(c.id for c in categorias)
+        _etag = f'"{digest}"'
+        _version = config.CATEGORIES_VERSION
+
+
+def invalidar() -> None:
+    """Descarta el registro: el próximo acceso lo recarga desde la BD."""
+    global _categorias
+    with _lock:
+        _categorias = None
+
+
+def _asegurar_cargado(db: Session) -> None:
+    if _categorias is None or _version != config.CATEGORIES_VERSION:
+        recargar(db)
+
+
+def obtener(db: Session) -> tuple[List[schemas.CategoryRead], str]:
+    """Retorna (categorías del sistema, ETag)."""
+    _asegurar_cargado(db)
+    return _categorias, _etag
+
+
+def existe(db: Session, categoria_id: int) -> bool:
+    """
+    Verifica que la categoría exista. Los ids conocidos no tocan la BD; uno desconocido
+    se confirma con una consulta por PK y, si existe, recarga el registro.
+    """
+    _asegurar_cargado(db)
+    if categoria_id in _ids:
+        return True
+    categoria = db.get(models.Category, categoria_id)
+    if categoria is None:
+        return False
+    if categoria.es_predeterminada:
+        recargar(db)
+    return True
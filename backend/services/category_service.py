@@ -0,0 +1,62 @@
+"""Servicio de reasignación masiva de categorías.
+
+Mueve movimientos (y los templates de gastos fijos) de una categoría a otra con un
+UPDATE por tabla, en vez de editar cada movimiento por separado.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+import models
+
+
+def recategorizar(
+    db: Session,
+    user_id: int,
+    categoria_id: Optional[int] = None,
+    user_category_id: Optional[int] = None,
+    actual_categoria_id: Optional[int] = None,
+    actual_user_category_id: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    tipo: Optional[str] = None,
+    incluir_gastos_fijos: bool = True,
+) -> tuple[int, int]:
+    """
+    Asigna la categoría destino (del sistema o personalizada, exactamente una) a los
+    movimientos del usuario que cumplen los filtros (categoría actual, rango de fechas
+    inclusivo y tipo), y a sus templates de gastos fijos con la categoría actual (solo si
+    se filtra por categoría actual).
+    No hace commit. Retorna (movimientos actualizados, gastos fijos actualizados).
+    """
+    destino = {"categoria_id": categoria_id, "user_category_id": user_category_id}
+
+    movimientos = db.query(models.Movimiento).filter(models.Movimiento.user_id == user_id)
+    if actual_categoria_id is not None:
+        movimientos = movimientos.filter(models.Movimiento.categoria_id == actual_categoria_id)
+    if actual_user_category_id is not None:
+        movimientos = movimientos.filter(models.Movimiento.user_category_id == actual_user_category_id)
+    if desde is not None:
+        movimientos = movimientos.filter(models.Movimiento.fecha >= desde)
+    if hasta is not None:
+        movimientos = movimientos.filter(models.Movimiento.fecha <= hasta)
+    if tipo is not None:
+        movimientos = movimientos.filter(models.Movimiento.tipo == tipo)
+    n_movimientos = movimientos.update(
+        {**destino, "updated_at": datetime.now()}, synchronize_session=False,
+    )
+
+    # Los templates no tienen fecha y siempre generan gastos: se filtran solo por categoría,
+    # y sin categoría actual no hay con qué elegirlos (no se tocan)
+    n_gastos_fijos = 0
+    por_categoria = actual_categoria_id is not None or actual_user_category_id is not None
+    if incluir_gastos_fijos and por_categoria and tipo in (None, "gasto"):
+        gastos_fijos = db.query(models.GastoFijo).filter(models.GastoFijo.user_id == user_id)
+        if actual_categoria_id is not None:
+            gastos_fijos = gastos_fijos.filter(models.GastoFijo.categoria_id == actual_categoria_id)
+        if actual_user_category_id is not None:
+            gastos_fijos = gastos_fijos.filter(models.GastoFijo.user_category_id == actual_user_category_id)
+        n_gastos_fijos = gastos_fijos.update(destino, synchronize_session=False)
+
+    return n_movimientos, n_gastos_fijos
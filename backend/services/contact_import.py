@@ -0,0 +1,257 @@
+"""
+Importación masiva de contactos desde CSV o vCard.
+
+El archivo se lee como stream, los campos se encriptan en bloque (una instancia de
+Fernet por lote) y se insertan por lotes con un commit por lote. Los duplicados se
+detectan con un digest (HMAC) de nombre + CVU normalizados guardado en la fila, así
+que no hace falta desencriptar la agenda para comparar.
+"""
+import codecs
+import csv
+import itertools
+from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import config
+import models
+from encryption import blind_index, encrypt_many, plain_table
+from services.contact_index import normalizar
+
+TAMANIO_LOTE = 200
+
+# Encabezados CSV aceptados (en minúsculas) -> campo del contacto
+_COLUMNAS_CSV = {
+    "nombre": "nombre",
+    "name": "nombre",
+    "alias": "alias_bancario",
+    "alias_bancario": "alias_bancario",
+    "cvu": "cvu",
+    "cbu": "cvu",
+}
+
+# Propiedades vCard (sin parámetros) -> campo del contacto
+_PROPIEDADES_VCARD = {
+    "FN": "nombre",
+    "X-ALIAS": "alias_bancario",
+    "X-CVU": "cvu",
+    "X-CBU": "cvu",
+}
+
+
+def digest_contacto(owner_id: int, nombre: str, cvu: Optional[str] = None) -> str:
+    """Digest de nombre + CVU normalizados, distinto por usuario."""
+    digitos = "".join(c for c in (cvu or "") if c.isdigit())
+    return blind_index(f"{owner_id}\x1f{normalizar(nombre)}\x1f{digitos}")
+
+
+# ============== PARSEO ==============
+
+def _filas_csv(lineas: Iterator[str]) -> Iterator[tuple[int, dict]]:
+    encabezado = next(lineas, "")
+    # Excel en español exporta con ';'
+    delimitador = ";" if encabezado.count(";") > encabezado.count(",") else ","
+    reader = csv.reader(itertools.chain([encabezado], lineas), delimiter=delimitador)
+    columnas = [_COLUMNAS_CSV.get(c.strip().lower()) for c in next(reader, [])]
+    for valores in reader:
+        if not any(v.strip() for v in valores):
+            continue
+        yield reader.line_num, {
+            campo: valor.strip() for campo, valor in zip(columnas, valores) if campo
+        }
+
+
+def _desplegar(lineas: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """Une las líneas plegadas de vCard (las que empiezan con espacio o tab)."""
+    pendiente, numero_pendiente = None, 0
+    for numero, linea in enumerate(lineas, start=1):
+        linea = linea.rstrip("\r\n")
+        if linea[:1] in (" ", "\t") and pendiente is not None:
+            pendiente += linea[1:]
+            continue
+        if pendiente is not None:
+            yield numero_pendiente, pendiente
+        pendiente, numero_pendiente = linea, numero
+    if pendiente is not None:
+        yield numero_pendiente, pendiente
+
+
+def _valor_vcard(valor: str) -> str:
+    return valor.replace("\\n", " ").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\").strip()
+
+
+def _filas_vcard(lineas: Iterator[str]) -> Iterator[tuple[int, dict]]:
+    actual, inicio = None, 0
+    for numero, linea in _desplegar(lineas):
+        clave, _, valor = linea.partition(":")
+        # "item1.X-CVU;TYPE=x" -> "X-CVU"
+        propiedad = clave.split(";")[0].split(".")[-1].strip().upper()
+        if propiedad == "BEGIN" and valor.strip().upper() == "VCARD":
+            actual, inicio = {}, numero
+        elif propiedad == "END" and actual is not None:
+            yield inicio, actual
+            actual = None
+        elif actual is None:
+            continue
+        elif propiedad in _PROPIEDADES_VCARD:
+            actual.setdefault(_PROPIEDADES_VCARD[propiedad], _valor_vcard(valor))
+        elif propiedad == "N" and "nombre" not in actual:
+            # N:Apellido;Nombre;...
+            partes = [_valor_vcard(p) for p in valor.split(";")]
+            nombre = " ".join(p for p in partes[1:2] + partes[:1] if p)
+            if nombre:
+                actual["nombre_n"] = nombre
+    if actual is not None:
+        yield inicio, actual
+
+
+def leer_filas(archivo: BinaryIO, nombre_archivo: str = "", formato: Optional[str] = None) -> Iterator[tuple[int, dict]]:
+    """
+    Itera (número de línea, campos) del archivo sin cargarlo entero en memoria.
+    Sin `formato` se decide por la extensión o por el contenido (BEGIN:VCARD).
+    """
+    # Decodifica línea a línea: UploadFile.file es un SpooledTemporaryFile, que en
+    # Python 3.10 no implementa readable() y TextIOWrapper no lo acepta
+    lineas = codecs.iterdecode(archivo, "utf-8-sig")
+
+    if formato is None:
+        if nombre_archivo.lower().endswith((".vcf", ".vcard")):
+            formato = "vcard"
+        else:
+            primera = next(lineas, "")
+            lineas = itertools.chain([primera], lineas)
+            formato = "vcard" if primera.strip().upper().startswith("BEGIN:VCARD") else "csv"
+
+    if formato == "vcard":
+        for numero, campos in _filas_vcard(lineas):
+            if "nombre" not in campos and "nombre_n" in campos:
+                campos["nombre"] = campos["nombre_n"]
+            campos.pop("nombre_n", None)
+            yield numero, campos
+    else:
+        yield from _filas_csv(lineas)
+
+
+# ============== IMPORTACIÓN ==============
+
+def completar_digests(db: Session, owner_id: int) -> None:
+    """Calcula el digest de los contactos que no lo tienen (creados antes de existir)."""
+    pendientes = db.query(models.Contact.id, models.Contact.nombre, models.Contact.cvu).filter(
+        models.Contact.owner_id == owner_id,
+        models.Contact.dedup_digest.is_(None),
+    ).all()
+    if not pendientes:
+        return
+    db.execute(update(models.Contact), [
+        {"id": contact_id, "dedup_digest": digest_contacto(owner_id, nombre, cvu)}
+        for contact_id, nombre, cvu in pendientes
+    ])
+    db.commit()
+
+
+def _insertar_lote(db: Session, owner_id: int, lote: list, ahora: datetime) -> bool:
+    """
+    Inserta un lote con un solo INSERT y un commit; los ids se leen después por digest
+    (únicos dentro del lote) para completar el reporte. Retorna False si el lote no se
+    pudo guardar (sus filas quedan como error).
+    """
+    nombres = encrypt_many([nombre for _, nombre, _, _, _ in lote])
+    aliases = encrypt_many([alias for _, _, alias, _, _ in lote])
+    cvus = encrypt_many([cvu for _, _, _, cvu, _ in lote])
+    digests = [digest for *_, digest in lote]
+    try:
+        db.execute(insert(plain_table(models.Contact.__table__)), [
+            {
+                "owner_id": owner_id,
+                "nombre": nombre,
+                "alias_bancario": alias,
+                "cvu": cvu,
+                "dedup_digest": digest,
+                "created_at": ahora,
+                "updated_at": ahora,
+            }
+            for (_, _, _, _, digest), nombre, alias, cvu in zip(lote, nombres, aliases, cvus)
+        ])
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        for item, *_ in lote:
+            item.update(estado="error", detalle="No se pudo guardar el contacto")
+        return False
+
+    ids = dict(db.query(models.Contact.dedup_digest, models.Contact.id).filter(
+        models.Contact.owner_id == owner_id,
+        models.Contact.dedup_digest.in_(digests),
+    ).all())
+    for item, *_, digest in lote:
+        item["contact_id"] = ids.get(digest)
+    return True
+
+
+def _guardar_lote(db: Session, owner_id: int, lote: list, ahora: datetime, en_archivo: dict[str, int]) -> None:
+    """
+    Inserta el lote; si falla, sus digests se olvidan para que una copia posterior en el
+    archivo se vuelva a intentar en vez de reportarse como repetida de una fila no guardada.
+    """
+    if not _insertar_lote(db, owner_id, lote, ahora):
+        for *_, digest in lote:
+            en_archivo.pop(digest, None)
+
+
+def importar_contactos(db: Session, owner_id: int, filas: Iterable[tuple[int, dict]]) -> list[dict]:
+    """
+    Importa las filas y devuelve un reporte por fila con estado creado/duplicado/error.
+    Un duplicado es un contacto (existente o anterior en el archivo) con el mismo
+    nombre y CVU normalizados.
+    """
+    completar_digests(db, owner_id)
+    existentes = dict(db.query(models.Contact.dedup_digest, models.Contact.id).filter(
+        models.Contact.owner_id == owner_id,
+    ).all())
+    en_archivo: dict[str, int] = {}
+
+    ahora = datetime.now()
+    reporte, lote = [], []
+    procesadas, ultima = 0, 0
+    try:
+        for numero, campos in filas:
+            ultima = numero
+            procesadas += 1
+            if procesadas > config.CONTACT_IMPORT_MAX_ROWS:
+                reporte.append({"fila": numero, "estado": "error",
+                                "detalle": f"Se superó el máximo de {config.CONTACT_IMPORT_MAX_ROWS} filas"})
+                break
+
+            nombre = (campos.get("nombre") or "").strip()
+            if not nombre:
+                reporte.append({"fila": numero, "estado": "error", "detalle": "Falta el nombre"})
+                continue
+
+            cvu = campos.get("cvu") or None
+            digest = digest_contacto(owner_id, nombre, cvu)
+            if digest in existentes:
+                reporte.append({"fila": numero, "nombre": nombre, "estado": "duplicado",
+                                "contact_id": existentes[digest]})
+                continue
+            if digest in en_archivo:
+                reporte.append({"fila": numero, "nombre": nombre, "estado": "duplicado",
+                                "detalle": f"Repetido en la fila {en_archivo[digest]}"})
+                continue
+            en_archivo[digest] = numero
+
+            item = {"fila": numero, "nombre": nombre, "estado": "creado"}
+            reporte.append(item)
+            lote.append((item, nombre, campos.get("alias_bancario") or None, cvu, digest))
+            if len(lote) >= TAMANIO_LOTE:
+                _guardar_lote(db, owner_id, lote, ahora, en_archivo)
+                lote = []
+    except (UnicodeDecodeError, csv.Error):
+        reporte.append({"fila": ultima + 1, "estado": "error",
+                        "detalle": "No se pudo leer el archivo (debe ser CSV o vCard en UTF-8)"})
+
+    if lote:
+        _guardar_lote(db, owner_id, lote, ahora, en_archivo)
+    return reporte
@@ -0,0 +1,115 @@
+"""Índice en memoria de nombres de contactos por usuario (orden y búsqueda por prefijo).
+
+`nombre` está encriptado, así que la BD no puede ordenarlo ni filtrarlo. Cada proceso
+mantiene, para los usuarios usados más recientemente (LRU), sus contactos ordenados por
+nombre normalizado. En cada uso se valida con una huella barata por SQL
+(count, max(id), max(updated_at)) que no desencripta nada: solo si cambió se reconstruye.
+"""
+import bisect
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import config
+import models
+
+
+@dataclass
+class _Indice:
+    huella: tuple
+    orden: List[int]                 # ids de contacto ordenados por nombre
+    claves: List[tuple[str, int]]    # (sufijo de palabras normalizado, posición en orden), ordenadas
+
+
+_lock = threading.Lock()
+_indices: "OrderedDict[int, _Indice]" = OrderedDict()
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sin acentos y con espacios colapsados (para ordenar y buscar)."""
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_acentos.split())
+
+
+def _huella(db: Session, owner_id: int) -> tuple:
+    return tuple(db.query(
+        func.count(models.Contact.id),
+        func.max(models.Contact.id),
+        func.max(models.Contact.updated_at),
+    ).filter(models.Contact.owner_id == owner_id).one())
+
+
+def _construir(db: Session, owner_id: int, huella: tuple) -> _Indice:
+    """Desencripta los nombres del usuario una vez y arma el índice."""
+    filas = db.query(models.Contact.id, models.Contact.nombre).filter(
+        models.Contact.owner_id == owner_id
+    ).all()
+    ordenados = sorted((normalizar(nombre), contact_id) for contact_id, nombre in filas)
+
+    claves = []
+    for posicion, (nombre, _) in enumerate(ordenados):
+        palabras = nombre.split(" ")
+        # Cada sufijo de palabras: "juan perez" se encuentra por "ju" y por "pe"
+        claves.extend((" ".join(palabras[i:]), posicion) for i in range(len(palabras)))
+    claves.sort()
+
+    return _Indice(huella=huella, orden=[contact_id for _, contact_id in ordenados], claves=claves)
+
+
+def _obtener(db: Session, owner_id: int) -> _Indice:
+    huella = _huella(db, owner_id)
+    with _lock:
+        indice = _indices.get(owner_id)
+        if indice is not None and indice.huella == huella:
+            _indices.move_to_end(owner_id)
+            return indice
+
+    indice = _construir(db, owner_id, huella)
+    with _lock:
+        _indices[owner_id] = indice
+        _indices.move_to_end(owner_id)
+        while len(_indices) > config.CONTACT_INDEX_MAX_USERS:
+            _indices.popitem(last=False)
+    return indice
+
+
+def buscar(
+    db: Session,
+    owner_id: int,
+    q: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[int]:
+    """
+    Ids de los contactos del usuario ordenados por nombre. Con `q`, solo los que tienen
+    alguna palabra del nombre (y las siguientes) que empieza con `q`, sin distinguir
+    mayúsculas ni acentos.
+    """
+    indice = _obtener(db, owner_id)
+    fin = None if limit is None else offset + limit
+
+    if not q or not normalizar(q):
+        return indice.orden[offset:fin]
+
+    prefijo = normalizar(q)
+    posiciones = set()
+    i = bisect.bisect_left(indice.claves, (prefijo, -1))
+    while i < len(indice.claves) and indice.claves[i][0].startswith(prefijo):
+        posiciones.add(indice.claves[i][1])
+        i += 1
+    return [indice.orden[p] for p in sorted(posiciones)][offset:fin]
+
+
+def invalidar(owner_id: Optional[int] = None) -> None:
+    """Descarta el índice de un usuario (o todos)."""
+    with _lock:
+        if owner_id is None:
+            _indices.clear()
+        else:
+            _indices.pop(owner_id, None)
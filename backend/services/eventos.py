@@ -0,0 +1,160 @@
+"""
+Eventos de cambios por usuario para la PWA (Server-Sent Events en GET /events).
+
+Reemplaza el polling de /payments/{id}/status y /split-groups/{id}/balances: los
+routers y servicios publican después del commit y cada conexión SSE del usuario recibe
+el evento. Tipos: "pago" (cambio de estado), "gasto", "miembro", "grupo" y "saldos"
+(los saldos del grupo cambiaron y conviene releerlos). Los eventos solo avisan qué
+cambió; el cliente relee el recurso con los endpoints de siempre.
+
+El fan-out es en proceso. Con varios procesos (workers de uvicorn, worker.py, el
+scheduler en otro nodo) se activa EVENTS_PG_NOTIFY: se publica con pg_notify y cada
+proceso de la API escucha el canal (LISTEN) y entrega a sus conexiones.
+
+Se publica desde cualquier hilo (endpoints sync, cola de trabajos, scheduler); la
+entrega se agenda en el event loop de cada conexión.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import text
+
+import config
+from database import engine
+
+logger = logging.getLogger("finanzaapp")
+
+CANAL_PG = "finanzaapp_eventos"
+# Eventos sin leer por conexión; si se llena se descartan y se pide resincronizar
+MAX_PENDIENTES = 100
+EVENTO_RESYNC = {"tipo": "resync", "datos": {}}
+
+
+@dataclass(eq=False)
+class Suscripcion:
+    user_id: int
+    loop: asyncio.AbstractEventLoop
+    cola: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=MAX_PENDIENTES))
+
+    def encolar(self, evento: dict) -> None:
+        """Corre en el loop de la conexión."""
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait(EVENTO_RESYNC)
+
+
+_suscripciones: dict[int, set[Suscripcion]] = {}
+_lock = threading.Lock()
+
+
+def suscribir(user_id: int) -> Optional[Suscripcion]:
+    """
+    Registra una conexión del usuario en el loop actual. Retorna None si el usuario ya
+    tiene EVENTS_MAX_CONNECTIONS_PER_USER conexiones abiertas.
+    """
+    suscripcion = Suscripcion(user_id=user_id, loop=asyncio.get_running_loop())
+    with _lock:
+        propias = _suscripciones.setdefault(user_id, set())
+        if len(propias) >= config.EVENTS_MAX_CONNECTIONS_PER_USER:
+            return None
+        propias.add(suscripcion)
+    return suscripcion
+
+
+def desuscribir(suscripcion: Suscripcion) -> None:
+    with _lock:
+        propias = _suscripciones.get(suscripcion.user_id)
+        if propias is not None:
+            propias.discard(suscripcion)
+            if not propias:
+                del _suscripciones[suscripcion.user_id]
+
+
+def _entregar(user_id: int, evento: dict) -> None:
+    with _lock:
+        destinos = list(_suscripciones.get(user_id, ()))
+    for suscripcion in destinos:
+        try:
+            suscripcion.loop.call_soon_threadsafe(suscripcion.encolar, evento)
+        except RuntimeError:
+            # Loop cerrado: la conexión se está yendo
+            desuscribir(suscripcion)
+
+
+def _publicar_pg(user_id: int, evento: dict) -> None:
+    with engine.connect() as conn:
+        conn.execute(
+            text("SELECT pg_notify(:canal, :payload)"),
+            {"canal": CANAL_PG, "payload": json.dumps({"user_id": user_id, **evento})},
+        )
+        conn.commit()
+
+
+def publicar(user_id: Optional[int], tipo: str, **datos) -> None:
+    """
+    Publica un evento para las conexiones de `user_id`. Llamar después del commit.
+    Nunca falla: un error de publicación solo se loguea.
+    """
+    if user_id is None:
+        return
+    evento = {"tipo": tipo, "datos": datos}
+    try:
+        if config.EVENTS_PG_NOTIFY:
+            _publicar_pg(user_id, evento)
+        else:
+            _entregar(user_id, evento)
+    except Exception as e:
+        logger.error(json.dumps({"msg": "error_publicando_evento", "tipo": tipo, "error": str(e)}))
+
+
+def formatear(evento: dict) -> str:
+    """Evento en formato SSE."""
+    return f"event: {evento['tipo']}\ndata: {json.dumps(evento['datos'])}\n\n"
+
+
+# ============== PUENTE POSTGRES (LISTEN/NOTIFY) ==============
+
+def _escuchar_pg(detener: threading.Event) -> None:
+    """Escucha CANAL_PG y entrega los eventos a las conexiones de este proceso; reconecta ante errores."""
+    while not detener.is_set():
+        conexion = None
+        try:
+            conexion = engine.raw_connection()
+            dbapi = conexion.driver_connection
+            dbapi.autocommit = True
+            dbapi.cursor().execute(f"LISTEN {CANAL_PG}")
+            while not detener.is_set():
+                if not select.select([dbapi], [], [], 1.0)[0]:
+                    continue
+                dbapi.poll()
+                while dbapi.notifies:
+                    evento = json.loads(dbapi.notifies.pop(0).payload)
+                    _entregar(evento.pop("user_id"), evento)
+        except Exception as e:
+            logger.error(json.dumps({"msg": "error_escuchando_eventos", "error": str(e)}))
+            detener.wait(5)
+        finally:
+            if conexion is not None:
+                # No vuelve al pool en modo LISTEN
+                conexion.invalidate()
+
+
+def iniciar_puente_pg() -> tuple[threading.Thread, threading.Event]:
+    """Arranca el LISTEN de eventos en un hilo de este proceso."""
+    detener = threading.Event()
+    hilo = threading.Thread(target=_escuchar_pg, args=(detener,), name="eventos-pg", daemon=True)
+    hilo.start()
+    return hilo, detener
+
+
+def detener_puente_pg(hilo: threading.Thread, detener: threading.Event) -> None:
+    detener.set()
+    hilo.join(timeout=5)
@@ -0,0 +1,82 @@
+"""Servicio de estadísticas desnormalizadas de gastos fijos.
+
+max_importe, ultimo_importe, ultima_fecha y total_meses se guardan en gastos_fijos
+para que leerlas no requiera recorrer movimientos. Las altas de instancias (manuales
+o auto-generadas) las actualizan incrementalmente con un UPDATE por template, sin
+leer movimientos; ediciones y bajas recalculan solo los templates afectados.
+"""
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import DateTime, Integer, Numeric, bindparam, case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+import models
+
+
+def registrar_instancias(db: Session, instancias: Iterable[tuple[int, Decimal, datetime]]) -> None:
+    """
+    Actualiza las stats de los templates tras insertar instancias (gasto_fijo_id, importe, fecha).
+    Agrupa por template y aplica un UPDATE en bloque relativo a los valores actuales:
+    suma la cantidad, toma el máximo y reemplaza el último si la instancia es igual o más
+    reciente (a igual fecha gana la insertada después, como en el orden fecha, id).
+    """
+    por_template = defaultdict(lambda: [0, None, None, None])
+    for gasto_fijo_id, importe, fecha in instancias:
+        acumulado = por_template[gasto_fijo_id]
+        acumulado[0] += 1
+        if acumulado[1] is None or importe > acumulado[1]:
+            acumulado[1] = importe
+        if acumulado[2] is None or fecha >= acumulado[2]:
+            acumulado[2], acumulado[3] = fecha, importe
+    if not por_template:
+        return
+
+    gf = models.GastoFijo.__table__
+    max_nuevo = bindparam("b_max", type_=Numeric(10, 2))
+    fecha_nueva = bindparam("b_fecha", type_=DateTime)
+    es_mas_reciente = or_(gf.c.ultima_fecha.is_(None), gf.c.ultima_fecha <= fecha_nueva)
+    db.execute(
+        update(gf).where(gf.c.id == bindparam("b_id")).values(
+            total_meses=gf.c.total_meses + bindparam("b_cantidad", type_=Integer),
+            max_importe=case(
+                (or_(gf.c.max_importe.is_(None), gf.c.max_importe < max_nuevo), max_nuevo),
+                else_=gf.c.max_importe,
+            ),
+            ultimo_importe=case(
+                (es_mas_reciente, bindparam("b_ultimo", type_=Numeric(10, 2))),
+                else_=gf.c.ultimo_importe,
+            ),
+            ultima_fecha=case((es_mas_reciente, fecha_nueva), else_=gf.c.ultima_fecha),
+        ),
+        [
+            {"b_id": gf_id, "b_cantidad": cantidad, "b_max": maximo, "b_fecha": fecha, "b_ultimo": ultimo}
+            for gf_id, (cantidad, maximo, fecha, ultimo) in por_template.items()
+        ],
+    )
+
+
+def recalcular_stats(db: Session, gasto_fijo_ids: Iterable[int]) -> None:
+    """
+    Recalcula desde movimientos las stats de los templates indicados con un solo UPDATE
+    de subconsultas correlacionadas (usa el índice (gasto_fijo_id, fecha)).
+    Se usa cuando una instancia se edita o se elimina.
+    """
+    ids = list(set(gasto_fijo_ids))
+    if not ids:
+        return
+
+    gf = models.GastoFijo.__table__
+    mov = models.Movimiento.__table__
+    de_template = mov.c.gasto_fijo_id == gf.c.id
+    db.execute(
+        update(gf).where(gf.c.id.in_(ids)).values(
+            total_meses=select(func.count(mov.c.id)).where(de_template).scalar_subquery(),
+            max_importe=select(func.max(mov.c.importe)).where(de_template).scalar_subquery(),
+            ultimo_importe=select(mov.c.importe).where(de_template)
+            .order_by(mov.c.fecha.desc(), mov.c.id.desc()).limit(1).scalar_subquery(),
+            ultima_fecha=select(func.max(mov.c.fecha)).where(de_template).scalar_subquery(),
+        )
+    )
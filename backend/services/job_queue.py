@@ -0,0 +1,236 @@
+"""
+Cola de trabajos en segundo plano respaldada por la DB (tabla background_jobs).
+
+Los handlers encolan con `encolar` (en la misma transacción que su escritura) y el
+trabajo lo ejecuta un worker fuera del request: el hilo en proceso que arranca la app
+(JOB_WORKER_IN_PROCESS) o uno o más procesos `python worker.py`. Además `despachar`
+lo intenta apenas termina el response, para no esperar al próximo poll.
+
+Los workers toman trabajos con SELECT ... FOR UPDATE SKIP LOCKED en Postgres; en
+SQLite (sin FOR UPDATE) el UPDATE condicional sobre status='pending' es el que
+garantiza que un trabajo lo tome un solo worker. Un error reprograma el trabajo con
+backoff exponencial hasta agotar max_attempts; uno que quedó en 'running' más de
+JOB_LOCK_TIMEOUT_SECONDS (worker caído) vuelve a la cola.
+"""
+import asyncio
+import inspect
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from fastapi import BackgroundTasks
+from sqlalchemy import and_, update
+from sqlalchemy.orm import Session
+
+import config
+import models
+from database import SessionLocal
+
+logger = logging.getLogger("finanzaapp")
+
+# Identidad de este proceso como worker
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+# Trabajos tomados por consulta
+TAMANIO_LOTE = 10
+BACKOFF_MAX_SEG = 3600
+
+# Tareas registradas: nombre -> handler(db, payload). Ver services/tareas.py
+TAREAS: dict[str, Callable] = {}
+
+_hilo = threading.local()
+
+
+def _loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop propio del hilo para las tareas async. Se reutiliza entre trabajos (a
+    diferencia de asyncio.run) para que los clientes HTTP mantengan sus conexiones.
+    """
+    loop = getattr(_hilo, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _hilo.loop = asyncio.new_event_loop()
+    return loop
+
+
+def tarea(nombre: str):
+    """Registra el handler de una tarea. Puede ser `def` o `async def`."""
+    def registrar(funcion):
+        TAREAS[nombre] = funcion
+        return funcion
+    return registrar
+
+
+def encolar(
+    db: Session,
+    kind: str,
+    payload: Optional[dict] = None,
+    max_attempts: Optional[int] = None,
+    run_at: Optional[datetime] = None,
+) -> models.BackgroundJob:
+    """
+    Agrega un trabajo a la sesión (sin commit): se persiste junto con la escritura del
+    llamador, así que no queda un trabajo sin su dato ni un dato sin su trabajo.
+    """
+    job = models.BackgroundJob(
+        kind=kind,
+        payload=payload or {},
+        max_attempts=max_attempts or config.JOB_MAX_ATTEMPTS,
+        run_at=run_at or datetime.now(),
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def despachar(background_tasks: BackgroundTasks, db: Session, job: models.BackgroundJob) -> None:
+    """Ejecuta `job` en este proceso apenas se envía el response (ya commiteado)."""
+    background_tasks.add_task(ejecutar_por_id, db.get_bind(), job.id)
+
+
+def backoff(intentos: int) -> timedelta:
+    """Espera antes del reintento número `intentos` + 1: base * 2^(intentos - 1), acotada."""
+    return timedelta(seconds=min(config.JOB_BACKOFF_SECONDS * 2 ** max(intentos - 1, 0), BACKOFF_MAX_SEG))
+
+
+def _liberar_vencidos(db: Session) -> None:
+    """
+    Devuelve a la cola los trabajos 'running' de workers que no terminaron (caídos). Los
+    que ya agotaron sus intentos quedan 'failed': un trabajo que tira abajo al worker no
+    se reintenta para siempre.
+    """
+    tabla = models.BackgroundJob.__table__
+    vencidos = and_(
+        tabla.c.status == "running",
+        tabla.c.locked_at < datetime.now() - timedelta(seconds=config.JOB_LOCK_TIMEOUT_SECONDS),
+    )
+    db.execute(
+        update(tabla)
+        .where(vencidos, tabla.c.attempts >= tabla.c.max_attempts)
+        .values(status="failed", locked_by=None, locked_at=None, finished_at=datetime.now(),
+                last_error="El worker no terminó el trabajo (abandonado)")
+    )
+    db.execute(
+        update(tabla)
+        .where(vencidos)
+        .values(status="pending", locked_by=None, locked_at=None)
+    )
+
+
+def _tomar(db: Session, ids: list[int], worker: str) -> list[int]:
+    """Marca como 'running' los `ids` que sigan pendientes y retorna los tomados."""
+    if not ids:
+        return []
+    tabla = models.BackgroundJob.__table__
+    tomados = db.execute(
+        update(tabla)
+        .where(tabla.c.id.in_(ids), tabla.c.status == "pending")
+        .values(status="running", locked_by=worker, locked_at=datetime.now(), attempts=tabla.c.attempts + 1)
+        .returning(tabla.c.id)
+    ).scalars().all()
+    db.commit()
+    return sorted(tomados)
+
+
+def reclamar(db: Session, worker: str = WORKER_ID, limite: int = TAMANIO_LOTE) -> list[int]:
+    """
+    Toma hasta `limite` trabajos vencidos (run_at <= ahora) para `worker`, en orden.
+    En Postgres los que otro worker está tomando se saltean (SKIP LOCKED) en vez de esperar.
+    """
+    _liberar_vencidos(db)
+    filas = db.query(models.BackgroundJob.id).filter(
+        models.BackgroundJob.status == "pending",
+        models.BackgroundJob.run_at <= datetime.now(),
+    ).order_by(
+        models.BackgroundJob.run_at, models.BackgroundJob.id,
+    ).limit(limite).with_for_update(skip_locked=True).all()
+    return _tomar(db, [job_id for job_id, in filas], worker)
+
+
+def _ejecutar(db: Session, job_id: int) -> models.BackgroundJob:
+    """Corre el handler de un trabajo ya tomado y registra el resultado o el reintento."""
+    job = db.get(models.BackgroundJob, job_id)
+    try:
+        handler = TAREAS.get(job.kind)
+        if handler is None:
+            raise LookupError(f"Tarea no registrada: {job.kind}")
+        resultado = handler(db, dict(job.payload))
+        if inspect.isawaitable(resultado):
+            _loop().run_until_complete(resultado)
+        job.status = "done"
+        job.last_error = None
+        job.finished_at = datetime.now()
+    except Exception as e:
+        db.rollback()
+        job.last_error = str(e)
+        if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            job.finished_at = datetime.now()
+        else:
+            job.status = "pending"
+            job.run_at = datetime.now() + backoff(job.attempts)
+        logger.error(json.dumps({
+            "msg": "error_en_trabajo", "kind": job.kind, "job_id": job.id,
+            "intento": job.attempts, "status": job.status, "error": str(e),
+        }))
+    job.locked_by = None
+    job.locked_at = None
+    db.commit()
+    return job
+
+
+def procesar_pendientes(db: Session, worker: str = WORKER_ID, limite: int = TAMANIO_LOTE) -> int:
+    """Toma y ejecuta un lote de trabajos. Retorna cuántos se ejecutaron."""
+    ids = reclamar(db, worker, limite)
+    for job_id in ids:
+        _ejecutar(db, job_id)
+    return len(ids)
+
+
+def ejecutar_por_id(bind, job_id: int, worker: str = WORKER_ID) -> None:
+    """
+    Ejecuta un trabajo puntual si sigue pendiente (lo usa `despachar`). Abre su propia
+    sesión sobre `bind`, porque la del request ya se cerró. Si un worker ya lo tomó, no
+    hace nada.
+    """
+    db = Session(bind=bind)
+    try:
+        if _tomar(db, [job_id], worker):
+            _ejecutar(db, job_id)
+    finally:
+        db.close()
+
+
+def correr_worker(detener: threading.Event, worker: str = WORKER_ID, poll_seg: Optional[float] = None) -> None:
+    """Loop del worker: procesa lotes mientras haya trabajo y espera `poll_seg` si no hay."""
+    poll_seg = config.JOB_POLL_SECONDS if poll_seg is None else poll_seg
+    logger.info(json.dumps({"msg": "worker_iniciado", "worker": worker}))
+    while not detener.is_set():
+        db = SessionLocal()
+        try:
+            procesados = procesar_pendientes(db, worker)
+        except Exception as e:
+            procesados = 0
+            logger.error(json.dumps({"msg": "error_en_worker", "worker": worker, "error": str(e)}))
+        finally:
+            db.close()
+        if not procesados:
+            detener.wait(poll_seg)
+    logger.info(json.dumps({"msg": "worker_detenido", "worker": worker}))
+
+
+def iniciar_worker_en_proceso() -> tuple[threading.Thread, threading.Event]:
+    """Arranca el worker en un hilo de este proceso (junto a la API)."""
+    detener = threading.Event()
+    hilo = threading.Thread(target=correr_worker, args=(detener,), name="job-worker", daemon=True)
+    hilo.start()
+    return hilo, detener
+
+
+def detener_worker(hilo: threading.Thread, detener: threading.Event) -> None:
+    """Pide al worker que termine y espera el trabajo en curso."""
+    detener.set()
+    hilo.join(timeout=config.JOB_POLL_SECONDS + 30)
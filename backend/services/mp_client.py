@@ -0,0 +1,214 @@
+"""
+Cliente async de la API de Mercado Pago sobre un httpx.AsyncClient compartido.
+
+Reutiliza conexiones (keep-alive) entre requests en vez de armar un SDK por llamada,
+con timeouts explícitos, reintentos con backoff y jitter ante errores transitorios
+(red, 429, 5xx) y un circuit breaker por operación: si MP falla seguido, las llamadas
+fallan al instante durante MP_BREAKER_RESET_SECONDS en vez de esperar cada timeout.
+
+MP_API_URL permite apuntarlo al stand-in local (mp_fake.py) para tests y pruebas de
+carga sin red.
+"""
+import asyncio
+import random
+import time
+import uuid
+import weakref
+from typing import Optional
+
+import httpx
+
+import config
+
+# Operaciones con circuit breaker propio
+OP_PREFERENCIA = "crear_preferencia"
+OP_PAGO = "obtener_pago"
+OP_BUSQUEDA = "buscar_pagos"
+
+BACKOFF_BASE_SEG = 0.2
+_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class MPError(Exception):
+    """Error de la API de Mercado Pago. `status` es None si no hubo respuesta HTTP."""
+
+    def __init__(self, mensaje: str, status: Optional[int] = None):
+        super().__init__(mensaje)
+        self.status = status
+
+
+class MPNoDisponible(MPError):
+    """El circuit breaker de la operación está abierto: no se llama a MP."""
+
+
+class CircuitBreaker:
+    """
+    Se abre tras `umbral` fallos seguidos y rechaza llamadas durante `reset_seg`. Después
+    deja pasar una sola llamada de prueba (half-open): si sale bien se cierra, si falla
+    se vuelve a abrir.
+    """
+
+    def __init__(self, umbral: int, reset_seg: float):
+        self.umbral = umbral
+        self.reset_seg = reset_seg
+        self.fallos = 0
+        self.abierto_hasta = 0.0
+        self._probando = False
+
+    @property
+    def abierto(self) -> bool:
+        return self.fallos >= self.umbral
+
+    def permitir(self) -> bool:
+        if not self.abierto:
+            return True
+        if time.monotonic() < self.abierto_hasta or self._probando:
+            return False
+        self._probando = True
+        return True
+
+    def exito(self) -> None:
+        self.fallos = 0
+        self._probando = False
+
+    def fallo(self) -> None:
+        self.fallos += 1
+        self._probando = False
+        if self.abierto:
+            self.abierto_hasta = time.monotonic() + self.reset_seg
+
+    def liberar(self) -> None:
+        """La llamada terminó sin resultado (cancelada): la próxima puede hacer la prueba."""
+        self._probando = False
+
+
+class MPClient:
+    def __init__(
+        self,
+        access_token: str,
+        base_url: str = "https://api.mercadopago.com",
+        timeout_seg: float = 10.0,
+        max_reintentos: int = 2,
+        breaker_umbral: int = 5,
+        breaker_reset_seg: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.access_token = access_token
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout_seg, connect=min(timeout_seg, 3.0))
+        self.max_reintentos = max_reintentos
+        self.transport = transport
+        self.breakers = {
+            op: CircuitBreaker(breaker_umbral, breaker_reset_seg)
+            for op in (OP_PREFERENCIA, OP_PAGO, OP_BUSQUEDA)
+        }
+        # Un AsyncClient por event loop: sus conexiones pertenecen al loop que las abrió
+        self._clientes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        cliente = self._clientes.get(loop)
+        if cliente is None or cliente.is_closed:
+            cliente = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.access_token}"},
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+                transport=self.transport,
+            )
+            self._clientes[loop] = cliente
+        return cliente
+
+    async def cerrar(self) -> None:
+        """Cierra el AsyncClient del loop actual (al apagar la app)."""
+        cliente = self._clientes.pop(asyncio.get_running_loop(), None)
+        if cliente is not None:
+            await cliente.aclose()
+
+    async def _request(self, op: str, method: str, path: str, **kwargs) -> dict:
+        breaker = self.breakers[op]
+        if not breaker.permitir():
+            raise MPNoDisponible(f"Mercado Pago no disponible ({op}): circuito abierto")
+
+        # Toda salida registra el resultado en el breaker: si no, una prueba half-open que
+        # termina por otra vía deja _probando en True y el circuito no se cierra nunca
+        registrado = False
+        try:
+            error = None
+            for intento in range(self.max_reintentos + 1):
+                if intento:
+                    # Backoff exponencial con full jitter
+                    await asyncio.sleep(random.uniform(0, BACKOFF_BASE_SEG * 2 ** (intento - 1)))
+                try:
+                    response = await self._http().request(method, path, **kwargs)
+                except httpx.TransportError as e:
+                    error = MPError(f"Error de conexión con Mercado Pago: {e!r}")
+                    continue
+                if response.status_code in _REINTENTABLES:
+                    error = MPError(f"Mercado Pago respondió {response.status_code}", response.status_code)
+                    continue
+                breaker.exito()
+                registrado = True
+                if response.is_error:
+                    # 4xx: error del pedido, reintentar no ayuda (y MP está sano)
+                    raise MPError(f"Mercado Pago respondió {response.status_code}: {response.text}", response.status_code)
+                return response.json()
+
+            breaker.fallo()
+            registrado = True
+            raise error
+        except asyncio.CancelledError:
+            # Cancelada por quien llama (cliente desconectado, timeout): no dice nada de MP
+            if not registrado:
+                breaker.liberar()
+                registrado = True
+            raise
+        finally:
+            if not registrado:
+                # Otro error inesperado (httpx fuera de TransportError, etc.)
+                breaker.fallo()
+
+    async def crear_preferencia(self, preferencia: dict) -> dict:
+        # La misma clave en todos los reintentos: MP no crea dos preferencias
+        headers = {"X-Idempotency-Key": uuid.uuid4().hex}
+        return await self._request(OP_PREFERENCIA, "POST", "/checkout/preferences", json=preferencia, headers=headers)
+
+    async def obtener_pago(self, mp_payment_id: str) -> dict:
+        return await self._request(OP_PAGO, "GET", f"/v1/payments/{mp_payment_id}")
+
+    async def buscar_pagos(self, **filtros) -> list[dict]:
+        """Pagos que cumplen los filtros (ej: external_reference), el más reciente primero."""
+        params = {"sort": "date_created", "criteria": "desc", **filtros}
+        respuesta = await self._request(OP_BUSQUEDA, "GET", "/v1/payments/search", params=params)
+        return respuesta.get("results", [])
+
+
+_cliente: Optional[MPClient] = None
+
+
+def get_mp_client() -> MPClient:
+    """Cliente compartido del proceso. Falla si falta MP_ACCESS_TOKEN."""
+    global _cliente
+    if not config.MP_ACCESS_TOKEN:
+        raise MPError("Mercado Pago no está configurado. Falta MP_ACCESS_TOKEN.")
+    if _cliente is None:
+        _cliente = MPClient(
+            access_token=config.MP_ACCESS_TOKEN,
+            base_url=config.MP_API_URL,
+            timeout_seg=config.MP_TIMEOUT_SECONDS,
+            max_reintentos=config.MP_MAX_RETRIES,
+            breaker_umbral=config.MP_BREAKER_FAILURES,
+            breaker_reset_seg=config.MP_BREAKER_RESET_SECONDS,
+        )
+    return _cliente
+
+
+def configurar(cliente: Optional[MPClient]) -> None:
+    """Reemplaza el cliente compartido (tests, benchmarks). None vuelve al de config."""
+    global _cliente
+    _cliente = cliente
+
+
+async def cerrar() -> None:
+    if _cliente is not None:
+        await _cliente.cerrar()
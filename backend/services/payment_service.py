@@ -0,0 +1,170 @@
+"""Servicio de pagos Mercado Pago: aplicación de pagos de MP a los Payment locales y reconciliación."""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+import config
+import models
+from services import eventos
+from services.mp_client import MPError, get_mp_client
+
+logger = logging.getLogger("finanzaapp")
+
+# Payments pendientes leídos por página en la reconciliación (un UPDATE y un commit por página)
+TAMANIO_PAGINA = 200
+# Estados de MP que todavía pueden cambiar (se siguen reconciliando) y estados finales
+ESTADOS_NO_FINALES = ("pending", "in_process", "authorized")
+ESTADOS_FINALES = ("approved", "rejected", "cancelled", "refunded")
+
+
+def _publicar_pago(user_id: int, payment_id: int, group_id: int, estado: str, anterior: str) -> None:
+    eventos.publicar(user_id, "pago", payment_id=payment_id, group_id=group_id, status=estado)
+    # Solo los pagos aprobados cuentan en los saldos
+    if "approved" in (estado, anterior):
+        eventos.publicar(user_id, "saldos", group_id=group_id)
+
+
+def actualizar_desde_mp(db: Session, mp_payment: dict) -> None:
+    """
+    Aplica un pago de Mercado Pago (respuesta de /v1/payments) al Payment local al que
+    apunta su external_reference ("payment_<id>"); referencias ajenas o pagos inexistentes
+    se ignoran. Es idempotente: si el Payment ya tiene ese pago y estado no se escribe nada.
+    """
+    external_reference = mp_payment.get("external_reference") or ""
+    if not external_reference.startswith("payment_"):
+        return
+    try:
+        local_payment_id = int(external_reference.split("_")[1])
+    except (IndexError, ValueError):
+        return
+
+    db_payment = db.query(models.Payment).filter(
+        models.Payment.id == local_payment_id,
+    ).first()
+    if not db_payment:
+        return
+
+    mp_payment_id = str(mp_payment["id"])
+    estado = mp_payment.get("status", "")
+    if db_payment.mp_payment_id == mp_payment_id and db_payment.status == estado:
+        return
+    anterior = db_payment.status
+    db_payment.mp_payment_id = mp_payment_id
+    db_payment.status = estado
+    db_payment.updated_at = datetime.now()
+    db.commit()
+    if db_payment.group is not None and estado != anterior:
+        _publicar_pago(db_payment.group.creator_id, db_payment.id, db_payment.group_id, estado, anterior)
+
+
+async def _buscar_ultimos(payment_ids: list[int], concurrencia: int) -> tuple[dict[int, dict], int]:
+    """Pago más reciente en MP de cada Payment, con a lo sumo `concurrencia` búsquedas a la vez."""
+    cliente = get_mp_client()
+    semaforo = asyncio.Semaphore(concurrencia)
+    encontrados, errores = {}, 0
+
+    async def buscar(payment_id: int) -> None:
+        nonlocal errores
+        async with semaforo:
+            try:
+                resultados = await cliente.buscar_pagos(external_reference=f"payment_{payment_id}")
+            except MPError:
+                errores += 1
+                return
+        if resultados:
+            encontrados[payment_id] = resultados[0]
+
+    try:
+        await asyncio.gather(*(buscar(payment_id) for payment_id in payment_ids))
+    finally:
+        # El loop es de esta corrida: se cierran sus conexiones
+        await cliente.cerrar()
+    return encontrados, errores
+
+
+def _publicar_resueltos(db: Session, cambios: list[dict], anteriores: dict[int, str]) -> None:
+    """Publica los pagos que llegaron a un estado final al creador de su grupo."""
+    estados = {cambio["id"]: cambio["status"] for cambio in cambios if cambio["status"] in ESTADOS_FINALES}
+    if not estados:
+        return
+    filas = db.query(models.Payment.id, models.Payment.group_id, models.SplitGroup.creator_id).join(
+        models.SplitGroup, models.SplitGroup.id == models.Payment.group_id,
+    ).filter(models.Payment.id.in_(list(estados))).all()
+    for payment_id, group_id, creator_id in filas:
+        _publicar_pago(creator_id, payment_id, group_id, estados[payment_id], anteriores[payment_id])
+
+
+def reconciliar_pendientes(
+    db: Session,
+    antiguedad_min: Optional[float] = None,
+    concurrencia: Optional[int] = None,
+) -> int:
+    """
+    Busca en Mercado Pago los Payment sin estado final (pending, in_process, authorized;
+    con preferencia) creados hace más de
+    `antiguedad_min` minutos y menos de PAYMENT_RECONCILE_MAX_AGE_HOURS, para los que
+    nunca llegó el webhook. Lee por páginas de TAMANIO_PAGINA (keyset por id), consulta
+    MP con `concurrencia` búsquedas simultáneas y aplica los cambios con un UPDATE en
+    bloque y un commit por página. Los que siguen sin estado final quedan para la próxima
+    corrida. Retorna los pagos resueltos (que llegaron a un estado final) y loguea las
+    estadísticas de la corrida.
+    """
+    antiguedad_min = config.PAYMENT_RECONCILE_MIN_AGE_MINUTES if antiguedad_min is None else antiguedad_min
+    concurrencia = concurrencia or config.PAYMENT_RECONCILE_CONCURRENCY
+    ahora = datetime.now()
+    filtros = [
+        models.Payment.status.in_(ESTADOS_NO_FINALES),
+        models.Payment.mp_preference_id.isnot(None),
+        models.Payment.created_at <= ahora - timedelta(minutes=antiguedad_min),
+        models.Payment.created_at >= ahora - timedelta(hours=config.PAYMENT_RECONCILE_MAX_AGE_HOURS),
+    ]
+
+    inicio = time.perf_counter()
+    revisados = actualizados = resueltos = errores = 0
+    ultimo_id = 0
+    while True:
+        pagina = db.query(models.Payment.id, models.Payment.mp_payment_id, models.Payment.status).filter(
+            models.Payment.id > ultimo_id, *filtros,
+        ).order_by(models.Payment.id).limit(TAMANIO_PAGINA).all()
+        if not pagina:
+            break
+
+        encontrados, errores_pagina = asyncio.run(_buscar_ultimos([fila.id for fila in pagina], concurrencia))
+        errores += errores_pagina
+        cambios = [
+            {
+                "id": fila.id,
+                "mp_payment_id": str(encontrados[fila.id]["id"]),
+                "status": encontrados[fila.id].get("status", ""),
+                "updated_at": ahora,
+            }
+            for fila in pagina
+            if fila.id in encontrados and (
+                encontrados[fila.id].get("status") != fila.status
+                or str(encontrados[fila.id]["id"]) != fila.mp_payment_id
+            )
+        ]
+        if cambios:
+            db.execute(update(models.Payment), cambios)
+            db.commit()
+            _publicar_resueltos(db, cambios, {fila.id: fila.status for fila in pagina})
+
+        revisados += len(pagina)
+        actualizados += len(cambios)
+        resueltos += sum(cambio["status"] in ESTADOS_FINALES for cambio in cambios)
+        ultimo_id = pagina[-1].id
+        if len(pagina) < TAMANIO_PAGINA:
+            break
+
+    logger.info(json.dumps({
+        "msg": "reconciliacion_pagos", "revisados": revisados, "actualizados": actualizados,
+        "resueltos": resueltos, "errores_mp": errores,
+        "duration_ms": int((time.perf_counter() - inicio) * 1000),
+    }))
+    return resueltos
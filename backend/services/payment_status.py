@@ -0,0 +1,136 @@
+"""
+Consulta cacheada del estado de pagos pendientes en Mercado Pago (GET /payments/{id}/status).
+
+La PWA consulta el estado en loop mientras el usuario está en la página de retorno del
+checkout. El estado vigente es siempre el de la DB (lo actualizan también el webhook y
+la reconciliación); este módulo solo decide cuándo vale la pena buscar en MP:
+
+- TTL corto por pago: dentro de PAYMENT_STATUS_TTL_SECONDS no se vuelve a consultar.
+- Single-flight: pedidos concurrentes del mismo pago comparten una sola búsqueda.
+- Tope de PAYMENT_STATUS_MAX_LOOKUPS_PER_MINUTE búsquedas por pago por minuto.
+- La primera búsqueda se espera; las siguientes corren en segundo plano y mientras
+  tanto se responde el estado que ya tiene la DB (stale-while-revalidate).
+
+El estado es por proceso y vive en el event loop de la API (no necesita locks).
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import BackgroundTasks
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import config
+from services.mp_client import MPError, get_mp_client
+from services.payment_service import actualizar_desde_mp
+
+logger = logging.getLogger("finanzaapp")
+
+# Pagos pendientes recordados por proceso (LRU)
+MAX_ENTRADAS = 10000
+
+
+@dataclass
+class _Entrada:
+    consultado_en: float = 0.0  # time.monotonic() de la última búsqueda iniciada
+    llamadas: deque = field(default_factory=deque)  # Búsquedas del último minuto
+    en_curso: Optional[asyncio.Task] = None
+    listo: bool = False  # Ya terminó al menos una búsqueda
+
+
+_entradas: "OrderedDict[int, _Entrada]" = OrderedDict()
+
+
+def _entrada(payment_id: int) -> _Entrada:
+    entrada = _entradas.get(payment_id)
+    if entrada is None:
+        entrada = _entradas[payment_id] = _Entrada()
+        if len(_entradas) > MAX_ENTRADAS:
+            _entradas.popitem(last=False)
+    else:
+        _entradas.move_to_end(payment_id)
+    return entrada
+
+
+def olvidar(payment_id: int) -> None:
+    """Descarta el pago (llegó a un estado final)."""
+    _entradas.pop(payment_id, None)
+
+
+def limpiar() -> None:
+    _entradas.clear()
+
+
+def _puede_consultar(entrada: _Entrada, ahora: float) -> bool:
+    while entrada.llamadas and entrada.llamadas[0] <= ahora - 60:
+        entrada.llamadas.popleft()
+    return len(entrada.llamadas) < config.PAYMENT_STATUS_MAX_LOOKUPS_PER_MINUTE
+
+
+def _aplicar(bind, mp_payment: dict) -> None:
+    db = Session(bind=bind)
+    try:
+        actualizar_desde_mp(db, mp_payment)
+    finally:
+        db.close()
+
+
+async def _consultar(bind, payment_id: int) -> None:
+    """Busca el pago en MP y aplica el más reciente. Los errores de MP solo se loguean."""
+    try:
+        resultados = await get_mp_client().buscar_pagos(external_reference=f"payment_{payment_id}")
+    except MPError as e:
+        logger.warning(json.dumps({"msg": "error_consultando_pago", "payment_id": payment_id, "error": str(e)}))
+        return
+    if resultados:
+        await run_in_threadpool(_aplicar, bind, resultados[0])
+
+
+def _iniciar(entrada: _Entrada, bind, payment_id: int, ahora: float) -> asyncio.Task:
+    entrada.consultado_en = ahora
+    entrada.llamadas.append(ahora)
+    tarea = entrada.en_curso = asyncio.ensure_future(_consultar(bind, payment_id))
+
+    def terminar(_):
+        entrada.en_curso = None
+        entrada.listo = True
+
+    tarea.add_done_callback(terminar)
+    return tarea
+
+
+async def _esperar(tarea: asyncio.Task) -> None:
+    await tarea
+
+
+async def refrescar(bind, payment_id: int, background_tasks: BackgroundTasks) -> bool:
+    """
+    Busca en MP el estado del pago pendiente si corresponde (ver docstring del módulo).
+    `bind` es el de la sesión del request: la búsqueda escribe con su propia sesión.
+    Retorna True si esperó una búsqueda (la DB pudo cambiar y conviene releer el pago).
+    """
+    entrada = _entrada(payment_id)
+    if entrada.en_curso is not None:
+        if entrada.listo:
+            return False
+        await asyncio.shield(entrada.en_curso)
+        return True
+
+    ahora = time.monotonic()
+    if entrada.listo and ahora - entrada.consultado_en < config.PAYMENT_STATUS_TTL_SECONDS:
+        return False
+    if not _puede_consultar(entrada, ahora):
+        return False
+
+    tarea = _iniciar(entrada, bind, payment_id, ahora)
+    if entrada.listo:
+        # Se responde lo que hay; la búsqueda termina después del response
+        background_tasks.add_task(_esperar, tarea)
+        return False
+    await asyncio.shield(tarea)
+    return True
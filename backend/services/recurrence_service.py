@@ -0,0 +1,60 @@
+"""Servicio de reglas de recurrencia de gastos fijos.
+
+Una regla es (frecuencia, intervalo, dia_mes):
+- weekly / biweekly: cada `intervalo` semanas (o quincenas) desde la ocurrencia anterior.
+- monthly: cada `intervalo` meses, el día `dia_mes` (por defecto el 1).
+- yearly: cada `intervalo` años, mismo mes y día `dia_mes` (por defecto el de la ocurrencia).
+Si `dia_mes` no existe en el mes (ej: 31 en febrero) se usa el último día del mes.
+"""
+import calendar
+from datetime import datetime, timedelta
+from typing import Optional
+
+FRECUENCIAS = ("weekly", "biweekly", "monthly", "yearly")
+FRECUENCIA_DEFAULT = "monthly"
+
+_DIAS_POR_SEMANA = {"weekly": 7, "biweekly": 14}
+
+
+def _fecha_en_mes(anio: int, mes: int, dia: int) -> datetime:
+    return datetime(anio, mes, min(dia, calendar.monthrange(anio, mes)[1]))
+
+
+def _sumar_meses(fecha: datetime, meses: int, dia: int) -> datetime:
+    anio, mes = divmod(fecha.year * 12 + fecha.month - 1 + meses, 12)
+    return _fecha_en_mes(anio, mes + 1, dia)
+
+
+def siguiente_ocurrencia(
+    fecha: datetime,
+    frecuencia: str = FRECUENCIA_DEFAULT,
+    intervalo: int = 1,
+    dia_mes: Optional[int] = None,
+) -> datetime:
+    """Primera ocurrencia de la regla posterior al período de `fecha` (a las 00:00)."""
+    inicio_dia = datetime(fecha.year, fecha.month, fecha.day)
+    if frecuencia in _DIAS_POR_SEMANA:
+        return inicio_dia + timedelta(days=_DIAS_POR_SEMANA[frecuencia] * intervalo)
+    if frecuencia == "yearly":
+        return _sumar_meses(inicio_dia, 12 * intervalo, dia_mes or fecha.day)
+    return _sumar_meses(inicio_dia, intervalo, dia_mes or 1)
+
+
+def ultima_ocurrencia_vencida(
+    next_run_at: datetime,
+    ahora: datetime,
+    frecuencia: str = FRECUENCIA_DEFAULT,
+    intervalo: int = 1,
+    dia_mes: Optional[int] = None,
+) -> tuple[datetime, datetime]:
+    """
+    Para un template vencido (next_run_at <= ahora) retorna (ocurrencia, siguiente):
+    la ocurrencia más reciente que no supera `ahora` y la próxima después de ella.
+    Las ocurrencias intermedias se saltean (las completa el backfill).
+    """
+    ocurrencia = next_run_at
+    siguiente = siguiente_ocurrencia(ocurrencia, frecuencia, intervalo, dia_mes)
+    while siguiente <= ahora:
+        ocurrencia = siguiente
+        siguiente = siguiente_ocurrencia(ocurrencia, frecuencia, intervalo, dia_mes)
+    return ocurrencia, siguiente
@@ -1,80 +1,413 @@
 """Servicio de scheduler para gastos fijos recurrentes."""
 import json
 import logging
+import os
+import socket
+import time
+import uuid
 from datetime import datetime, timedelta
+from typing import Optional
 
-from sqlalchemy import func
+from sqlalchemy import case, delete, func, insert, or_, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+import config
 import models
-from database import get_db
+from database import SessionLocal
+from encryption import encrypt_many, plain_table
+from services.gasto_fijo_service import registrar_instancias
+from services.payment_service import reconciliar_pendientes
+from services.recurrence_service import siguiente_ocurrencia, ultima_ocurrencia_vencida
 
 logger = logging.getLogger("finanzaapp")
 
+# Templates procesados por lote (un INSERT y un commit por lote)
+TAMANIO_LOTE = 500
+NOTA_AUTO_GENERADO = "Generado automáticamente"
+# Meses hacia atrás que cubre el backfill por defecto
+MAX_MESES_BACKFILL = 24
 
-def ejecutar_generacion_mensual(db: Session) -> int:
+# Lease del scheduler: duración y período de renovación del líder
+LEASE_SCHEDULER = "scheduler"
+LEASE_SEG = 60
+LEASE_RENOVACION_SEG = 20
+# Jobs de generación por usuario (POST /gastos-fijos/generar-mes)
+JOB_GENERACION_USUARIO = "generacion_usuario"
+ESTADOS_ACTIVOS = ("pending", "running")
+JOB_ABANDONADO_SEG = 600
+# Identidad de este proceso como candidato a líder
+INSTANCIA_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _inicio_mes(fecha: datetime) -> datetime:
+    return fecha.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _restar_meses(inicio: datetime, meses: int) -> datetime:
+    anio, mes = divmod(inicio.year * 12 + inicio.month - 1 - meses, 12)
+    return inicio.replace(year=anio, month=mes + 1)
+
+
+def _insertar_instancias(db: Session, instancias: list, ahora: datetime) -> int:
+    """
+    Inserta movimientos auto-generados con un solo INSERT vía Core y actualiza las
+    stats de sus templates en bloque.
+    `instancias` son tuplas (gasto_fijo_id, user_id, descripcion, categoria_id,
+    user_category_id, importe, fecha); descripción y nota se encriptan en bloque.
+
+    El cron, el catch-up y los backfill / generación por usuario no comparten lock: una
+    ocurrencia que otro proceso ya insertó choca con el índice único parcial
+    (gasto_fijo_id, fecha) y se saltea. Retorna las filas insertadas.
+    """
+    tabla = plain_table(models.Movimiento.__table__)
+    insert_dialecto = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    sentencia = insert_dialecto(tabla).on_conflict_do_nothing(
+        index_elements=["gasto_fijo_id", "fecha"], index_where=text("is_auto_generated"),
+    ).returning(tabla.c.gasto_fijo_id, tabla.c.importe, tabla.c.fecha)
+
+    descripciones = encrypt_many([inst[2] for inst in instancias])
+    notas = encrypt_many([NOTA_AUTO_GENERADO] * len(instancias))
+    insertadas = db.execute(sentencia, [
+        {
+            "importe": importe,
+            "fecha": fecha,
+            "descripcion": descripcion,
+            "nota": nota,
+            "tipo": "gasto",
+            "categoria_id": categoria_id,
+            "user_category_id": user_category_id,
+            "user_id": user_id,
+            "gasto_fijo_id": gf_id,
+            "is_auto_generated": True,
+            "created_at": ahora,
+            "updated_at": ahora,
+        }
+        for (gf_id, user_id, _, categoria_id, user_category_id, importe, fecha), descripcion, nota
+        in zip(instancias, descripciones, notas)
+    ]).all()
+    registrar_instancias(db, insertadas)
+    return len(insertadas)
+
+
+def _query_templates(db: Session, *filtros):
+    """
+    Templates activos con historial, con su max(importe), la fecha de su última instancia
+    y su regla. Las stats son columnas de gastos_fijos: no se leen movimientos.
+    """
+    return db.query(
+        models.GastoFijo.id,
+        models.GastoFijo.user_id,
+        models.GastoFijo.descripcion,
+        models.GastoFijo.categoria_id,
+        models.GastoFijo.user_category_id,
+        models.GastoFijo.max_importe,
+        models.GastoFijo.ultima_fecha,
+        models.GastoFijo.frecuencia,
+        models.GastoFijo.intervalo,
+        models.GastoFijo.dia_mes,
+        models.GastoFijo.next_run_at,
+    ).filter(
+        models.GastoFijo.activo == True,
+        models.GastoFijo.max_importe.isnot(None),
+        *filtros,
+    ).order_by(models.GastoFijo.id)
+
+
+def ejecutar_generacion(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Genera los movimientos automáticos de los gastos fijos activos vencidos
+    (next_run_at <= ahora), usando el índice (activo, next_run_at): el costo depende de
+    los templates vencidos y no del tamaño de la tabla, por eso puede correr cada hora.
+
+    Por template se genera la ocurrencia vencida más reciente con su max(importe) y se
+    avanza next_run_at a la siguiente según su regla. Es idempotente: una ocurrencia que
+    ya tiene movimiento con esa fecha no se vuelve a crear.
+
+    Trabaja por lotes de TAMANIO_LOTE templates: una consulta agrupada, encriptación en
+    bloque, un INSERT vía Core, un UPDATE en bloque de next_run_at y un commit por lote.
+    Con `user_id` se limita a los templates del usuario. Retorna los movimientos creados.
+    """
+    ahora = datetime.now()
+    filtros = [models.GastoFijo.next_run_at <= ahora]
+    if user_id is not None:
+        filtros.append(models.GastoFijo.user_id == user_id)
+
+    creados = 0
+    ultimo_id = 0
+    while True:
+        lote = _query_templates(
+            db, models.GastoFijo.id > ultimo_id, *filtros,
+        ).limit(TAMANIO_LOTE).all()
+        if not lote:
+            break
+
+        ocurrencias = {
+            fila.id: ultima_ocurrencia_vencida(
+                fila.next_run_at, ahora, fila.frecuencia, fila.intervalo, fila.dia_mes,
+            )
+            for fila in lote
+        }
+        existentes = set(db.query(models.Movimiento.gasto_fijo_id, models.Movimiento.fecha).filter(
+            models.Movimiento.gasto_fijo_id.in_(ocurrencias),
+            models.Movimiento.fecha.in_({ocurrencia for ocurrencia, _ in ocurrencias.values()}),
+        ))
+        instancias = [
+            (*fila[:6], ocurrencias[fila.id][0]) for fila in lote
+            if (fila.id, ocurrencias[fila.id][0]) not in existentes
+        ]
+
+        if instancias:
+            creados += _insertar_instancias(db, instancias, ahora)
+        db.execute(update(models.GastoFijo), [
+            {"id": gf_id, "next_run_at": siguiente} for gf_id, (_, siguiente) in ocurrencias.items()
+        ])
+        db.commit()
+
+        ultimo_id = lote[-1].id
+        if len(lote) < TAMANIO_LOTE:
+            break
+
+    return creados
+
+
+def ejecutar_backfill(
+    db: Session,
+    user_id: Optional[int] = None,
+    meses_max: int = MAX_MESES_BACKFILL,
+) -> int:
     """
-    Genera los movimientos automáticos del mes actual para todos los gastos fijos activos.
-    Es idempotente: no crea duplicados si ya existe un movimiento del gasto fijo para el mes.
-    Retorna la cantidad de movimientos creados.
+    Genera todas las ocurrencias faltantes entre la última instancia de cada gasto fijo
+    activo y ahora, según su regla, mirando como máximo `meses_max` meses hacia atrás.
+    Útil si el servicio estuvo caído en un cambio de período o si se reactivó un template.
+
+    Es idempotente (solo genera ocurrencias posteriores a la última instancia) y trabaja en
+    lotes acotados: TAMANIO_LOTE templates por consulta y TAMANIO_LOTE filas por INSERT,
+    con commit por lote de templates. Deja next_run_at en la primera ocurrencia futura.
+    Con `user_id` se limita a los templates del usuario. Retorna los movimientos creados.
     """
     ahora = datetime.now()
-    inicio_mes = ahora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    fin_mes = (inicio_mes + timedelta(days=32)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    primer_mes = _restar_meses(_inicio_mes(ahora), meses_max - 1)
 
-    gastos_fijos = db.query(models.GastoFijo).filter(models.GastoFijo.activo == True).all()
+    filtros = [models.GastoFijo.user_id == user_id] if user_id is not None else []
 
     creados = 0
-    for gf in gastos_fijos:
-        ya_existe = db.query(models.Movimiento).filter(
-            models.Movimiento.gasto_fijo_id == gf.id,
-            models.Movimiento.fecha >= inicio_mes,
-            models.Movimiento.fecha < fin_mes
-        ).first()
-        if ya_existe:
-            continue
-
-        max_importe = db.query(func.max(models.Movimiento.importe)).filter(
-            models.Movimiento.gasto_fijo_id == gf.id
-        ).scalar()
-        if max_importe is None:
-            continue
-
-        nuevo = models.Movimiento(
-            importe=max_importe,
-            fecha=inicio_mes,
-            descripcion=gf.descripcion,
-            nota="Generado automáticamente",
-            tipo="gasto",
-            categoria_id=gf.categoria_id,
-            user_category_id=gf.user_category_id,
-            user_id=gf.user_id,
-            gasto_fijo_id=gf.id,
-            is_auto_generated=True,
-        )
-        db.add(nuevo)
-        creados += 1
+    ultimo_id = 0
+    while True:
+        lote = _query_templates(
+            db, models.GastoFijo.id > ultimo_id, *filtros,
+        ).limit(TAMANIO_LOTE).all()
+        if not lote:
+            break
 
-    if creados:
+        instancias = []
+        proximas = []
+        for fila in lote:
+            regla = (fila.frecuencia, fila.intervalo, fila.dia_mes)
+            ocurrencia = siguiente_ocurrencia(fila.ultima_fecha, *regla)
+            while ocurrencia <= ahora:
+                if ocurrencia >= primer_mes:
+                    instancias.append((*fila[:6], ocurrencia))
+                ocurrencia = siguiente_ocurrencia(ocurrencia, *regla)
+            proximas.append({"id": fila.id, "next_run_at": ocurrencia})
+
+        for i in range(0, len(instancias), TAMANIO_LOTE):
+            creados += _insertar_instancias(db, instancias[i:i + TAMANIO_LOTE], ahora)
+        db.execute(update(models.GastoFijo), proximas)
         db.commit()
+
+        ultimo_id = lote[-1].id
+        if len(lote) < TAMANIO_LOTE:
+            break
+
     return creados
 
 
+def adquirir_lease(
+    db: Session,
+    nombre: str = LEASE_SCHEDULER,
+    holder: str = INSTANCIA_ID,
+    duracion_seg: int = LEASE_SEG,
+) -> bool:
+    """
+    Adquiere o renueva el lease `nombre` para `holder`. Retorna True si `holder` es el líder.
+
+    El UPDATE condicional (mismo holder o lease vencido) es atómico, así que entre
+    procesos concurrentes solo uno lo toma; si la fila no existe se crea, y un
+    conflicto de clave primaria significa que otro proceso ganó la carrera.
+    """
+    ahora = datetime.now()
+    tabla = models.SchedulerLease.__table__
+    resultado = db.execute(
+        update(tabla)
+        .where(tabla.c.name == nombre, or_(tabla.c.holder == holder, tabla.c.expires_at < ahora))
+        .values(
+            holder=holder,
+            expires_at=ahora + timedelta(seconds=duracion_seg),
+            acquired_at=case((tabla.c.holder == holder, tabla.c.acquired_at), else_=ahora),
+        )
+    )
+    if resultado.rowcount == 0:
+        try:
+            db.execute(insert(tabla).values(
+                name=nombre, holder=holder,
+                expires_at=ahora + timedelta(seconds=duracion_seg), acquired_at=ahora,
+            ))
+        except IntegrityError:
+            db.rollback()
+            return False
+    db.commit()
+    return True
+
+
+def liberar_lease(db: Session, nombre: str = LEASE_SCHEDULER, holder: str = INSTANCIA_ID) -> None:
+    """Libera el lease si lo tiene `holder` (al apagar el proceso), para no esperar su vencimiento."""
+    tabla = models.SchedulerLease.__table__
+    db.execute(delete(tabla).where(tabla.c.name == nombre, tabla.c.holder == holder))
+    db.commit()
+
+
+def _correr_job(db: Session, run: models.JobRun, funcion) -> models.JobRun:
+    """Ejecuta `funcion(db) -> filas creadas` y registra estado, duración y error en `run`."""
+    run.status = "running"
+    db.commit()
+
+    inicio = time.perf_counter()
+    try:
+        run.rows_created = funcion(db)
+        run.status = "success"
+    except Exception as e:
+        db.rollback()
+        run.status = "error"
+        run.error = str(e)
+        logger.error(json.dumps({"msg": "error_en_job", "job": run.job_name, "error": str(e)}))
+    run.finished_at = datetime.now()
+    run.duration_ms = int((time.perf_counter() - inicio) * 1000)
+    db.commit()
+
+    logger.info(json.dumps({
+        "msg": "job_ejecutado", "job": run.job_name, "user_id": run.user_id, "status": run.status,
+        "creados": run.rows_created, "duration_ms": run.duration_ms,
+    }))
+    return run
+
+
+def ejecutar_job(db: Session, nombre: str, funcion, holder: str = INSTANCIA_ID) -> Optional[models.JobRun]:
+    """
+    Ejecuta `funcion(db) -> filas creadas` solo si este proceso es el líder, y registra
+    la ejecución en job_runs (duración, filas creadas, error).
+    Retorna el JobRun, o None si otro proceso tiene el lease.
+    """
+    if not adquirir_lease(db, holder=holder):
+        logger.info(json.dumps({"msg": "job_omitido_no_lider", "job": nombre}))
+        return None
+
+    run = models.JobRun(job_name=nombre, holder=holder, status="running", started_at=datetime.now())
+    db.add(run)
+    return _correr_job(db, run, funcion)
+
+
+def _job_activo_usuario(db: Session, user_id: int) -> Optional[models.JobRun]:
+    return db.query(models.JobRun).filter(
+        models.JobRun.job_name == JOB_GENERACION_USUARIO,
+        models.JobRun.user_id == user_id,
+        models.JobRun.status.in_(ESTADOS_ACTIVOS),
+    ).first()
+
+
+def encolar_generacion_usuario(db: Session, user_id: int) -> tuple[models.JobRun, bool]:
+    """
+    Registra un job de generación para los gastos fijos de `user_id`, o retorna el que
+    ya está en curso (coalescing). El índice único parcial sobre los jobs activos
+    garantiza uno solo por usuario aun con pedidos concurrentes.
+    Un job activo más viejo que JOB_ABANDONADO_SEG se da por abandonado (proceso caído).
+    Retorna (job, creado).
+    """
+    activo = _job_activo_usuario(db, user_id)
+    if activo and activo.started_at < datetime.now() - timedelta(seconds=JOB_ABANDONADO_SEG):
+        activo.status = "error"
+        activo.error = "Job abandonado"
+        activo.finished_at = datetime.now()
+        db.commit()
+        activo = None
+    if activo:
+        return activo, False
+
+    run = models.JobRun(
+        job_name=JOB_GENERACION_USUARIO, user_id=user_id, holder=INSTANCIA_ID,
+        status="pending", started_at=datetime.now(),
+    )
+    db.add(run)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return _job_activo_usuario(db, user_id), False
+    return run, True
+
+
+def correr_generacion_usuario(db: Session, job_id: int) -> None:
+    """
+    Ejecuta un job encolado por encolar_generacion_usuario. Lo corre la cola de trabajos
+    (tarea "generacion_usuario" en services/tareas.py), fuera del request.
+    """
+    run = db.get(models.JobRun, job_id)
+    if run is None or run.status not in ESTADOS_ACTIVOS:
+        return
+    _correr_job(db, run, lambda db: ejecutar_generacion(db, user_id=run.user_id))
+
+
 def _job_generar_gastos_fijos():
-    """Job del scheduler: se ejecuta el día 1 de cada mes."""
-    db = next(get_db())
+    """Job del scheduler: se ejecuta cada hora (y una vez al arrancar, como catch-up)."""
+    db = SessionLocal()
     try:
-        creados = ejecutar_generacion_mensual(db)
-        logger.info(json.dumps({"msg": "gastos_fijos_generados", "creados": creados}))
+        ejecutar_job(db, "generacion_gastos_fijos", ejecutar_generacion)
+    finally:
+        db.close()
+
+
+def _job_reconciliar_pagos():
+    """Job del scheduler: reconcilia con MP los pagos pendientes sin webhook."""
+    db = SessionLocal()
+    try:
+        ejecutar_job(db, "reconciliacion_pagos", reconciliar_pendientes)
+    finally:
+        db.close()
+
+
+def _job_renovar_lease():
+    """Job del scheduler: mantiene el lease del líder vigente (o lo toma si venció)."""
+    db = SessionLocal()
+    try:
+        adquirir_lease(db)
     except Exception as e:
-        logger.error(json.dumps({"msg": "error_generando_gastos_fijos", "error": str(e)}))
+        logger.error(json.dumps({"msg": "error_renovando_lease", "error": str(e)}))
     finally:
         db.close()
 
 
 def create_scheduler() -> AsyncIOScheduler:
-    """Crea y configura el scheduler (sin iniciarlo)."""
+    """
+    Crea y configura el scheduler (sin iniciarlo). Todos los procesos lo inician, pero
+    los jobs solo se ejecutan en el que tiene el lease. El catch-up de arranque corre
+    como job inmediato en el pool del scheduler, sin bloquear el startup.
+    """
     scheduler = AsyncIOScheduler()
-    scheduler.add_job(_job_generar_gastos_fijos, 'cron', day=1, hour=0, minute=1)
+    scheduler.add_job(_job_renovar_lease, 'interval', seconds=LEASE_RENOVACION_SEG, next_run_time=datetime.now())
+    scheduler.add_job(_job_generar_gastos_fijos, 'cron', minute=1)
+    scheduler.add_job(_job_generar_gastos_fijos, next_run_time=datetime.now())
+    if config.MP_ACCESS_TOKEN:
+        scheduler.add_job(_job_reconciliar_pagos, 'interval', minutes=config.PAYMENT_RECONCILE_INTERVAL_MINUTES)
     return scheduler
+
+
+def detener_scheduler(scheduler: AsyncIOScheduler) -> None:
+    """Apaga el scheduler y libera el lease para que otro proceso tome el liderazgo."""
+    scheduler.shutdown()
+    db = SessionLocal()
+    try:
+        liberar_lease(db)
+    finally:
+        db.close()
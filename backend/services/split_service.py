@@ -1,18 +1,42 @@
 """Servicio de cálculo de shares para gastos divididos."""
-from decimal import Decimal, ROUND_DOWN
+from decimal import Decimal
+from typing import Optional, Sequence
 
+from money import a_centavos, a_decimal, repartir_proporcional
 
-def calcular_shares(importe: Decimal, n: int) -> list[Decimal]:
+SPLIT_MODES = ("equal", "weights", "percentages", "amounts")
+
+
+def _pesos_enteros(valores: Sequence[Decimal]) -> list[int]:
+    """Escala pesos decimales a enteros conservando la proporción (1.5, 1 -> 15, 10)."""
+    decimales = max(max(-v.as_tuple().exponent, 0) for v in valores)
+    return [int(v.scaleb(decimales)) for v in valores]
+
+
+def calcular_shares(
+    importe: Decimal,
+    n: int,
+    split_mode: str = "equal",
+    valores: Optional[Sequence[Decimal]] = None,
+) -> list[Decimal]:
     """
-    Divide un importe entre n participantes con precisión Decimal.
-    El primer participante absorbe el remanente de centavos.
-    Retorna lista de n Decimals que suman exactamente al importe.
+    Divide un importe entre n participantes con aritmética en centavos.
+
+    - equal: partes iguales.
+    - weights / percentages: proporcional a `valores` por el método del mayor resto.
+    - amounts: `valores` son los montos de cada participante (ya validados contra el importe).
+
+    Retorna lista de n Decimals que suman exactamente al importe; ningún share difiere
+    de su cuota exacta en más de un centavo.
     """
-    importe = importe if isinstance(importe, Decimal) else Decimal(str(importe))
-    share_base = (importe / n).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
-    remainder = importe - share_base * n
-    shares = []
-    for i in range(n):
-        amount = share_base + (remainder if i == 0 else Decimal('0'))
-        shares.append(amount)
-    return shares
+    total = a_centavos(importe)
+
+    if split_mode == "equal":
+        base, remanente = divmod(total, n)
+        share_base = a_decimal(base)
+        return [a_decimal(base + 1)] * remanente + [share_base] * (n - remanente)
+
+    if split_mode == "amounts":
+        return [a_decimal(a_centavos(v)) for v in valores]
+
+    return [a_decimal(c) for c in repartir_proporcional(total, _pesos_enteros(valores))]
@@ -0,0 +1,55 @@
+"""
+Tareas de la cola de trabajos (services/job_queue.py). Importar este módulo registra los
+handlers; lo hacen la API (main.py) y el worker separado (worker.py).
+"""
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+import models
+from email_service import send_password_reset_email
+from services.job_queue import tarea
+from services.mp_client import get_mp_client
+from services.payment_service import actualizar_desde_mp
+from services.scheduler_service import correr_generacion_usuario
+
+TAREA_EMAIL_RESET = "email_reset_password"
+TAREA_MP_WEBHOOK = "mp_webhook_pago"
+TAREA_GENERACION_USUARIO = "generacion_usuario"
+
+
+@tarea(TAREA_EMAIL_RESET)
+async def enviar_email_reset(db: Session, payload: dict) -> None:
+    """Envía el email de un token de reset. El payload lleva solo el id del token."""
+    token = db.get(models.PasswordResetToken, payload["reset_token_id"])
+    if not token or token.used:
+        return
+    user = db.get(models.User, token.user_id)
+    enviado = await send_password_reset_email(
+        email=user.email,
+        username=user.username,
+        reset_token=token.token,
+        expires_in_hours=1,
+    )
+    if not enviado:
+        raise RuntimeError("No se pudo enviar el email de reset")
+
+
+@tarea(TAREA_MP_WEBHOOK)
+async def procesar_webhook_pago(db: Session, payload: dict) -> None:
+    """
+    Consulta en Mercado Pago el pago de una notificación guardada y actualiza su estado.
+    Si MP falla, MPError hace que el trabajo se reintente.
+    """
+    notificacion = db.get(models.MPNotification, payload["notification_id"])
+    if notificacion is None or notificacion.processed_at:
+        return
+    mp_payment = await get_mp_client().obtener_pago(notificacion.data_id)
+    actualizar_desde_mp(db, mp_payment)
+    notificacion.processed_at = datetime.now()
+
+
+@tarea(TAREA_GENERACION_USUARIO)
+def generar_gastos_fijos_usuario(db: Session, payload: dict) -> None:
+    """Ejecuta el JobRun de generación encolado por POST /gastos-fijos/generar-mes."""
+    correr_generacion_usuario(db, payload["job_run_id"])
@@ -0,0 +1,68 @@
+"""
+Instrumentación de SQL por request: cantidad de sentencias, tiempo en DB y log de queries lentas.
+
+Los listeners se registran sobre la clase Engine (cubre cualquier engine, incluido el
+de tests) y atribuyen cada sentencia al request actual mediante un ContextVar.
+"""
+import logging
+import re
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import config
+
+logger = logging.getLogger("finanzaapp")
+
+
+@dataclass
+class RequestSQLStats:
+    queries: int = 0
+    db_time_ms: float = 0.0
+
+
+_stats_actual: ContextVar[Optional[RequestSQLStats]] = ContextVar("sql_stats", default=None)
+
+_PARAM = r"(?:\?|%\(\w+\)s|:\w+|\$\d+)"
+_LISTA_IN = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})+\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def iniciar_request() -> tuple[RequestSQLStats, Token]:
+    """Crea las estadísticas del request actual. Devuelve el token para restaurar el contexto."""
+    stats = RequestSQLStats()
+    return stats, _stats_actual.set(stats)
+
+
+def finalizar_request(token: Token) -> None:
+    _stats_actual.reset(token)
+
+
+def normalizar_sql(statement: str) -> str:
+    """Quita literales y colapsa listas IN y espacios para agrupar sentencias equivalentes."""
+    sql = _LITERAL.sub("?", statement)
+    sql = _LISTA_IN.sub("(...)", sql)
+    return _ESPACIOS.sub(" ", sql).strip()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    context._sql_metrics_inicio = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    duracion_ms = (time.perf_counter() - context._sql_metrics_inicio) * 1000
+
+    stats = _stats_actual.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time_ms += duracion_ms
+
+    if duracion_ms >= config.SLOW_QUERY_MS:
+        logger.warning("slow query (%.1fms): %s", duracion_ms, normalizar_sql(statement))
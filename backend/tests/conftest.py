@@ -5,6 +5,16 @@ Usa SQLite en memoria compartida para aislar los tests de la DB de desarrollo.
 import os
 os.environ.setdefault("SECRET_KEY", "test-secret-key-for-testing-only-32chars!!")
 os.environ.setdefault("ENVIRONMENT", "development")
+# Los tests ejecutan los trabajos encolados vía despachar o procesar_pendientes
+os.environ.setdefault("JOB_WORKER_IN_PROCESS", "false")
+# Sin scheduler: el catch-up, el lease y job_runs escribirían en paralelo a los tests
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+# URI con cache compartido: todas las conexiones ven la misma DB en memoria. Lo que abre
+# sesiones propias (lifespan, cola de trabajos) también la usa, nunca la DB de desarrollo
+TEST_DATABASE_URL = "sqlite:///file:testdb?mode=memory&cache=shared&uri=true"
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+import sqlite3
 
 import pytest
 from fastapi.testclient import TestClient
@@ -13,21 +23,71 @@ from sqlalchemy.orm import sessionmaker
 
 from database import Base, get_db
 from main import app, limiter
+from services import payment_status
+
+
+class SQLStats:
+    """Contador de sentencias ejecutadas, filas y valores leídos a nivel DBAPI."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.statements = 0
+        self.rows = 0
+        self.values = 0
+
+    def count(self, rows: list):
+        self.rows += len(rows)
+        self.values += sum(len(r) for r in rows)
+
+
+sql_stats = SQLStats()
+
+
+class _CountingCursor(sqlite3.Cursor):
+    def execute(self, *args, **kwargs):
+        sql_stats.statements += 1
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        sql_stats.statements += 1
+        return super().executemany(*args, **kwargs)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            sql_stats.count([row])
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        sql_stats.count(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        sql_stats.count(rows)
+        return rows
+
+
+class _CountingConnection(sqlite3.Connection):
+    def cursor(self, factory=_CountingCursor):
+        return super().cursor(factory)
 
-# URI con cache compartido: todas las conexiones ven la misma DB en memoria
-TEST_DATABASE_URL = "sqlite:///file:testdb?mode=memory&cache=shared&uri=true"
 
 @pytest.fixture(autouse=True)
 def reset_rate_limits():
-    """Resetea el rate limiter entre tests para que no interfieran."""
+    """Resetea el rate limiter y la caché de estado de pagos entre tests para que no interfieran."""
     limiter._storage.reset()
+    payment_status.limpiar()
     yield
 
 @pytest.fixture(scope="session")
 def engine_fixture():
     _engine = create_engine(
         TEST_DATABASE_URL,
-        connect_args={"check_same_thread": False, "uri": True},
+        connect_args={"check_same_thread": False, "uri": True, "factory": _CountingConnection},
     )
     Base.metadata.create_all(bind=_engine)
     yield _engine
@@ -82,3 +142,45 @@ def user_category_id(logged_in_client) -> int:
     })
     assert r.status_code == 200, r.text
     return r.json()["id"]
+
+@pytest.fixture
+def split_group(logged_in_client) -> dict:
+    """Crea un grupo con el creador y dos miembros rápidos; devuelve el grupo completo."""
+    r = logged_in_client.post("/split-groups/", json={"nombre": "Viaje"})
+    assert r.status_code == 200, r.text
+    group_id = r.json()["id"]
+    for nombre in ("Juan", "Ana"):
+        r = logged_in_client.post(f"/split-groups/{group_id}/members/quick", json={"nombre": nombre})
+        assert r.status_code == 200, r.text
+    r = logged_in_client.get(f"/split-groups/{group_id}")
+    assert r.status_code == 200, r.text
+    return r.json()
+
+@pytest.fixture
+def sql_counter():
+    """Devuelve el contador de SQL; llamar a .reset() antes del request a medir."""
+    sql_stats.reset()
+    return sql_stats
+
+@pytest.fixture
+def mp_fake(monkeypatch):
+    """
+    Mercado Pago local (mp_fake.py) en proceso: el cliente compartido le habla vía ASGI,
+    sin red ni backoff real. Devuelve el estado del fake para cargar pagos o fallas.
+    """
+    import httpx
+    import config
+    import mp_fake as fake
+    from services import mp_client
+
+    fake.estado.reset()
+    monkeypatch.setattr(config, "MP_ACCESS_TOKEN", "TEST-token")
+    monkeypatch.setattr(mp_client, "BACKOFF_BASE_SEG", 0)
+    mp_client.configurar(mp_client.MPClient(
+        access_token="TEST-token",
+        base_url="http://mp.fake",
+        breaker_umbral=3,
+        transport=httpx.ASGITransport(app=fake.app),
+    ))
+    yield fake.estado
+    mp_client.configurar(None)
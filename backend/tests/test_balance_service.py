@@ -0,0 +1,71 @@
+"""
+Tests del solver de deudas simplificadas (services/balance_service.py).
+Cubre: solver exacto vs greedy, saldo total de las transferencias, saldos repetidos
+dentro del presupuesto y fallback.
+"""
+from collections import defaultdict
+
+from money import a_centavos
+from services.balance_service import PRESUPUESTO_EXACTO_SEG, _greedy, _particion_optima, calcular_transferencias
+
+
+def _saldos(*montos) -> list[tuple[int, int]]:
+    return [(i + 1, a_centavos(m)) for i, m in enumerate(montos)]
+
+
+def _aplicar(saldos, transfers) -> dict:
+    """Aplica las transferencias y devuelve el saldo resultante por miembro."""
+    resultado = defaultdict(int)
+    for member_id, net in saldos:
+        resultado[member_id] += net
+    for deudor, acreedor, monto in transfers:
+        resultado[deudor] += monto
+        resultado[acreedor] -= monto
+    return resultado
+
+
+def test_exacto_usa_menos_transferencias_que_greedy():
+    """{4, 9, -13} y {-8, 6, 2} suman cero: el exacto los salda por separado."""
+    saldos = _saldos("4", "-8", "6", "2", "9", "-13")
+    greedy = _greedy(saldos)
+    exacto = calcular_transferencias(saldos)
+    assert len(exacto) < len(greedy)
+    assert len(exacto) == len(saldos) - 2
+
+
+def test_transferencias_saldan_todos_los_balances():
+    saldos = _saldos("100.10", "-33.37", "-33.37", "-33.36", "50", "-50")
+    transfers = calcular_transferencias(saldos)
+    assert all(v == 0 for v in _aplicar(saldos, transfers).values())
+    assert all(monto > 0 for _, _, monto in transfers)
+
+
+def test_pares_opuestos_se_saldan_directo():
+    saldos = _saldos("25", "-25", "10", "-10")
+    transfers = calcular_transferencias(saldos)
+    assert sorted(transfers) == [(2, 1, 2500), (4, 3, 1000)]
+
+
+def test_exacto_con_20_saldos_entra_en_el_presupuesto():
+    """Saldos distintos (pocos subconjuntos de suma cero) y repetidos (muchos)."""
+    distintos = [(i + 1) * 7919 for i in range(19)]
+    distintos.append(-sum(distintos))
+    repetidos = [9000, 9000] + [-1000] * 18
+    for centavos in (distintos, repetidos):
+        assert _particion_optima(centavos, PRESUPUESTO_EXACTO_SEG) is not None
+
+    # Dos pagadores a los que 9 personas les deben 1000 cada uno: 9 + 9 transferencias
+    saldos = list(enumerate(repetidos))
+    transfers = calcular_transferencias(saldos)
+    assert len(transfers) == 18
+    assert all(v == 0 for v in _aplicar(saldos, transfers).values())
+
+
+def test_fallback_greedy_por_tamanio():
+    saldos = _saldos("6", "4", "-5", "-5", "3", "-3.5", "0.5")
+    assert calcular_transferencias(saldos, max_exacto=3) == _greedy(saldos)
+
+
+def test_fallback_greedy_por_presupuesto():
+    saldos = _saldos("6", "4", "-5", "-5", "3", "-3.5", "0.5")
+    assert calcular_transferencias(saldos, presupuesto_seg=-1) == _greedy(saldos)
@@ -1,10 +1,17 @@
 """
-Tests de integración para categorías personalizadas del usuario (user-categories).
+Tests de integración para categorías personalizadas del usuario (user-categories)
+y para el registro en memoria de categorías del sistema (/categories/).
 Cubre: CRUD completo, unicidad por usuario, aislamiento entre usuarios,
-y bloqueo de eliminación cuando hay movimientos asociados.
+bloqueo de eliminación cuando hay movimientos asociados, y caché HTTP del seed.
 """
 from datetime import datetime
 
+import pytest
+
+import config
+import models
+from services import category_registry
+
 
 # ============== HELPERS ==============
 
@@ -152,3 +159,106 @@ def test_eliminar_categoria_de_otro_usuario(client):
 def test_eliminar_categoria_inexistente(logged_in_client):
     r = logged_in_client.delete("/user-categories/99999")
     assert r.status_code == 404
+
+
+
+# ============== MERGE ==============
+
+def test_merge_categoria_mueve_movimientos_y_gastos_fijos(logged_in_client, user_category_id, sql_counter):
+    """merge-into reasigna movimientos y templates y elimina la categoría origen."""
+    destino = logged_in_client.post("/user-categories/", json=_nueva_categoria("Destino")).json()["id"]
+    for _ in range(3):
+        logged_in_client.post("/movimientos/", json=_movimiento(user_category_id))
+    logged_in_client.post("/movimientos/", json={**_movimiento(user_category_id), "es_fijo": True})
+
+    sql_counter.reset()
+    r = logged_in_client.post(f"/user-categories/{user_category_id}/merge-into/{destino}")
+    assert r.status_code == 200, r.text
+    assert r.json() == {"movimientos": 4, "gastos_fijos": 1}
+    # usuario + categorías + UPDATE movimientos + UPDATE gastos_fijos + DELETE
+    assert sql_counter.statements <= 5
+
+    movimientos = logged_in_client.get("/movimientos/").json()
+    assert {m["user_category_id"] for m in movimientos} == {destino}
+    assert logged_in_client.get("/gastos-fijos/").json()[0]["user_category_id"] == destino
+    assert logged_in_client.get(f"/user-categories/{user_category_id}").status_code == 404
+
+
+def test_merge_en_si_misma_retorna_400(logged_in_client, user_category_id):
+    r = logged_in_client.post(f"/user-categories/{user_category_id}/merge-into/{user_category_id}")
+    assert r.status_code == 400
+
+
+def test_merge_con_categoria_ajena_retorna_404(client):
+    _registrar_y_logear(client, "duenio", "duenio@test.com")
+    ajena = client.post("/user-categories/", json=_nueva_categoria("Ajena")).json()["id"]
+
+    _registrar_y_logear(client, "otro", "otro@test.com")
+    propia = client.post("/user-categories/", json=_nueva_categoria("Propia")).json()["id"]
+
+    assert client.post(f"/user-categories/{propia}/merge-into/{ajena}").status_code == 404
+    assert client.post(f"/user-categories/{ajena}/merge-into/{propia}").status_code == 404
+
+# ============== CATEGORÍAS DEL SISTEMA ==============
+
+@pytest.fixture
+def categorias_sistema(db_session):
+    """Seed de categorías del sistema en la BD de test, con el registro recargado."""
+    db_session.add_all([
+        models.Category(nombre="Comida", es_predeterminada=True),
+        models.Category(nombre="Transporte", es_predeterminada=True),
+    ])
+    db_session.flush()
+    category_registry.recargar(db_session)
+    yield
+    category_registry.invalidar()
+
+
+def test_listar_categorias_sistema_con_cache_http(client, categorias_sistema):
+    r = client.get("/categories/")
+    assert r.status_code == 200, r.text
+    assert [c["nombre"] for c in r.json()] == ["Comida", "Transporte"]
+    assert r.headers["etag"]
+    assert "max-age" in r.headers["cache-control"]
+
+
+def test_categorias_sistema_304_con_etag_vigente(client, categorias_sistema):
+    etag = client.get("/categories/").headers["etag"]
+
+    r = client.get("/categories/", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+
+    r = client.get("/categories/", headers={"If-None-Match": '"otro"'})
+    assert r.status_code == 200
+
+
+def test_categorias_sistema_se_sirven_sin_consultar(client, categorias_sistema, sql_counter):
+    sql_counter.reset()
+    assert client.get("/categories/").status_code == 200
+    assert sql_counter.statements == 0
+
+
+def test_cambio_de_version_invalida_etag(client, categorias_sistema, monkeypatch):
+    etag = client.get("/categories/").headers["etag"]
+    monkeypatch.setattr(config, "CATEGORIES_VERSION", "2")
+
+    r = client.get("/categories/", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+
+def test_movimiento_valida_categoria_sistema_con_registro(logged_in_client, categorias_sistema, db_session):
+    """Una categoría nueva del seed se acepta aunque no esté en el registro; una inexistente da 404."""
+    nueva = models.Category(nombre="Salud", es_predeterminada=True)
+    db_session.add(nueva)
+    db_session.flush()
+
+    payload = {**_movimiento(None), "user_category_id": None}
+    r = logged_in_client.post("/movimientos/", json={**payload, "categoria_id": nueva.id})
+    assert r.status_code == 200, r.text
+    assert "Salud" in [c["nombre"] for c in logged_in_client.get("/categories/").json()]
+
+    r = logged_in_client.post("/movimientos/", json={**payload, "categoria_id": 99999})
+    assert r.status_code == 404
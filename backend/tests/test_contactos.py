@@ -0,0 +1,288 @@
+"""
+Tests de contactos: /contacts/
+Cubre: balance consolidado por contacto entre grupos, neto de pagos aprobados,
+orden por nombre y búsqueda por prefijo con el índice en memoria.
+"""
+from decimal import Decimal
+
+import pytest
+
+import models
+from services import contact_index
+
+
+@pytest.fixture(autouse=True)
+def _indice_limpio():
+    """El índice es global del proceso y los ids se reusan entre tests (rollback)."""
+    contact_index.invalidar()
+    yield
+    contact_index.invalidar()
+
+
+def _miembro(group: dict, nombre: str) -> dict:
+    return next(m for m in group["members"] if m["display_name"] == nombre)
+
+
+def _creador(group: dict) -> dict:
+    return next(m for m in group["members"] if m["is_creator"])
+
+
+def _gasto(client, group: dict, importe: float, paid_by: dict, participantes: list[dict]):
+    r = client.post(f"/split-groups/{group['id']}/expenses", json={
+        "descripcion": "Gasto",
+        "importe": importe,
+        "paid_by_member_id": paid_by["id"],
+        "participant_member_ids": [p["id"] for p in participantes],
+    })
+    assert r.status_code == 200, r.text
+
+
+def test_balance_contacto_consolidado_entre_grupos(logged_in_client, split_group, db_session):
+    juan = _miembro(split_group, "Juan")
+    ana = _miembro(split_group, "Ana")
+    creador = _creador(split_group)
+    # Grupo 1: el creador paga 90 entre los tres -> Juan debe 30
+    _gasto(logged_in_client, split_group, 90.0, creador, split_group["members"])
+
+    # Grupo 2 con el mismo contacto: Juan paga 40 entre él y el creador -> le deben 20
+    r = logged_in_client.post("/split-groups/", json={
+        "nombre": "Cena", "member_contact_ids": [juan["contact_id"]],
+    })
+    grupo2 = r.json()
+    _gasto(logged_in_client, grupo2, 40.0, _miembro(grupo2, "Juan"), grupo2["members"])
+
+    r = logged_in_client.get(f"/contacts/{juan['contact_id']}/balance")
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert data["nombre"] == "Juan"
+    assert data["net_balance"] == -10.0
+    assert data["group_count"] == 2
+
+    # Un pago aprobado de Juan al creador en el grupo 1 cancela su deuda de ese grupo
+    db_session.add(models.Payment(
+        group_id=split_group["id"], from_member_id=juan["id"], to_member_id=creador["id"],
+        amount=Decimal("30"), status="approved",
+    ))
+    db_session.add(models.Payment(
+        group_id=split_group["id"], from_member_id=ana["id"], to_member_id=creador["id"],
+        amount=Decimal("30"), status="pending",
+    ))
+    db_session.flush()
+
+    r = logged_in_client.get("/contacts/balances")
+    assert r.status_code == 200, r.text
+    balances = {b["nombre"]: b["net_balance"] for b in r.json()}
+    assert balances == {"Juan": 20.0, "Ana": -30.0}
+
+
+def test_balance_contacto_sin_movimientos(logged_in_client):
+    r = logged_in_client.post("/contacts/", json={"nombre": "Pedro"})
+    contact_id = r.json()["id"]
+    r = logged_in_client.get(f"/contacts/{contact_id}/balance")
+    assert r.status_code == 200, r.text
+    assert r.json()["net_balance"] == 0.0
+    assert r.json()["group_count"] == 0
+
+
+def test_balance_contacto_ajeno_retorna_404(logged_in_client):
+    r = logged_in_client.get("/contacts/999999/balance")
+    assert r.status_code == 404, r.text
+
+
+def _crear_contactos(client, *nombres: str) -> dict[str, int]:
+    ids = {}
+    for nombre in nombres:
+        r = client.post("/contacts/", json={"nombre": nombre})
+        assert r.status_code == 200, r.text
+        ids[nombre] = r.json()["id"]
+    return ids
+
+
+def test_listar_contactos_ordenados_por_nombre(logged_in_client):
+    _crear_contactos(logged_in_client, "carla", "Beto", "Álvaro", "ana")
+
+    r = logged_in_client.get("/contacts/")
+    assert r.status_code == 200
+    assert [c["nombre"] for c in r.json()] == ["Álvaro", "ana", "Beto", "carla"]
+
+
+def test_buscar_contactos_por_prefijo_de_palabra(logged_in_client):
+    _crear_contactos(logged_in_client, "Juan Pérez", "Julia Gómez", "Ana Juárez", "Pedro")
+
+    r = logged_in_client.get("/contacts/", params={"q": "ju"})
+    assert [c["nombre"] for c in r.json()] == ["Ana Juárez", "Juan Pérez", "Julia Gómez"]
+
+    r = logged_in_client.get("/contacts/", params={"q": "PE"})
+    assert [c["nombre"] for c in r.json()] == ["Juan Pérez", "Pedro"]
+
+    r = logged_in_client.get("/contacts/", params={"q": "ju", "limit": 2, "offset": 1})
+    assert [c["nombre"] for c in r.json()] == ["Juan Pérez", "Julia Gómez"]
+
+    r = logged_in_client.get("/contacts/", params={"q": "zz"})
+    assert r.json() == []
+
+
+def test_indice_se_reusa_y_se_reconstruye_al_cambiar(logged_in_client, monkeypatch):
+    ids = _crear_contactos(logged_in_client, "Juan", "Pedro")
+    construcciones = []
+    original = contact_index._construir
+
+    def _contar(*args, **kwargs):
+        construcciones.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(contact_index, "_construir", _contar)
+
+    logged_in_client.get("/contacts/", params={"q": "ju"})
+    logged_in_client.get("/contacts/", params={"q": "pe", "limit": 1})
+    assert len(construcciones) == 1
+
+    # Renombrar cambia la huella (updated_at) y el índice se reconstruye
+    r = logged_in_client.put(f"/contacts/{ids['Pedro']}", json={"nombre": "Julián"})
+    assert r.status_code == 200
+    r = logged_in_client.get("/contacts/", params={"q": "ju"})
+    assert [c["nombre"] for c in r.json()] == ["Juan", "Julián"]
+    assert len(construcciones) == 2
+
+    logged_in_client.delete(f"/contacts/{ids['Juan']}")
+    r = logged_in_client.get("/contacts/", params={"q": "ju"})
+    assert [c["nombre"] for c in r.json()] == ["Julián"]
+    assert len(construcciones) == 3
+
+
+def test_buscar_contactos_pagina_no_lee_toda_la_agenda(logged_in_client, sql_counter):
+    _crear_contactos(logged_in_client, *[f"Contacto {i:02d}" for i in range(30)])
+    logged_in_client.get("/contacts/", params={"limit": 5})
+
+    sql_counter.reset()
+    r = logged_in_client.get("/contacts/", params={"limit": 5, "offset": 10})
+    assert [c["nombre"] for c in r.json()] == [f"Contacto {i:02d}" for i in range(10, 15)]
+    # Usuario + huella + página: solo se leen las filas de la página
+    assert sql_counter.rows <= 7
+
+
+def _importar(client, contenido: str, nombre_archivo: str, **params):
+    r = client.post(
+        "/contacts/import",
+        files={"archivo": (nombre_archivo, contenido.encode("utf-8"), "text/plain")},
+        params=params,
+    )
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_importar_csv_con_reporte_por_fila(logged_in_client):
+    existentes = _crear_contactos(logged_in_client, "Juan Pérez")
+    csv_texto = (
+        "Nombre;Alias;CVU\n"
+        "Ana Gómez;ana.mp;0000003100000000000001\n"
+        "juan perez;;\n"
+        ";sin.nombre;\n"
+        "ANA GÓMEZ;otro.alias;0000-0031-0000-0000-0000-01\n"
+        "Ana Gómez;;0000003100000000000002\n"
+    )
+    resultado = _importar(logged_in_client, csv_texto, "contactos.csv")
+
+    assert (resultado["creados"], resultado["duplicados"], resultado["errores"]) == (2, 2, 1)
+    filas = resultado["filas"]
+    assert [f["estado"] for f in filas] == ["creado", "duplicado", "error", "duplicado", "creado"]
+    assert [f["fila"] for f in filas] == [2, 3, 4, 5, 6]
+    assert filas[1]["contact_id"] == existentes["Juan Pérez"]
+    assert filas[3]["detalle"] == "Repetido en la fila 2"
+
+    r = logged_in_client.get(f"/contacts/", params={"q": "ana"})
+    contactos = r.json()
+    assert [c["cvu"] for c in contactos] == ["0000003100000000000001", "0000003100000000000002"]
+    assert contactos[0]["alias_bancario"] == "ana.mp"
+    assert contactos[0]["id"] == filas[0]["contact_id"]
+
+
+def test_importar_vcard(logged_in_client):
+    vcard = (
+        "BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Carla\r\n  Ruiz\r\nX-CVU:0000003100000000000003\r\nEND:VCARD\r\n"
+        "BEGIN:VCARD\r\nVERSION:3.0\r\nN:Sosa;Pedro;;;\r\nitem1.X-ALIAS:pedro.sosa\r\nEND:VCARD\r\n"
+        "BEGIN:VCARD\r\nVERSION:3.0\r\nTEL:123\r\nEND:VCARD\r\n"
+    )
+    resultado = _importar(logged_in_client, vcard, "agenda.vcf")
+
+    assert [(f["fila"], f["estado"], f.get("nombre")) for f in resultado["filas"]] == [
+        (1, "creado", "Carla Ruiz"), (7, "creado", "Pedro Sosa"), (12, "error", None),
+    ]
+    r = logged_in_client.get("/contacts/")
+    assert {c["nombre"]: c["alias_bancario"] for c in r.json()} == {"Carla Ruiz": None, "Pedro Sosa": "pedro.sosa"}
+
+
+def test_importar_detecta_formato_y_completa_digests_previos(logged_in_client, db_session):
+    # Contacto creado antes de existir el digest
+    ids = _crear_contactos(logged_in_client, "Luis")
+    db_session.query(models.Contact).filter(models.Contact.id == ids["Luis"]).update({"dedup_digest": None})
+    db_session.commit()
+
+    resultado = _importar(logged_in_client, "BEGIN:VCARD\nFN:luis\nEND:VCARD\n", "export.txt")
+    assert resultado["filas"][0]["estado"] == "duplicado"
+    assert resultado["filas"][0]["contact_id"] == ids["Luis"]
+
+
+def test_importar_en_lotes(logged_in_client, monkeypatch, sql_counter):
+    from services import contact_import
+
+    monkeypatch.setattr(contact_import, "TAMANIO_LOTE", 50)
+    csv_texto = "nombre,cvu\n" + "".join(f"Contacto {i:03d},{i:022d}\n" for i in range(120))
+
+    sql_counter.reset()
+    resultado = _importar(logged_in_client, csv_texto, "contactos.csv")
+    assert resultado["creados"] == 120
+    # Un INSERT por lote (3), no uno por contacto
+    assert sql_counter.statements < 20
+    r = logged_in_client.get("/contacts/", params={"limit": 200})
+    assert len(r.json()) == 120
+
+
+def test_importar_respeta_maximo_de_filas(logged_in_client, monkeypatch):
+    import config
+
+    monkeypatch.setattr(config, "CONTACT_IMPORT_MAX_ROWS", 2)
+    resultado = _importar(logged_in_client, "nombre\nA\nB\nC\nD\n", "contactos.csv")
+    assert [f["estado"] for f in resultado["filas"]] == ["creado", "creado", "error"]
+
+
+def test_lote_fallido_no_marca_como_repetidas_las_copias_posteriores(engine_fixture, monkeypatch):
+    """Un lote que no se guardó no cuenta para detectar repetidos: la copia se reintenta."""
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import Session
+
+    from services import contact_import
+
+    insert_original = contact_import.insert
+    llamadas = []
+
+    def insert_que_falla_la_primera_vez(tabla):
+        llamadas.append(tabla)
+        if len(llamadas) == 1:
+            raise OperationalError("INSERT", {}, Exception("db caída"))
+        return insert_original(tabla)
+
+    monkeypatch.setattr(contact_import, "TAMANIO_LOTE", 2)
+    monkeypatch.setattr(contact_import, "insert", insert_que_falla_la_primera_vez)
+    filas = [(2, {"nombre": "Ana"}), (3, {"nombre": "Juan"}), (4, {"nombre": "Ana"})]
+    with Session(bind=engine_fixture) as db:
+        try:
+            reporte = contact_import.importar_contactos(db, 999, filas)
+            assert [(f["fila"], f["estado"]) for f in reporte] == [(2, "error"), (3, "error"), (4, "creado")]
+            assert reporte[2]["contact_id"] is not None
+        finally:
+            db.query(models.Contact).filter(models.Contact.owner_id == 999).delete()
+            db.commit()
+
+
+def test_leer_filas_desde_spooled_temporary_file():
+    """UploadFile.file es un SpooledTemporaryFile (sin readable() en Python 3.10)."""
+    import tempfile
+
+    from services import contact_import
+
+    with tempfile.SpooledTemporaryFile() as archivo:
+        archivo.write("﻿nombre,alias\r\nÑandú,nandu.mp\r\n".encode())
+        archivo.seek(0)
+        filas = list(contact_import.leer_filas(archivo, "contactos.csv"))
+    assert filas == [(2, {"nombre": "Ñandú", "alias_bancario": "nandu.mp"})]
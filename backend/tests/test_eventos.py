@@ -0,0 +1,139 @@
+"""
+Tests de eventos en vivo (services/eventos.py y GET /events).
+Cubre: publicación desde endpoints sync y desde el webhook, aislamiento por usuario,
+cola llena, límite de conexiones y formato SSE.
+"""
+import asyncio
+from decimal import Decimal
+
+import models
+from routers import events
+from services import eventos
+
+
+def _escuchar(user_id: int, accion) -> list[dict]:
+    """Suscribe `user_id`, corre `accion` en otro hilo (como un endpoint sync) y devuelve los eventos recibidos."""
+    async def correr():
+        suscripcion = eventos.suscribir(user_id)
+        try:
+            await asyncio.to_thread(accion)
+            await asyncio.sleep(0)
+            recibidos = []
+            while not suscripcion.cola.empty():
+                recibidos.append(suscripcion.cola.get_nowait())
+            return recibidos
+        finally:
+            eventos.desuscribir(suscripcion)
+
+    return asyncio.run(correr())
+
+
+def _user_id(client) -> int:
+    return client.get("/auth/me").json()["id"]
+
+
+def test_gasto_publica_gasto_y_saldos(logged_in_client, split_group):
+    miembros = [m["id"] for m in split_group["members"]]
+
+    def crear_gasto():
+        r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json={
+            "descripcion": "Cena", "importe": 300, "paid_by_member_id": miembros[0],
+            "participant_member_ids": miembros,
+        })
+        assert r.status_code == 200, r.text
+
+    recibidos = _escuchar(_user_id(logged_in_client), crear_gasto)
+    assert [e["tipo"] for e in recibidos] == ["gasto", "saldos"]
+    assert recibidos[0]["datos"]["accion"] == "creado"
+    assert recibidos[1]["datos"] == {"group_id": split_group["id"]}
+
+
+def test_eventos_solo_llegan_al_usuario(logged_in_client, split_group):
+    user_id = _user_id(logged_in_client)
+
+    def agregar_miembro():
+        r = logged_in_client.post(f"/split-groups/{split_group['id']}/members/quick", json={"nombre": "Luz"})
+        assert r.status_code == 200, r.text
+
+    assert _escuchar(user_id + 1, agregar_miembro) == []
+    assert [e["tipo"] for e in _escuchar(user_id, agregar_miembro)] == ["miembro", "saldos"]
+
+
+def test_webhook_publica_cambio_de_pago(logged_in_client, split_group, db_session, mp_fake):
+    payment = models.Payment(
+        group_id=split_group["id"], from_member_id=split_group["members"][1]["id"],
+        to_member_id=split_group["members"][2]["id"], amount=Decimal("100"),
+    )
+    db_session.add(payment)
+    db_session.commit()
+    pago = mp_fake.crear_pago(f"payment_{payment.id}", status="approved")
+
+    def notificar():
+        r = logged_in_client.post(
+            "/payments/webhook",
+            json={"type": "payment", "data": {"id": pago["id"]}},
+            headers={"x-request-id": "req-1"},
+        )
+        assert r.status_code == 200, r.text
+
+    recibidos = _escuchar(_user_id(logged_in_client), notificar)
+    assert [e["tipo"] for e in recibidos] == ["pago", "saldos"]
+    assert recibidos[0]["datos"] == {"payment_id": payment.id, "group_id": split_group["id"], "status": "approved"}
+
+
+def test_cola_llena_pide_resync(monkeypatch):
+    monkeypatch.setattr(eventos, "MAX_PENDIENTES", 2)
+
+    async def correr():
+        suscripcion = eventos.suscribir(1)
+        try:
+            for i in range(3):
+                eventos.publicar(1, "gasto", expense_id=i)
+            await asyncio.sleep(0)
+            return [suscripcion.cola.get_nowait() for _ in range(suscripcion.cola.qsize())]
+        finally:
+            eventos.desuscribir(suscripcion)
+
+    assert asyncio.run(correr()) == [eventos.EVENTO_RESYNC]
+
+
+def test_events_requiere_login_y_limita_conexiones(client, logged_in_client, monkeypatch):
+    monkeypatch.setattr(eventos.config, "EVENTS_MAX_CONNECTIONS_PER_USER", 2)
+    user_id = _user_id(logged_in_client)
+
+    async def correr():
+        abiertas = [eventos.suscribir(user_id) for _ in range(2)]
+        try:
+            return await asyncio.to_thread(logged_in_client.get, "/events")
+        finally:
+            for suscripcion in abiertas:
+                eventos.desuscribir(suscripcion)
+
+    assert asyncio.run(correr()).status_code == 429
+    logged_in_client.cookies.clear()
+    assert client.get("/events").status_code == 401
+
+
+class _RequestConectado:
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+def test_stream_sse(monkeypatch):
+    monkeypatch.setattr(events.config, "EVENTS_HEARTBEAT_SECONDS", 0.01)
+
+    async def correr():
+        suscripcion = eventos.suscribir(1)
+        stream = events._stream(_RequestConectado(), suscripcion)
+        lineas = [await anext(stream)]
+        eventos.publicar(1, "saldos", group_id=7)
+        lineas += [await anext(stream), await anext(stream)]
+        await stream.aclose()
+        return lineas
+
+    assert asyncio.run(correr()) == [
+        f"retry: {events.RECONEXION_MS}\n\n",
+        'event: saldos\ndata: {"group_id": 7}\n\n',
+        ": ping\n\n",
+    ]
+    assert eventos._suscripciones == {}
@@ -2,7 +2,11 @@
 Tests para gastos fijos recurrentes.
 Cubre: creación via es_fijo=True, CRUD del template, generación mensual, deduplicación y max_importe.
 """
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import models
+from services.gasto_fijo_service import registrar_instancias
 
 
 def _payload_gasto(user_category_id: int, importe: float = 500.0, es_fijo: bool = False) -> dict:
@@ -60,6 +64,93 @@ def test_listar_gastos_fijos_con_datos(logged_in_client, user_category_id):
     assert gf["total_meses"] == 1
 
 
+def test_listar_gastos_fijos_stats_sin_consultas_extra(logged_in_client, user_category_id, db_session, sql_counter):
+    """Las stats se leen de las columnas del template, sin consultar movimientos."""
+    for i in range(5):
+        r = logged_in_client.post("/movimientos/", json={
+            **_payload_gasto(user_category_id, importe=100.0 * (i + 1), es_fijo=True),
+            "fecha": "2025-10-01T00:00:00",
+        })
+    ultimo = r.json()
+    # Segundo mes del último gasto fijo: importe menor pero más reciente
+    db_session.add(models.Movimiento(
+        importe=Decimal("300"), fecha=datetime(2025, 11, 1), descripcion="Gas del hogar",
+        user_category_id=user_category_id, user_id=ultimo["user_id"], gasto_fijo_id=ultimo["gasto_fijo_id"],
+    ))
+    registrar_instancias(db_session, [(ultimo["gasto_fijo_id"], Decimal("300"), datetime(2025, 11, 1))])
+    db_session.flush()
+
+    sql_counter.reset()
+    r = logged_in_client.get("/gastos-fijos/")
+    assert r.status_code == 200, r.text
+    # usuario + gastos fijos (con categorías): las stats son columnas
+    assert sql_counter.statements <= 2
+
+    stats = {gf["id"]: gf for gf in r.json()}
+    assert len(stats) == 5
+    gf = stats[ultimo["gasto_fijo_id"]]
+    assert gf["max_importe"] == 500.0
+    assert gf["ultimo_importe"] == 300.0
+    assert gf["total_meses"] == 2
+
+
+
+def test_stats_se_mantienen_con_generacion_edicion_y_baja(logged_in_client, user_category_id):
+    """Las stats del template siguen a las instancias auto-generadas, editadas y eliminadas."""
+    r = logged_in_client.post("/movimientos/", json={
+        **_payload_gasto(user_category_id, importe=800.0, es_fijo=True),
+        "fecha": "2026-01-01T00:00:00",
+    })
+    original = r.json()
+    logged_in_client.post("/gastos-fijos/generar-mes")
+
+    gf = logged_in_client.get("/gastos-fijos/").json()[0]
+    assert gf["total_meses"] == 2
+    assert gf["max_importe"] == 800.0
+    assert gf["ultimo_importe"] == 800.0
+
+    # Editar la instancia auto-generada (la más reciente) a un importe mayor
+    auto = [m for m in logged_in_client.get("/movimientos/").json() if m["is_auto_generated"]][0]
+    r = logged_in_client.put(f"/movimientos/{auto['id']}", json={
+        **_payload_gasto(user_category_id, importe=950.0), "fecha": auto["fecha"],
+    })
+    assert r.status_code == 200, r.text
+    gf = logged_in_client.get("/gastos-fijos/").json()[0]
+    assert gf["max_importe"] == 950.0
+    assert gf["ultimo_importe"] == 950.0
+
+    # Eliminarla vuelve a las stats del original
+    logged_in_client.delete(f"/movimientos/{auto['id']}")
+    gf = logged_in_client.get("/gastos-fijos/").json()[0]
+    assert gf["total_meses"] == 1
+    assert gf["max_importe"] == 800.0
+    assert gf["ultimo_importe"] == 800.0
+
+    logged_in_client.delete(f"/movimientos/{original['id']}")
+    gf = logged_in_client.get("/gastos-fijos/").json()[0]
+    assert gf["total_meses"] == 0
+    assert gf["max_importe"] is None
+
+
+def test_registrar_instancias_no_reemplaza_ultimo_con_fecha_anterior(logged_in_client, user_category_id, db_session):
+    """Una instancia más vieja suma al total y al máximo pero no cambia el último importe."""
+    r = logged_in_client.post("/movimientos/", json={
+        **_payload_gasto(user_category_id, importe=100.0, es_fijo=True),
+        "fecha": "2026-05-01T00:00:00",
+    })
+    gf_id = r.json()["gasto_fijo_id"]
+
+    registrar_instancias(db_session, [
+        (gf_id, Decimal("400"), datetime(2026, 3, 1)),
+        (gf_id, Decimal("200"), datetime(2026, 4, 1)),
+    ])
+    db_session.commit()
+
+    gf = logged_in_client.get("/gastos-fijos/").json()[0]
+    assert gf["total_meses"] == 3
+    assert gf["max_importe"] == 400.0
+    assert gf["ultimo_importe"] == 100.0
+
 # ─── Toggle activo ────────────────────────────────────────────────────────────
 
 def test_toggle_activo(logged_in_client, user_category_id):
@@ -128,7 +219,7 @@ def test_generar_mes_crea_movimiento_automatico(logged_in_client, user_category_
 
     # Generar movimientos del mes actual (el historial tiene el del mes anterior)
     r_gen = logged_in_client.post("/gastos-fijos/generar-mes")
-    assert r_gen.status_code == 200, r_gen.text
+    assert r_gen.status_code == 202, r_gen.text
 
     # Verificar que se creó un movimiento auto-generado para el mes actual
     movimientos = logged_in_client.get("/movimientos/").json()
@@ -176,7 +267,7 @@ def test_generar_mes_usa_max_importe(logged_in_client, user_category_id):
 
     # Generar mes actual
     r = logged_in_client.post("/gastos-fijos/generar-mes")
-    assert r.status_code == 200, r.text
+    assert r.status_code == 202, r.text
 
     # El movimiento generado debe usar el max del historial del template (solo el mes nov)
     # ya que el de dic no está vinculado al gasto fijo
@@ -187,6 +278,249 @@ def test_generar_mes_usa_max_importe(logged_in_client, user_category_id):
     assert auto[0]["gasto_fijo_id"] == gf_id
 
 
+def test_generar_mes_por_lotes(logged_in_client, user_category_id, monkeypatch):
+    """La generación procesa los templates en lotes y desencripta descripción y nota."""
+    from services import scheduler_service
+    monkeypatch.setattr(scheduler_service, "TAMANIO_LOTE", 2)
+
+    for i in range(5):
+        logged_in_client.post("/movimientos/", json={
+            **_payload_gasto(user_category_id, importe=100.0 + i, es_fijo=True),
+            "descripcion": f"Servicio {i}",
+            "fecha": "2026-01-01T00:00:00",
+        })
+
+    r = logged_in_client.post("/gastos-fijos/generar-mes")
+    assert r.status_code == 202, r.text
+    logged_in_client.post("/gastos-fijos/generar-mes")
+
+    auto = [m for m in logged_in_client.get("/movimientos/").json() if m["is_auto_generated"]]
+    assert len(auto) == 5
+    assert sorted(m["descripcion"] for m in auto) == [f"Servicio {i}" for i in range(5)]
+    assert {m["nota"] for m in auto} == {"Generado automáticamente"}
+    assert sorted(m["importe"] for m in auto) == [100.0, 101.0, 102.0, 103.0, 104.0]
+
+
+def _meses_atras(n: int) -> datetime:
+    hoy = datetime.now()
+    anio, mes = divmod(hoy.year * 12 + hoy.month - 1 - n, 12)
+    return datetime(anio, mes + 1, 1)
+
+
+def test_backfill_genera_meses_faltantes(logged_in_client, user_category_id):
+    """El backfill completa cada mes entre la última instancia y el actual, una sola vez."""
+    logged_in_client.post("/movimientos/", json={
+        **_payload_gasto(user_category_id, importe=300.0, es_fijo=True),
+        "fecha": _meses_atras(3).isoformat(),
+    })
+
+    r = logged_in_client.post("/gastos-fijos/backfill")
+    assert r.status_code == 200, r.text
+    assert r.json()["creados"] == 3
+
+    auto = [m for m in logged_in_client.get("/movimientos/").json() if m["is_auto_generated"]]
+    fechas = sorted(m["fecha"][:7] for m in auto)
+    assert fechas == [_meses_atras(n).isoformat()[:7] for n in (2, 1, 0)]
+    assert {m["importe"] for m in auto} == {300.0}
+
+    # Idempotente
+    assert logged_in_client.post("/gastos-fijos/backfill").json()["creados"] == 0
+    assert logged_in_client.post("/gastos-fijos/generar-mes").status_code == 202
+    auto = [m for m in logged_in_client.get("/movimientos/").json() if m["is_auto_generated"]]
+    assert len(auto) == 3
+
+
+def test_backfill_concurrente_no_duplica_instancias(logged_in_client, user_category_id, db_session):
+    """Un backfill que leyó el template antes de que otro proceso insertara no duplica ni descuadra stats."""
+    logged_in_client.post("/movimientos/", json={
+        **_payload_gasto(user_category_id, importe=300.0, es_fijo=True),
+        "fecha": _meses_atras(2).isoformat(),
+    })
+    gf = db_session.query(models.GastoFijo).one()
+    leido = {"ultima_fecha": gf.ultima_fecha, "next_run_at": gf.next_run_at, "total_meses": gf.total_meses}
+
+    assert logged_in_client.post("/gastos-fijos/backfill").json()["creados"] == 2
+    # Segundo proceso con la misma foto del template (sin lease ni lock entre ambos)
+    db_session.query(models.GastoFijo).filter_by(id=gf.id).update(leido)
+    db_session.commit()
+    assert logged_in_client.post("/gastos-fijos/backfill").json()["creados"] == 0
+
+    assert db_session.query(models.Movimiento).filter_by(gasto_fijo_id=gf.id, is_auto_generated=True).count() == 2
+    db_session.refresh(gf)
+    assert gf.total_meses == 1
+
+
+def test_backfill_respeta_meses_max_y_lotes(logged_in_client, user_category_id, monkeypatch):
+    """meses_max acota la ventana y los lotes no cambian el resultado."""
+    from services import scheduler_service
+    monkeypatch.setattr(scheduler_service, "TAMANIO_LOTE", 2)
+
+    for i in range(3):
+        logged_in_client.post("/movimientos/", json={
+            **_payload_gasto(user_category_id, importe=100.0, es_fijo=True),
+            "fecha": _meses_atras(10).isoformat(),
+        })
+
+    r = logged_in_client.post("/gastos-fijos/backfill", params={"meses_max": 4})
+    assert r.status_code == 200, r.text
+    assert r.json()["creados"] == 3 * 4
+
+
+def test_backfill_solo_afecta_al_usuario(logged_in_client, user_category_id, db_session):
+    """El endpoint de backfill solo genera para los templates del usuario autenticado."""
+    gf = _crear_template_ajeno(db_session, _meses_atras(2))
+
+    assert logged_in_client.post("/gastos-fijos/backfill").json()["creados"] == 0
+    assert db_session.query(models.Movimiento).filter_by(gasto_fijo_id=gf.id).count() == 1
+
+
+def test_generar_solo_procesa_templates_vencidos(logged_in_client, user_category_id, db_session):
+    """Un template con next_run_at futuro no se genera."""
+    logged_in_client.post("/movimientos/", json={
+        **_payload_gasto(user_category_id, importe=500.0, es_fijo=True),
+        "fecha": "2026-01-01T00:00:00",
+    })
+    gf = db_session.query(models.GastoFijo).one()
+    assert gf.next_run_at == datetime(2026, 2, 1)
+
+    gf.next_run_at = datetime(2099, 1, 1)
+    db_session.commit()
+    logged_in_client.post("/gastos-fijos/generar-mes")
+
+    auto = [m for m in logged_in_client.get("/movimientos/").json() if m["is_auto_generated"]]
+    assert auto == []
+
+
+def test_actualizar_regla_recalcula_next_run_at(logged_in_client, user_category_id):
+    """Cambiar la regla recalcula la próxima ocurrencia desde la última instancia."""
+    logged_in_client.post("/movimientos/", json={
+        **_payload_gasto(user_category_id, es_fijo=True),
+        "fecha": "2026-03-02T10:00:00",
+    })
+    gf_id = logged_in_client.get("/gastos-fijos/").json()[0]["id"]
+
+    r = logged_in_client.put(f"/gastos-fijos/{gf_id}", json={"frecuencia": "weekly", "intervalo": 2})
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert data["frecuencia"] == "weekly"
+    assert data["intervalo"] == 2
+    assert data["activo"] is True
+    assert data["next_run_at"].startswith("2026-03-16")
+
+    r = logged_in_client.put(f"/gastos-fijos/{gf_id}", json={"frecuencia": "monthly", "intervalo": 1, "dia_mes": 31})
+    assert r.json()["next_run_at"].startswith("2026-04-30")  # Próximo período, recortado a 30
+
+
+def test_actualizar_regla_invalida_retorna_422(logged_in_client, user_category_id):
+    logged_in_client.post("/movimientos/", json=_payload_gasto(user_category_id, es_fijo=True))
+    gf_id = logged_in_client.get("/gastos-fijos/").json()[0]["id"]
+
+    assert logged_in_client.put(f"/gastos-fijos/{gf_id}", json={"frecuencia": "daily"}).status_code == 422
+    assert logged_in_client.put(f"/gastos-fijos/{gf_id}", json={"dia_mes": 32}).status_code == 422
+
+
+def test_generar_semanal_crea_la_ultima_ocurrencia(logged_in_client, user_category_id):
+    """Un template semanal vencido genera su ocurrencia más reciente y avanza next_run_at."""
+    hace_tres_semanas = datetime.now() - timedelta(days=21)
+    logged_in_client.post("/movimientos/", json={
+        **_payload_gasto(user_category_id, importe=50.0, es_fijo=True),
+        "fecha": hace_tres_semanas.isoformat(),
+    })
+    gf_id = logged_in_client.get("/gastos-fijos/").json()[0]["id"]
+    logged_in_client.put(f"/gastos-fijos/{gf_id}", json={"frecuencia": "weekly"})
+
+    logged_in_client.post("/gastos-fijos/generar-mes")
+    logged_in_client.post("/gastos-fijos/generar-mes")
+
+    auto = [m for m in logged_in_client.get("/movimientos/").json() if m["is_auto_generated"]]
+    assert len(auto) == 1
+    esperada = (hace_tres_semanas + timedelta(days=21)).date().isoformat()
+    assert auto[0]["fecha"].startswith(esperada)
+    gf = logged_in_client.get("/gastos-fijos/").json()[0]
+    assert datetime.fromisoformat(gf["next_run_at"]) > datetime.now()
+
+
+def _crear_template_ajeno(db_session, fecha: datetime) -> models.GastoFijo:
+    otro = models.User(username="otro", email="otro@test.com", hashed_password="x", is_active=True)
+    db_session.add(otro)
+    db_session.flush()
+    categoria = models.UserCategory(user_id=otro.id, nombre="Servicios")
+    db_session.add(categoria)
+    db_session.flush()
+    gf = models.GastoFijo(
+        user_id=otro.id, descripcion="Ajeno", user_category_id=categoria.id, activo=True,
+        next_run_at=datetime(fecha.year, fecha.month, 1),
+        max_importe=Decimal("50"), ultimo_importe=Decimal("50"), ultima_fecha=fecha, total_meses=1,
+    )
+    db_session.add(gf)
+    db_session.flush()
+    db_session.add(models.Movimiento(
+        importe=Decimal("50"), fecha=fecha, descripcion="Ajeno", tipo="gasto",
+        user_id=otro.id, user_category_id=categoria.id, gasto_fijo_id=gf.id,
+    ))
+    db_session.commit()
+    return gf
+
+
+def test_generar_mes_retorna_job_consultable(logged_in_client, user_category_id, db_session):
+    """generar-mes retorna un job cuyo estado final se consulta por id."""
+    logged_in_client.post("/movimientos/", json={
+        **_payload_gasto(user_category_id, es_fijo=True),
+        "fecha": "2026-01-01T00:00:00",
+    })
+
+    r = logged_in_client.post("/gastos-fijos/generar-mes")
+    assert r.status_code == 202, r.text
+    job = r.json()
+    assert job["status"] == "pending"
+
+    db_session.expire_all()
+    r = logged_in_client.get(f"/gastos-fijos/generar-mes/{job['id']}")
+    assert r.status_code == 200, r.text
+    assert r.json()["status"] == "success"
+    assert r.json()["rows_created"] == 1
+
+
+def test_generar_mes_coalesce_job_en_curso(logged_in_client, user_category_id, db_session):
+    """Si ya hay un job en curso del usuario, se retorna ese y no se lanza otro."""
+    logged_in_client.post("/movimientos/", json={
+        **_payload_gasto(user_category_id, es_fijo=True),
+        "fecha": "2026-01-01T00:00:00",
+    })
+    gf = db_session.query(models.GastoFijo).one()
+    en_curso = models.JobRun(
+        job_name="generacion_usuario", user_id=gf.user_id, holder="otro", status="running",
+    )
+    db_session.add(en_curso)
+    db_session.commit()
+
+    r = logged_in_client.post("/gastos-fijos/generar-mes")
+    assert r.status_code == 202, r.text
+    assert r.json()["id"] == en_curso.id
+    assert r.json()["status"] == "running"
+
+    auto = [m for m in logged_in_client.get("/movimientos/").json() if m["is_auto_generated"]]
+    assert auto == []
+
+
+def test_generar_mes_solo_afecta_al_usuario(logged_in_client, db_session):
+    """generar-mes no genera los templates vencidos de otros usuarios."""
+    gf = _crear_template_ajeno(db_session, datetime(2026, 1, 1))
+
+    logged_in_client.post("/gastos-fijos/generar-mes")
+
+    assert db_session.query(models.Movimiento).filter_by(gasto_fijo_id=gf.id).count() == 1
+
+
+def test_job_de_otro_usuario_retorna_404(logged_in_client, db_session):
+    gf = _crear_template_ajeno(db_session, datetime(2026, 1, 1))
+    job = models.JobRun(job_name="generacion_usuario", user_id=gf.user_id, holder="x", status="success")
+    db_session.add(job)
+    db_session.commit()
+
+    assert logged_in_client.get(f"/gastos-fijos/generar-mes/{job.id}").status_code == 404
+
+
 # ─── Autenticación ───────────────────────────────────────────────────────────
 
 def test_gastos_fijos_sin_auth_retorna_401(client):
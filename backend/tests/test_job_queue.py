@@ -0,0 +1,167 @@
+"""
+Tests de la cola de trabajos en segundo plano.
+Cubre: toma exclusiva, reintentos con backoff, trabajos abandonados y las tareas
+de forgot-password y del webhook de Mercado Pago.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+import models
+from services import job_queue, tareas
+
+
+@pytest.fixture
+def cola(engine_fixture):
+    """
+    Sesión con commits reales: el rollback de un trabajo fallido no debe deshacer la
+    transacción externa de db_session. Vacía la cola al terminar.
+    """
+    db = Session(bind=engine_fixture)
+    yield db
+    db.rollback()
+    db.query(models.BackgroundJob).delete()
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def tarea_de_prueba(monkeypatch):
+    """Registra la tarea "prueba", que falla mientras `fallos` tenga elementos."""
+    llamadas, fallos = [], []
+
+    def handler(db, payload):
+        llamadas.append(payload)
+        if fallos:
+            raise RuntimeError(fallos.pop())
+
+    monkeypatch.setitem(job_queue.TAREAS, "prueba", handler)
+    return llamadas, fallos
+
+
+def test_procesar_ejecuta_en_orden(cola, tarea_de_prueba):
+    llamadas, _ = tarea_de_prueba
+    for n in range(3):
+        job_queue.encolar(cola, "prueba", {"n": n})
+    cola.commit()
+
+    assert job_queue.procesar_pendientes(cola, "w1") == 3
+    assert llamadas == [{"n": 0}, {"n": 1}, {"n": 2}]
+    estados = {j.status for j in cola.query(models.BackgroundJob)}
+    assert estados == {"done"}
+    assert job_queue.procesar_pendientes(cola, "w1") == 0
+
+
+def test_un_trabajo_lo_toma_un_solo_worker(cola, tarea_de_prueba):
+    job = job_queue.encolar(cola, "prueba")
+    cola.commit()
+
+    assert job_queue.reclamar(cola, "w1") == [job.id]
+    assert job_queue.reclamar(cola, "w2") == []
+    cola.refresh(job)
+    assert (job.status, job.locked_by, job.attempts) == ("running", "w1", 1)
+
+
+def test_error_reintenta_con_backoff_y_luego_falla(cola, tarea_de_prueba):
+    _, fallos = tarea_de_prueba
+    fallos.extend(["boom"] * 3)
+    job = job_queue.encolar(cola, "prueba", max_attempts=2)
+    cola.commit()
+
+    antes = datetime.now()
+    job_queue.procesar_pendientes(cola, "w1")
+    cola.refresh(job)
+    assert (job.status, job.attempts, job.last_error) == ("pending", 1, "boom")
+    assert job.run_at >= antes + job_queue.backoff(1)
+    # No se reintenta antes de tiempo
+    assert job_queue.procesar_pendientes(cola, "w1") == 0
+
+    job.run_at = datetime.now()
+    cola.commit()
+    job_queue.procesar_pendientes(cola, "w1")
+    cola.refresh(job)
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert job.finished_at is not None
+
+
+def test_backoff_exponencial_acotado():
+    assert job_queue.backoff(2) == 2 * job_queue.backoff(1)
+    assert job_queue.backoff(50) == timedelta(seconds=job_queue.BACKOFF_MAX_SEG)
+
+
+def test_trabajo_abandonado_vuelve_a_la_cola(cola, tarea_de_prueba):
+    llamadas, _ = tarea_de_prueba
+    job = job_queue.encolar(cola, "prueba")
+    cola.commit()
+    job_queue.reclamar(cola, "caido")
+
+    job.locked_at = datetime.now() - timedelta(hours=1)
+    cola.commit()
+    assert job_queue.procesar_pendientes(cola, "w2") == 1
+    cola.refresh(job)
+    assert (job.status, job.attempts) == ("done", 2)
+    assert len(llamadas) == 1
+
+
+def test_trabajo_abandonado_sin_intentos_queda_fallido(cola, tarea_de_prueba):
+    llamadas, _ = tarea_de_prueba
+    job = job_queue.encolar(cola, "prueba", max_attempts=1)
+    cola.commit()
+    job_queue.reclamar(cola, "caido")
+
+    job.locked_at = datetime.now() - timedelta(hours=1)
+    cola.commit()
+    assert job_queue.procesar_pendientes(cola, "w2") == 0
+    cola.refresh(job)
+    assert (job.status, job.attempts, job.locked_by) == ("failed", 1, None)
+    assert "abandonado" in job.last_error
+    assert llamadas == []
+
+
+def test_tarea_no_registrada_se_reintenta(cola):
+    job = job_queue.encolar(cola, "inexistente")
+    cola.commit()
+    job_queue.procesar_pendientes(cola, "w1")
+    cola.refresh(job)
+    assert job.status == "pending"
+    assert "inexistente" in job.last_error
+
+
+def test_forgot_password_envia_el_email_fuera_del_request(client, registered_user, db_session, monkeypatch):
+    enviados = []
+
+    async def fake_send(**kwargs):
+        enviados.append(kwargs)
+        return True
+
+    monkeypatch.setattr(tareas, "send_password_reset_email", fake_send)
+    r = client.post("/auth/forgot-password", json={"email": registered_user["email"]})
+    assert r.status_code == 200
+
+    job = db_session.query(models.BackgroundJob).one()
+    assert job.kind == tareas.TAREA_EMAIL_RESET
+    assert job.status == "done"
+    token = db_session.query(models.PasswordResetToken).one()
+    assert job.payload == {"reset_token_id": token.id}
+    assert [e["reset_token"] for e in enviados] == [token.token]
+
+
+def test_webhook_reintenta_si_mp_falla(cola, mp_fake):
+    mp_fake.fallas.extend([500] * 3)
+    notificacion = models.MPNotification(data_id="123", request_id="r1", topic="payment", body={})
+    cola.add(notificacion)
+    cola.flush()
+    job = job_queue.encolar(cola, tareas.TAREA_MP_WEBHOOK, {"notification_id": notificacion.id})
+    cola.commit()
+
+    try:
+        job_queue.procesar_pendientes(cola, "w1")
+        cola.refresh(job)
+        cola.refresh(notificacion)
+        assert (job.status, job.attempts) == ("pending", 1)
+        assert "500" in job.last_error
+        assert notificacion.processed_at is None
+    finally:
+        cola.delete(notificacion)
+        cola.commit()
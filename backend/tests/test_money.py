@@ -0,0 +1,68 @@
+"""
+Tests del núcleo de dinero en centavos (money.py) y de calcular_shares.
+Cubre: conversiones, reparto por mayor resto y modos de división.
+"""
+from decimal import Decimal, ROUND_DOWN
+
+import pytest
+
+from money import a_centavos, a_decimal, repartir_proporcional
+from services.split_service import calcular_shares
+
+
+def _calcular_shares_decimal(importe: Decimal, n: int) -> list[Decimal]:
+    """Implementación original con Decimal + quantize, usada como referencia."""
+    share_base = (importe / n).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
+    remainder = importe - share_base * n
+    return [share_base + (remainder if i == 0 else Decimal('0')) for i in range(n)]
+
+
+@pytest.mark.parametrize("valor,esperado", [
+    (Decimal("12.34"), 1234),
+    (Decimal("10"), 1000),
+    (Decimal("-0.05"), -5),
+    (Decimal("0.005"), 0),
+    (Decimal("0.015"), 2),
+    (99.99, 9999),
+    ("1500.5", 150050),
+])
+def test_a_centavos(valor, esperado):
+    assert a_centavos(valor) == esperado
+
+
+def test_a_decimal_equivale_a_quantize():
+    for centavos in (0, 1, -1, 1234, -98765, 10**9):
+        esperado = (Decimal(centavos) / 100).quantize(Decimal("0.01"))
+        resultado = a_decimal(centavos)
+        assert resultado == esperado
+        assert str(resultado) == str(esperado)
+
+
+@pytest.mark.parametrize("importe", ["10", "100.00", "0.01", "33.33", "1234.57", "99999.99"])
+@pytest.mark.parametrize("n", [1, 2, 3, 7, 250])
+def test_calcular_shares_reparte_remanente_de_a_un_centavo(importe, n):
+    """Mismo total que la implementación Decimal, pero el remanente no recae en uno solo."""
+    referencia = _calcular_shares_decimal(Decimal(importe), n)
+    resultado = calcular_shares(Decimal(importe), n)
+    assert sum(resultado) == sum(referencia) == Decimal(importe)
+    assert max(resultado) - min(resultado) <= Decimal("0.01")
+    assert sorted(resultado, reverse=True) == resultado
+
+
+def test_repartir_proporcional_mayor_resto():
+    # Cuotas exactas: 333.33, 333.33, 333.33 -> el centavo sobrante va al primero (empate)
+    assert repartir_proporcional(100000, [1, 1, 1]) == [33334, 33333, 33333]
+    # Cuotas: 1000 * 1/6 = 166.67, 2/6 = 333.33, 3/6 = 500 -> el mayor resto es el primero
+    assert repartir_proporcional(1000, [1, 2, 3]) == [167, 333, 500]
+    assert sum(repartir_proporcional(99999, list(range(1, 501)))) == 99999
+
+
+@pytest.mark.parametrize("split_mode,valores,esperado", [
+    ("weights", ["2", "1", "1"], ["50.00", "25.00", "25.00"]),
+    ("weights", ["1.5", "1"], ["60.00", "40.00"]),
+    ("percentages", ["33.3", "33.3", "33.4"], ["33.30", "33.30", "33.40"]),
+    ("amounts", ["70", "30"], ["70.00", "30.00"]),
+])
+def test_calcular_shares_por_modo(split_mode, valores, esperado):
+    shares = calcular_shares(Decimal("100"), len(valores), split_mode, [Decimal(v) for v in valores])
+    assert shares == [Decimal(e) for e in esperado]
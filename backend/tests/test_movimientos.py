@@ -87,3 +87,78 @@ def test_sin_categoria_retorna_400(logged_in_client):
     }
     r = logged_in_client.post("/movimientos/", json=payload)
     assert r.status_code == 400
+
+
+# ============== RECATEGORIZE ==============
+
+def test_recategorize_con_filtros(logged_in_client, user_category_id):
+    """Solo se reasignan los movimientos que cumplen categoría actual, fechas y tipo."""
+    destino = logged_in_client.post("/user-categories/", json={"nombre": "Destino"}).json()["id"]
+    logged_in_client.post("/movimientos/", json={**_gasto(user_category_id), "fecha": "2026-01-10T00:00:00"})
+    logged_in_client.post("/movimientos/", json={**_gasto(user_category_id), "fecha": "2026-03-10T00:00:00"})
+    logged_in_client.post("/movimientos/", json={**_ingreso(user_category_id), "fecha": "2026-01-15T00:00:00"})
+    logged_in_client.post("/movimientos/", json={**_gasto(user_category_id), "es_fijo": True})
+
+    r = logged_in_client.post("/movimientos/recategorize", json={
+        "user_category_id": destino,
+        "actual_user_category_id": user_category_id,
+        "desde": "2026-01-01T00:00:00",
+        "hasta": "2026-01-31T23:59:59",
+        "tipo": "gasto",
+    })
+    assert r.status_code == 200, r.text
+    assert r.json() == {"movimientos": 1, "gastos_fijos": 1}
+
+    por_fecha = {m["fecha"][:10]: m["user_category_id"] for m in logged_in_client.get("/movimientos/").json()}
+    assert por_fecha["2026-01-10"] == destino
+    assert por_fecha["2026-03-10"] == user_category_id
+    assert por_fecha["2026-01-15"] == user_category_id
+
+
+def test_recategorize_sin_gastos_fijos(logged_in_client, user_category_id):
+    destino = logged_in_client.post("/user-categories/", json={"nombre": "Destino"}).json()["id"]
+    logged_in_client.post("/movimientos/", json={**_gasto(user_category_id), "es_fijo": True})
+
+    r = logged_in_client.post("/movimientos/recategorize", json={
+        "user_category_id": destino,
+        "actual_user_category_id": user_category_id,
+        "incluir_gastos_fijos": False,
+    })
+    assert r.json() == {"movimientos": 1, "gastos_fijos": 0}
+    assert logged_in_client.get("/gastos-fijos/").json()[0]["user_category_id"] == user_category_id
+
+
+def test_recategorize_por_fechas_no_toca_gastos_fijos(logged_in_client, user_category_id):
+    """Sin categoría actual no hay forma de elegir templates (no tienen fecha): no se tocan."""
+    destino = logged_in_client.post("/user-categories/", json={"nombre": "Destino"}).json()["id"]
+    logged_in_client.post("/movimientos/", json={**_gasto(user_category_id), "es_fijo": True})
+
+    r = logged_in_client.post("/movimientos/recategorize", json={
+        "user_category_id": destino,
+        "desde": "2020-01-01T00:00:00",
+        "hasta": "2020-01-31T23:59:59",
+    })
+    assert r.json() == {"movimientos": 0, "gastos_fijos": 0}
+    assert logged_in_client.get("/gastos-fijos/").json()[0]["user_category_id"] == user_category_id
+
+    # Pedirlos explícitamente con solo fechas o tipo → 422
+    for filtros in ({"desde": "2020-01-01T00:00:00"}, {"tipo": "gasto"}):
+        assert logged_in_client.post("/movimientos/recategorize", json={
+            "user_category_id": destino, "incluir_gastos_fijos": True, **filtros,
+        }).status_code == 422
+
+
+def test_recategorize_validaciones(logged_in_client, user_category_id):
+    # Sin destino, con dos destinos, o sin filtros → 422
+    base = {"actual_user_category_id": user_category_id}
+    assert logged_in_client.post("/movimientos/recategorize", json=base).status_code == 422
+    assert logged_in_client.post("/movimientos/recategorize", json={
+        **base, "categoria_id": 1, "user_category_id": user_category_id,
+    }).status_code == 422
+    assert logged_in_client.post("/movimientos/recategorize", json={
+        "user_category_id": user_category_id,
+    }).status_code == 422
+    # Destino inexistente → 404
+    assert logged_in_client.post("/movimientos/recategorize", json={
+        **base, "user_category_id": 99999,
+    }).status_code == 404
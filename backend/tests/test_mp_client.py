@@ -0,0 +1,133 @@
+"""
+Tests del cliente async de Mercado Pago contra el stand-in local (mp_fake.py).
+Cubre: reintentos, errores 4xx, timeouts y circuit breaker.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+import mp_fake as fake
+from services import mp_client
+from services.mp_client import MPClient, MPError, MPNoDisponible
+
+
+def _cliente(**kwargs) -> MPClient:
+    return MPClient(
+        access_token="TEST-token",
+        base_url="http://mp.fake",
+        transport=httpx.ASGITransport(app=fake.app),
+        **kwargs,
+    )
+
+
+def test_obtener_y_buscar_pagos(mp_fake):
+    pago = mp_fake.crear_pago("payment_1", status="approved")
+    mp_fake.crear_pago("payment_2")
+
+    async def consultar():
+        cliente = mp_client.get_mp_client()
+        return await cliente.obtener_pago(str(pago["id"])), await cliente.buscar_pagos(external_reference="payment_1")
+
+    obtenido, encontrados = asyncio.run(consultar())
+    assert obtenido == pago
+    assert [p["id"] for p in encontrados] == [pago["id"]]
+
+
+def test_error_4xx_no_se_reintenta(mp_fake):
+    with pytest.raises(MPError) as error:
+        asyncio.run(mp_client.get_mp_client().obtener_pago("no-existe"))
+    assert error.value.status == 404
+    assert mp_fake.pedidos == 1
+    # Un 4xx no cuenta como falla de MP
+    assert mp_client.get_mp_client().breakers[mp_client.OP_PAGO].fallos == 0
+
+
+def test_timeout_se_reintenta(mp_fake):
+    llamadas = []
+
+    def lento(request):
+        llamadas.append(request)
+        raise httpx.ReadTimeout("timeout", request=request)
+
+    cliente = MPClient(access_token="TEST-token", transport=httpx.MockTransport(lento), max_reintentos=2)
+    with pytest.raises(MPError, match="conexión"):
+        asyncio.run(cliente.buscar_pagos())
+    assert len(llamadas) == 3
+    assert cliente.breakers[mp_client.OP_BUSQUEDA].fallos == 1
+
+
+def test_circuit_breaker_abre_y_se_recupera(mp_fake, monkeypatch):
+    reloj = [1000.0]
+    monkeypatch.setattr(mp_client.time, "monotonic", lambda: reloj[0])
+    cliente = _cliente(max_reintentos=0, breaker_umbral=2, breaker_reset_seg=30)
+    mp_fake.fallas.extend([503, 503])
+
+    async def obtener():
+        return await cliente.obtener_pago("1")
+
+    for _ in range(2):
+        with pytest.raises(MPError):
+            asyncio.run(obtener())
+    # Abierto: falla sin llamar a MP, y solo para esa operación
+    with pytest.raises(MPNoDisponible):
+        asyncio.run(obtener())
+    assert mp_fake.pedidos == 2
+    assert asyncio.run(cliente.buscar_pagos()) == []
+
+    # Pasado el reset, una llamada de prueba exitosa lo cierra
+    pago = mp_fake.crear_pago("payment_1")
+    reloj[0] += 31
+    assert asyncio.run(cliente.obtener_pago(str(pago["id"])))["id"] == pago["id"]
+    assert not cliente.breakers[mp_client.OP_PAGO].abierto
+
+
+def test_circuit_breaker_half_open_deja_pasar_una_sola_prueba():
+    breaker = mp_client.CircuitBreaker(umbral=1, reset_seg=0)
+    breaker.fallo()
+    assert breaker.permitir() is True
+    assert breaker.permitir() is False
+    breaker.fallo()
+    assert breaker.permitir() is True
+
+
+def test_prueba_half_open_cancelada_no_traba_el_circuito():
+    colgar = [True]
+
+    async def responder(request):
+        if colgar[0]:
+            await asyncio.sleep(60)
+        return httpx.Response(200, json={"id": 1})
+
+    cliente = MPClient(access_token="TEST-token", transport=httpx.MockTransport(responder),
+                       max_reintentos=0, breaker_umbral=1, breaker_reset_seg=0)
+    breaker = cliente.breakers[mp_client.OP_PAGO]
+    breaker.fallo()
+
+    async def prueba_cancelada():
+        tarea = asyncio.create_task(cliente.obtener_pago("1"))
+        await asyncio.sleep(0.01)
+        tarea.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarea
+
+    asyncio.run(prueba_cancelada())
+    # La prueba cancelada no cuenta como falla y la siguiente llamada vuelve a probar
+    assert breaker.fallos == 1
+    colgar[0] = False
+    assert asyncio.run(cliente.obtener_pago("1")) == {"id": 1}
+    assert not breaker.abierto
+
+
+def test_error_inesperado_en_la_prueba_reabre_el_circuito():
+    def roto(request):
+        raise httpx.DecodingError("respuesta corrupta", request=request)
+
+    cliente = MPClient(access_token="TEST-token", transport=httpx.MockTransport(roto),
+                       max_reintentos=0, breaker_umbral=1, breaker_reset_seg=0)
+    breaker = cliente.breakers[mp_client.OP_PAGO]
+    breaker.fallo()
+    with pytest.raises(httpx.DecodingError):
+        asyncio.run(cliente.obtener_pago("1"))
+    assert breaker.fallos == 2
+    assert breaker.permitir() is True
@@ -0,0 +1,314 @@
+"""
+Tests de pagos con Mercado Pago (contra el stand-in local mp_fake.py).
+Cubre: creación de preferencia, consulta de estado cacheada, webhook sin consultar a MP,
+deduplicación de reentregas, aplicación idempotente, unicidad de mp_payment_id,
+reconciliación programada de pendientes y pagos aprobados en los saldos del grupo.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import BackgroundTasks
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from database import get_db
+from main import app
+from services import payment_service, payment_status
+
+
+def _payment(db, **kwargs) -> models.Payment:
+    payment = models.Payment(group_id=1, from_member_id=1, to_member_id=2, amount=Decimal("100"), **kwargs)
+    db.add(payment)
+    db.commit()
+    return payment
+
+
+def _notificar(client, mp_payment_id, request_id="req-1"):
+    return client.post(
+        "/payments/webhook",
+        json={"type": "payment", "action": "payment.updated", "data": {"id": mp_payment_id}},
+        headers={"x-request-id": request_id},
+    )
+
+
+def _crear_preferencia(client, group: dict) -> dict:
+    otros = [m for m in group["members"] if not m["is_creator"]]
+    r = client.post("/payments/create-preference", json={
+        "group_id": group["id"],
+        "from_member_id": otros[0]["id"],
+        "to_member_id": otros[1]["id"],
+        "amount": 150.5,
+    })
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_crear_preferencia(logged_in_client, split_group, db_session, mp_fake):
+    creada = _crear_preferencia(logged_in_client, split_group)
+
+    payment = db_session.get(models.Payment, creada["payment_id"])
+    preferencia = mp_fake.preferencias[payment.mp_preference_id]
+    assert creada["init_point"] == preferencia["init_point"]
+    assert preferencia["external_reference"] == f"payment_{payment.id}"
+    assert preferencia["items"][0]["unit_price"] == 150.5
+
+
+def test_crear_preferencia_reintenta_errores_transitorios(logged_in_client, split_group, mp_fake):
+    mp_fake.fallas.extend([503, 502])
+    _crear_preferencia(logged_in_client, split_group)
+    assert mp_fake.pedidos == 3
+    assert len(mp_fake.preferencias) == 1
+
+
+def test_crear_preferencia_con_mp_caido_descarta_el_pago(logged_in_client, split_group, db_session, mp_fake):
+    mp_fake.fallas.extend([500] * 3)
+    r = logged_in_client.post("/payments/create-preference", json={
+        "group_id": split_group["id"],
+        "from_member_id": split_group["members"][1]["id"],
+        "to_member_id": split_group["members"][2]["id"],
+        "amount": 10,
+    })
+    assert r.status_code == 500
+    assert "Mercado Pago" in r.json()["detail"]
+    assert db_session.query(models.Payment).count() == 0
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr(payment_status.time, "monotonic", lambda: ahora[0])
+    return ahora
+
+
+def test_estado_pendiente_se_consulta_en_mp_con_cache(logged_in_client, split_group, mp_fake, reloj):
+    creada = _crear_preferencia(logged_in_client, split_group)
+    url = f"/payments/{creada['payment_id']}/status"
+    pedidos = mp_fake.pedidos
+
+    assert logged_in_client.get(url).json()["status"] == "pending"
+    assert mp_fake.pedidos == pedidos + 1
+
+    pago = mp_fake.crear_pago(f"payment_{creada['payment_id']}", status="approved")
+    # Dentro del TTL no se consulta a MP
+    assert logged_in_client.get(url).json()["status"] == "pending"
+    assert mp_fake.pedidos == pedidos + 1
+
+    # Vencido el TTL se responde lo cacheado y se refresca en segundo plano
+    reloj[0] += 10
+    assert logged_in_client.get(url).json()["status"] == "pending"
+    assert mp_fake.pedidos == pedidos + 2
+
+    r = logged_in_client.get(url)
+    assert (r.json()["status"], r.json()["mp_payment_id"]) == ("approved", str(pago["id"]))
+    assert creada["payment_id"] not in payment_status._entradas
+
+
+@pytest.mark.parametrize("estado", ["in_process", "authorized"])
+def test_estado_no_final_se_sigue_consultando_en_mp(logged_in_client, split_group, db_session, mp_fake, estado):
+    creada = _crear_preferencia(logged_in_client, split_group)
+    payment = db_session.get(models.Payment, creada["payment_id"])
+    payment.status = estado
+    db_session.commit()
+    pago = mp_fake.crear_pago(f"payment_{payment.id}", status="approved")
+
+    r = logged_in_client.get(f"/payments/{payment.id}/status")
+    assert (r.json()["status"], r.json()["mp_payment_id"]) == ("approved", str(pago["id"]))
+
+
+def _refrescar_n(payment_id: int, n: int, concurrentes: bool = False):
+    async def una():
+        tareas = BackgroundTasks()
+        await payment_status.refrescar(None, payment_id, tareas)
+        await tareas()
+
+    async def todas():
+        if concurrentes:
+            await asyncio.gather(*(una() for _ in range(n)))
+        else:
+            for _ in range(n):
+                await una()
+
+    asyncio.run(todas())
+
+
+def test_consultas_concurrentes_comparten_una_busqueda(mp_fake):
+    mp_fake.latencia_ms = 50
+    _refrescar_n(1, 10, concurrentes=True)
+    assert mp_fake.pedidos == 1
+
+
+def test_tope_de_consultas_por_minuto(mp_fake, reloj, monkeypatch):
+    monkeypatch.setattr(payment_status.config, "PAYMENT_STATUS_TTL_SECONDS", 0)
+    monkeypatch.setattr(payment_status.config, "PAYMENT_STATUS_MAX_LOOKUPS_PER_MINUTE", 3)
+    for _ in range(5):
+        _refrescar_n(1, 1)
+        reloj[0] += 1
+    assert mp_fake.pedidos == 3
+
+    # Pasado el minuto se vuelve a consultar
+    reloj[0] += 60
+    _refrescar_n(1, 1)
+    assert mp_fake.pedidos == 4
+
+
+def test_webhook_guarda_notificacion_y_aplica_el_pago(client, db_session, mp_fake):
+    payment = _payment(db_session)
+    pago = mp_fake.crear_pago(f"payment_{payment.id}", status="approved")
+
+    r = _notificar(client, pago["id"])
+    assert r.status_code == 200
+
+    notificacion = db_session.query(models.MPNotification).one()
+    assert (notificacion.data_id, notificacion.request_id, notificacion.topic) == (str(pago["id"]), "req-1", "payment")
+    assert notificacion.body["data"] == {"id": pago["id"]}
+    assert notificacion.processed_at is not None
+    db_session.refresh(payment)
+    assert (payment.mp_payment_id, payment.status) == (str(pago["id"]), "approved")
+
+
+@pytest.fixture
+def client_con_commits(client, engine_fixture):
+    """
+    Cliente cuyas sesiones commitean de verdad: la notificación duplicada hace rollback,
+    que con db_session desharía la transacción externa del test.
+    """
+    def override_get_db():
+        db = Session(bind=engine_fixture)
+        try:
+            yield db
+        finally:
+            db.close()
+    app.dependency_overrides[get_db] = override_get_db
+    yield client
+    db = Session(bind=engine_fixture)
+    db.query(models.BackgroundJob).delete()
+    db.query(models.MPNotification).delete()
+    db.query(models.Payment).delete()
+    db.commit()
+    db.close()
+
+
+def test_reentrega_no_se_vuelve_a_procesar(client_con_commits, engine_fixture, mp_fake):
+    pago = mp_fake.crear_pago("otro")
+
+    assert _notificar(client_con_commits, pago["id"]).status_code == 200
+    assert _notificar(client_con_commits, pago["id"]).status_code == 200
+    # Otra entrega (otro x-request-id) sí se procesa: el estado pudo cambiar
+    assert _notificar(client_con_commits, pago["id"], request_id="req-2").status_code == 200
+
+    with Session(bind=engine_fixture) as db:
+        assert db.query(models.MPNotification).count() == 2
+        assert db.query(models.BackgroundJob).count() == 2
+    assert mp_fake.pedidos == 2
+
+
+def test_actualizar_desde_mp_es_idempotente(db_session):
+    payment = _payment(db_session)
+    mp_payment = {"id": 9, "external_reference": f"payment_{payment.id}", "status": "approved"}
+
+    payment_service.actualizar_desde_mp(db_session, mp_payment)
+    db_session.refresh(payment)
+    actualizado = payment.updated_at
+
+    payment_service.actualizar_desde_mp(db_session, mp_payment)
+    db_session.refresh(payment)
+    assert (payment.mp_payment_id, payment.updated_at) == ("9", actualizado)
+
+
+def test_mp_payment_id_es_unico(engine_fixture):
+    with Session(bind=engine_fixture) as db:
+        _payment(db, mp_payment_id="42")
+        with pytest.raises(IntegrityError):
+            _payment(db, mp_payment_id="42")
+        db.rollback()
+        db.query(models.Payment).delete()
+        db.commit()
+
+
+def test_reconciliacion_resuelve_pendientes_viejos(db_session, mp_fake, monkeypatch):
+    monkeypatch.setattr(payment_service, "TAMANIO_PAGINA", 2)
+    hace_una_hora = datetime.now() - timedelta(hours=1)
+    aprobado, rechazado, sigue_pendiente, sin_pago = (
+        _payment(db_session, mp_preference_id=f"pref-{i}", created_at=hace_una_hora) for i in range(4)
+    )
+    reciente = _payment(db_session, mp_preference_id="pref-reciente")
+    viejo = _payment(db_session, mp_preference_id="pref-viejo", created_at=datetime.now() - timedelta(days=30))
+    for payment in (reciente, viejo):
+        mp_fake.crear_pago(f"payment_{payment.id}")
+    pagos = {
+        aprobado.id: mp_fake.crear_pago(f"payment_{aprobado.id}", status="approved"),
+        rechazado.id: mp_fake.crear_pago(f"payment_{rechazado.id}", status="rejected"),
+        sigue_pendiente.id: mp_fake.crear_pago(f"payment_{sigue_pendiente.id}", status="pending"),
+    }
+
+    assert payment_service.reconciliar_pendientes(db_session, antiguedad_min=10) == 2
+
+    # Solo se consultan los pendientes dentro de la ventana de antigüedad
+    assert mp_fake.pedidos == 4
+    for payment in (aprobado, rechazado, sigue_pendiente, sin_pago, reciente, viejo):
+        db_session.refresh(payment)
+    assert (aprobado.status, aprobado.mp_payment_id) == ("approved", str(pagos[aprobado.id]["id"]))
+    assert rechazado.status == "rejected"
+    assert (sigue_pendiente.status, sigue_pendiente.mp_payment_id) == ("pending", str(pagos[sigue_pendiente.id]["id"]))
+    assert (sin_pago.status, sin_pago.mp_payment_id) == ("pending", None)
+    assert reciente.status == viejo.status == "pending"
+
+
+def test_reconciliacion_sigue_los_estados_no_finales(db_session, mp_fake):
+    payment = _payment(db_session, mp_preference_id="pref-1", created_at=datetime.now() - timedelta(hours=1))
+    pago = mp_fake.crear_pago(f"payment_{payment.id}", status="in_process")
+
+    # in_process se guarda pero no cuenta como resuelto ni sale de la reconciliación
+    assert payment_service.reconciliar_pendientes(db_session, antiguedad_min=10) == 0
+    db_session.refresh(payment)
+    assert payment.status == "in_process"
+
+    pago["status"] = "approved"
+    assert payment_service.reconciliar_pendientes(db_session, antiguedad_min=10) == 1
+    db_session.refresh(payment)
+    assert payment.status == "approved"
+
+
+def test_reconciliacion_tolera_errores_de_mp(db_session, mp_fake):
+    payment = _payment(db_session, mp_preference_id="pref-1", created_at=datetime.now() - timedelta(hours=1))
+    mp_fake.crear_pago(f"payment_{payment.id}", status="approved")
+    mp_fake.fallas.extend([400])
+
+    assert payment_service.reconciliar_pendientes(db_session, antiguedad_min=10) == 0
+    # La corrida siguiente lo resuelve
+    assert payment_service.reconciliar_pendientes(db_session, antiguedad_min=10) == 1
+
+
+def _saldos(client, group: dict) -> dict:
+    r = client.get(f"/split-groups/{group['id']}/balances")
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_pagos_aprobados_liquidan_saldos(logged_in_client, split_group, db_session):
+    yo, juan, ana = (m["id"] for m in split_group["members"])
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json={
+        "descripcion": "Cena", "importe": 300, "paid_by_member_id": yo, "participant_member_ids": [yo, juan, ana],
+    })
+    assert r.status_code == 200, r.text
+
+    # Juan paga todo y Ana la mitad; el pago pendiente marca la transferencia
+    for from_member_id, amount, status in ((juan, "100", "approved"), (ana, "60", "approved"), (ana, "40", "pending")):
+        db_session.add(models.Payment(
+            group_id=split_group["id"], from_member_id=from_member_id, to_member_id=yo,
+            amount=Decimal(amount), status=status,
+        ))
+    db_session.commit()
+
+    saldos = _saldos(logged_in_client, split_group)
+    netos = {b["member_id"]: (b["total_settled"], b["net_balance"]) for b in saldos["balances"]}
+    assert netos == {yo: (-160.0, 40.0), juan: (100.0, 0.0), ana: (60.0, -40.0)}
+    transferencia, = saldos["simplified_debts"]
+    assert (transferencia["from_member_id"], transferencia["amount"]) == (ana, 40.0)
+    assert (transferencia["paid_amount"], transferencia["payment_status"]) == (60.0, "pending")
+
+    resumen, = (g["summary"] for g in logged_in_client.get("/split-groups/?include=summary").json())
+    assert (resumen["creator_net_balance"], resumen["pending_payments"]) == (40.0, 1)
@@ -0,0 +1,107 @@
+"""
+Presupuesto de SQL por endpoint de grupos divididos.
+Verifica que la cantidad de sentencias sea fija y que las filas y valores leídos
+crezcan linealmente con los datos: cada entidad se lee una sola vez, sin repetir
+las columnas del padre por cada hijo (producto cartesiano de joinedload).
+"""
+from decimal import Decimal
+
+import pytest
+
+import models
+
+# (miembros, gastos) de un grupo chico y uno grande
+TAMANIOS = [(2, 2), (12, 15)]
+
+
+def _cols(*modelos) -> int:
+    return sum(len(m.__table__.columns) for m in modelos)
+
+
+def _poblar_grupo(db_session, user_id: int, n_miembros: int, n_gastos: int) -> dict:
+    """Crea un grupo con n_miembros (creador incluido) y n_gastos compartidos por todos."""
+    group = models.SplitGroup(nombre="Grupo", creator_id=user_id)
+    db_session.add(group)
+    db_session.flush()
+
+    members = [models.SplitGroupMember(group_id=group.id, is_creator=True, display_name="Yo")]
+    for i in range(n_miembros - 1):
+        contact = models.Contact(owner_id=user_id, nombre=f"Contacto {i}")
+        db_session.add(contact)
+        db_session.flush()
+        members.append(models.SplitGroupMember(
+            group_id=group.id, contact_id=contact.id, display_name=contact.nombre,
+        ))
+    db_session.add_all(members)
+    db_session.flush()
+
+    for i in range(n_gastos):
+        expense = models.SplitExpense(
+            group_id=group.id, descripcion=f"Gasto {i}", importe=Decimal(n_miembros * 10),
+            paid_by_member_id=members[i % n_miembros].id,
+        )
+        db_session.add(expense)
+        db_session.flush()
+        db_session.add_all([
+            models.SplitExpenseParticipant(expense_id=expense.id, member_id=m.id, share_amount=Decimal(10))
+            for m in members
+        ])
+    db_session.flush()
+    db_session.expunge_all()
+    return {"id": group.id, "miembros": n_miembros, "gastos": n_gastos, "participaciones": n_miembros * n_gastos}
+
+
+@pytest.fixture
+def user_id(logged_in_client, registered_user, db_session) -> int:
+    return db_session.query(models.User.id).filter(
+        models.User.username == registered_user["username"],
+    ).scalar()
+
+
+def _medir(client, sql_counter, url: str):
+    sql_counter.reset()
+    r = client.get(url)
+    assert r.status_code == 200, r.text
+    return sql_counter
+
+
+@pytest.mark.parametrize("n_miembros,n_gastos", TAMANIOS)
+def test_list_split_groups(logged_in_client, db_session, user_id, sql_counter, n_miembros, n_gastos):
+    grupo = _poblar_grupo(db_session, user_id, n_miembros, n_gastos)
+    stats = _medir(logged_in_client, sql_counter, "/split-groups/")
+    assert stats.statements <= 3
+    # usuario + grupo + miembros (con su contacto)
+    assert stats.rows <= 2 + grupo["miembros"]
+    assert stats.values <= (
+        _cols(models.User, models.SplitGroup)
+        + grupo["miembros"] * _cols(models.SplitGroupMember, models.Contact)
+    )
+
+
+@pytest.mark.parametrize("n_miembros,n_gastos", TAMANIOS)
+def test_list_split_expenses(logged_in_client, db_session, user_id, sql_counter, n_miembros, n_gastos):
+    grupo = _poblar_grupo(db_session, user_id, n_miembros, n_gastos)
+    stats = _medir(logged_in_client, sql_counter, f"/split-groups/{grupo['id']}/expenses")
+    assert stats.statements <= 4
+    # usuario + grupo + gastos (con pagador) + participaciones (con miembro)
+    assert stats.rows <= 2 + grupo["gastos"] + grupo["participaciones"]
+    assert stats.values <= (
+        _cols(models.User, models.SplitGroup)
+        + grupo["gastos"] * _cols(models.SplitExpense, models.SplitGroupMember, models.Contact)
+        + grupo["participaciones"] * _cols(models.SplitExpenseParticipant, models.SplitGroupMember, models.Contact)
+    )
+
+
+@pytest.mark.parametrize("n_miembros,n_gastos", TAMANIOS)
+def test_get_group_balances(logged_in_client, db_session, user_id, sql_counter, n_miembros, n_gastos):
+    grupo = _poblar_grupo(db_session, user_id, n_miembros, n_gastos)
+    stats = _medir(logged_in_client, sql_counter, f"/split-groups/{grupo['id']}/balances")
+    assert stats.statements <= 6
+    # usuario + grupo + miembros + una fila agregada por miembro (sin pagos): no crece con los gastos
+    assert stats.rows <= 2 + 2 * grupo["miembros"]
+    # De los totales se lee (miembro, pagado, consumido, liquidado)
+    assert stats.values <= (
+        _cols(models.User, models.SplitGroup, models.User)
+        + grupo["miembros"] * _cols(models.SplitGroupMember, models.Contact)
+        + 4 * grupo["miembros"]
+    )
@@ -0,0 +1,47 @@
+"""
+Tests del servicio de recurrencia de gastos fijos.
+Cubre: frecuencias, intervalos, día del mes (con meses cortos) y ocurrencias vencidas.
+"""
+from datetime import datetime
+
+from services.recurrence_service import siguiente_ocurrencia, ultima_ocurrencia_vencida
+
+
+def test_mensual_por_defecto_es_el_dia_1_del_mes_siguiente():
+    assert siguiente_ocurrencia(datetime(2026, 1, 15, 18, 30)) == datetime(2026, 2, 1)
+    assert siguiente_ocurrencia(datetime(2026, 12, 1)) == datetime(2027, 1, 1)
+
+
+def test_mensual_con_dia_mes_usa_el_ultimo_dia_si_no_existe():
+    assert siguiente_ocurrencia(datetime(2026, 1, 31), "monthly", 1, 31) == datetime(2026, 2, 28)
+    # No arrastra el recorte: de febrero vuelve al 31
+    assert siguiente_ocurrencia(datetime(2026, 2, 28), "monthly", 1, 31) == datetime(2026, 3, 31)
+
+
+def test_cada_n_meses():
+    assert siguiente_ocurrencia(datetime(2026, 11, 10), "monthly", 3, 10) == datetime(2027, 2, 10)
+
+
+def test_semanal_y_quincenal():
+    assert siguiente_ocurrencia(datetime(2026, 3, 2, 9), "weekly") == datetime(2026, 3, 9)
+    assert siguiente_ocurrencia(datetime(2026, 3, 2), "biweekly") == datetime(2026, 3, 16)
+    assert siguiente_ocurrencia(datetime(2026, 3, 2), "weekly", 3) == datetime(2026, 3, 23)
+
+
+def test_anual():
+    assert siguiente_ocurrencia(datetime(2026, 5, 20), "yearly") == datetime(2027, 5, 20)
+    assert siguiente_ocurrencia(datetime(2028, 2, 29), "yearly") == datetime(2029, 2, 28)
+
+
+def test_ultima_ocurrencia_vencida_saltea_las_intermedias():
+    ocurrencia, siguiente = ultima_ocurrencia_vencida(
+        datetime(2026, 1, 5), datetime(2026, 2, 3, 12), "weekly",
+    )
+    assert ocurrencia == datetime(2026, 2, 2)
+    assert siguiente == datetime(2026, 2, 9)
+
+
+def test_ultima_ocurrencia_vencida_exacta():
+    ocurrencia, siguiente = ultima_ocurrencia_vencida(datetime(2026, 3, 1), datetime(2026, 3, 1))
+    assert ocurrencia == datetime(2026, 3, 1)
+    assert siguiente == datetime(2026, 4, 1)
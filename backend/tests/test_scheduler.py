@@ -0,0 +1,84 @@
+"""
+Tests del scheduler con líder único.
+Cubre: lease exclusivo entre procesos, vencimiento y renovación, historial de jobs.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import models
+from services.scheduler_service import adquirir_lease, ejecutar_job, liberar_lease
+
+
+@pytest.fixture(autouse=True)
+def _limpiar_scheduler(db_session):
+    db_session.query(models.SchedulerLease).delete()
+    db_session.query(models.JobRun).delete()
+    db_session.commit()
+
+
+def test_lease_es_exclusivo(db_session):
+    """Solo un holder obtiene el lease vigente; el mismo holder puede renovarlo."""
+    assert adquirir_lease(db_session, holder="a") is True
+    assert adquirir_lease(db_session, holder="b") is False
+    assert adquirir_lease(db_session, holder="a") is True
+
+    lease = db_session.query(models.SchedulerLease).one()
+    assert lease.holder == "a"
+
+
+def test_lease_vencido_se_puede_tomar(db_session):
+    """Si el líder deja vencer el lease, otro proceso toma el liderazgo."""
+    assert adquirir_lease(db_session, holder="a") is True
+    db_session.query(models.SchedulerLease).update(
+        {"expires_at": datetime.now() - timedelta(seconds=1)}
+    )
+    db_session.commit()
+
+    assert adquirir_lease(db_session, holder="b") is True
+    assert db_session.query(models.SchedulerLease).one().holder == "b"
+
+
+def test_liberar_lease(db_session):
+    """Al liberar el lease otro proceso lo obtiene sin esperar el vencimiento."""
+    adquirir_lease(db_session, holder="a")
+    liberar_lease(db_session, holder="b")  # No lo tiene: no hace nada
+    assert adquirir_lease(db_session, holder="b") is False
+
+    liberar_lease(db_session, holder="a")
+    assert adquirir_lease(db_session, holder="b") is True
+
+
+def test_ejecutar_job_registra_historial(db_session):
+    """El líder ejecuta el job y registra duración y filas creadas."""
+    run = ejecutar_job(db_session, "prueba", lambda db: 7, holder="a")
+
+    assert run.status == "success"
+    assert run.rows_created == 7
+    assert run.finished_at is not None
+    assert run.duration_ms >= 0
+    assert db_session.query(models.JobRun).count() == 1
+
+
+def test_ejecutar_job_registra_error(db_session):
+    """Un error del job queda registrado en el historial."""
+    def falla(db):
+        raise RuntimeError("boom")
+
+    run = ejecutar_job(db_session, "prueba", falla, holder="a")
+
+    assert run.status == "error"
+    assert run.error == "boom"
+    assert run.rows_created is None
+
+
+def test_ejecutar_job_no_lider_se_omite(db_session):
+    """Si otro proceso tiene el lease, el job no se ejecuta ni se registra."""
+    adquirir_lease(db_session, holder="a")
+    llamadas = []
+
+    run = ejecutar_job(db_session, "prueba", lambda db: llamadas.append(1) or 0, holder="b")
+
+    assert run is None
+    assert llamadas == []
+    assert db_session.query(models.JobRun).count() == 0
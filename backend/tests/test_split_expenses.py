@@ -0,0 +1,112 @@
+"""
+Tests de gastos divididos: /split-groups/{group_id}/expenses
+Cubre: división igual, por pesos, por porcentajes y por montos, y sus validaciones.
+"""
+
+import pytest
+
+
+def _member_ids(group: dict) -> list[int]:
+    return sorted(m["id"] for m in group["members"])
+
+
+def _payload(group: dict, importe: float, **extra) -> dict:
+    ids = _member_ids(group)
+    return {
+        "descripcion": "Cena",
+        "importe": importe,
+        "paid_by_member_id": ids[0],
+        "participant_member_ids": ids,
+        **extra,
+    }
+
+
+def _shares(expense: dict) -> dict:
+    return {p["member_id"]: p["share_amount"] for p in expense["participants"]}
+
+
+def test_division_igual_reparte_centavos(logged_in_client, split_group):
+    ids = _member_ids(split_group)
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json=_payload(split_group, 100.0))
+    assert r.status_code == 200, r.text
+    assert _shares(r.json()) == {ids[0]: 33.34, ids[1]: 33.33, ids[2]: 33.33}
+
+
+def test_division_por_pesos(logged_in_client, split_group):
+    ids = _member_ids(split_group)
+    payload = _payload(split_group, 100.0, split_mode="weights", participant_values=[2, 1, 1])
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json=payload)
+    assert r.status_code == 200, r.text
+    assert _shares(r.json()) == {ids[0]: 50.0, ids[1]: 25.0, ids[2]: 25.0}
+
+
+def test_division_por_porcentajes_suma_exacta(logged_in_client, split_group):
+    ids = _member_ids(split_group)
+    payload = _payload(split_group, 10.0, split_mode="percentages", participant_values=[33.33, 33.33, 33.34])
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json=payload)
+    assert r.status_code == 200, r.text
+    shares = _shares(r.json())
+    assert round(sum(shares.values()), 2) == 10.0
+    assert shares[ids[2]] == 3.34
+
+
+def test_division_por_montos(logged_in_client, split_group):
+    ids = _member_ids(split_group)
+    payload = _payload(split_group, 90.0, split_mode="amounts", participant_values=[50, 25.5, 14.5])
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json=payload)
+    assert r.status_code == 200, r.text
+    assert _shares(r.json()) == {ids[0]: 50.0, ids[1]: 25.5, ids[2]: 14.5}
+
+
+def test_montos_que_no_suman_el_importe_retorna_422(logged_in_client, split_group):
+    payload = _payload(split_group, 90.0, split_mode="amounts", participant_values=[50, 25, 14])
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json=payload)
+    assert r.status_code == 422, r.text
+
+
+def test_porcentajes_que_no_suman_100_retorna_422(logged_in_client, split_group):
+    payload = _payload(split_group, 90.0, split_mode="percentages", participant_values=[50, 25, 20])
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json=payload)
+    assert r.status_code == 422, r.text
+
+
+def test_valores_sin_un_valor_por_participante_retorna_422(logged_in_client, split_group):
+    payload = _payload(split_group, 90.0, split_mode="weights", participant_values=[1, 1])
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json=payload)
+    assert r.status_code == 422, r.text
+
+
+@pytest.mark.parametrize("split_mode, valores", [
+    ("weights", ["1", "1e-9999999", "1"]),
+    ("weights", ["1", "1e-300000", "1"]),
+    ("amounts", ["1e30", "1", "1"]),
+])
+def test_valores_fuera_de_rango_retorna_422(logged_in_client, split_group, split_mode, valores):
+    """Pesos con exponentes enormes o montos gigantes se rechazan sin escalarlos ni cuantizarlos."""
+    payload = _payload(split_group, 90.0, split_mode=split_mode, participant_values=valores)
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json=payload)
+    assert r.status_code == 422, r.text
+
+
+def test_participante_duplicado_retorna_400(logged_in_client, split_group):
+    ids = _member_ids(split_group)
+    payload = {**_payload(split_group, 90.0), "participant_member_ids": [ids[0], ids[0]]}
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json=payload)
+    assert r.status_code == 400, r.text
+
+
+def test_pagador_fuera_del_grupo_retorna_400(logged_in_client, split_group):
+    payload = {**_payload(split_group, 90.0), "paid_by_member_id": 999999}
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json=payload)
+    assert r.status_code == 400, r.text
+
+
+def test_actualizar_cambia_modo_de_division(logged_in_client, split_group):
+    ids = _member_ids(split_group)
+    r = logged_in_client.post(f"/split-groups/{split_group['id']}/expenses", json=_payload(split_group, 60.0))
+    expense_id = r.json()["id"]
+
+    payload = _payload(split_group, 60.0, split_mode="weights", participant_values=[1, 1, 4])
+    r = logged_in_client.put(f"/split-groups/{split_group['id']}/expenses/{expense_id}", json=payload)
+    assert r.status_code == 200, r.text
+    assert _shares(r.json()) == {ids[0]: 10.0, ids[1]: 10.0, ids[2]: 40.0}
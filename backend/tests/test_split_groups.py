@@ -0,0 +1,45 @@
+"""
+Tests de grupos divididos: /split-groups/
+Cubre: listado con ?include=summary.
+"""
+
+
+def _gasto(group: dict, importe: float, paid_by: int) -> dict:
+    return {
+        "descripcion": "Super",
+        "importe": importe,
+        "paid_by_member_id": paid_by,
+        "participant_member_ids": [m["id"] for m in group["members"]],
+    }
+
+
+def test_listar_grupos_sin_summary(logged_in_client, split_group):
+    r = logged_in_client.get("/split-groups/")
+    assert r.status_code == 200, r.text
+    assert r.json()[0]["summary"] is None
+
+
+def test_listar_grupos_con_summary(logged_in_client, split_group):
+    creator = next(m for m in split_group["members"] if m["is_creator"])
+    otro = next(m for m in split_group["members"] if not m["is_creator"])
+    base = f"/split-groups/{split_group['id']}/expenses"
+    assert logged_in_client.post(base, json=_gasto(split_group, 90.0, creator["id"])).status_code == 200
+    assert logged_in_client.post(base, json=_gasto(split_group, 30.0, otro["id"])).status_code == 200
+
+    # Un segundo grupo sin gastos también debe traer su resumen
+    logged_in_client.post("/split-groups/", json={"nombre": "Vacío"})
+
+    r = logged_in_client.get("/split-groups/?include=summary")
+    assert r.status_code == 200, r.text
+    resumenes = {g["id"]: g["summary"] for g in r.json()}
+    assert len(resumenes) == 2
+
+    resumen = resumenes[split_group["id"]]
+    assert resumen["total_expenses"] == 120.0
+    assert resumen["expense_count"] == 2
+    # El creador pagó 90 y le corresponden 30 + 10
+    assert resumen["creator_net_balance"] == 50.0
+    assert resumen["pending_payments"] == 0
+
+    vacio = next(s for gid, s in resumenes.items() if gid != split_group["id"])
+    assert vacio == {"total_expenses": 0.0, "expense_count": 0, "creator_net_balance": 0.0, "pending_payments": 0}
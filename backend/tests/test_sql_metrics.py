@@ -0,0 +1,39 @@
+"""
+Tests de instrumentación SQL por request (sql_metrics.py).
+Cubre: header Server-Timing, log de queries lentas y normalización de SQL.
+"""
+import logging
+
+import config
+from sql_metrics import normalizar_sql
+
+
+def test_server_timing_informa_queries(logged_in_client):
+    r = logged_in_client.get("/movimientos/")
+    assert r.status_code == 200, r.text
+    header = r.headers["Server-Timing"]
+    assert header.startswith("db;dur=")
+    # Al menos la consulta del usuario autenticado y la del listado
+    queries = int(header.split('desc="')[1].split(" ")[0])
+    assert queries >= 2
+
+
+def test_request_sin_db_no_cuenta_queries(client):
+    r = client.get("/")
+    assert 'desc="0 queries"' in r.headers["Server-Timing"]
+
+
+def test_query_lenta_se_loguea_normalizada(logged_in_client, monkeypatch, caplog):
+    monkeypatch.setattr(config, "SLOW_QUERY_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="finanzaapp"):
+        logged_in_client.get("/movimientos/")
+    slow = [r.getMessage() for r in caplog.records if r.getMessage().startswith("slow query")]
+    assert slow
+    assert any("FROM movimientos" in m for m in slow)
+
+
+def test_normalizar_sql():
+    sql = """SELECT * FROM movimientos
+             WHERE id IN (?, ?, ?) AND tipo = 'gasto' AND importe > 100"""
+    assert normalizar_sql(sql) == "SELECT * FROM movimientos WHERE id IN (...) AND tipo = ? AND importe > ?"
+    assert normalizar_sql("SELECT a FROM t WHERE x IN (%(p_1)s, %(p_2)s)") == "SELECT a FROM t WHERE x IN (...)"
@@ -0,0 +1,44 @@
+"""
+Worker de la cola de trabajos en segundo plano (emails, Mercado Pago, generación de
+gastos fijos). Se pueden correr varios en paralelo, en esta u otras máquinas; con
+workers separados conviene JOB_WORKER_IN_PROCESS=false en la API.
+Uso: python worker.py [--once] [--poll SEGUNDOS]
+"""
+import argparse
+import logging
+import signal
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import SessionLocal
+from services import job_queue, tareas  # noqa: F401 (tareas registra los handlers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de la cola de trabajos")
+    parser.add_argument("--once", action="store_true", help="Procesar un lote y salir")
+    parser.add_argument("--poll", type=float, default=None,
+                        help="Segundos de espera sin trabajos (default: JOB_POLL_SECONDS)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.once:
+        db = SessionLocal()
+        try:
+            procesados = job_queue.procesar_pendientes(db)
+        finally:
+            db.close()
+        print(f"Trabajos procesados: {procesados}")
+        return
+
+    detener = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: detener.set())
+    signal.signal(signal.SIGINT, lambda *_: detener.set())
+    job_queue.correr_worker(detener, poll_seg=args.poll)
+
+
+if __name__ == "__main__":
+    main()
@@ -89,6 +89,9 @@ function GroupBalances({ balances, loading }: GroupBalancesProps) {
                 <p className="text-white font-semibold">{balance.display_name}</p>
                 <p className="text-xs text-slate-400">
                   Pago ${balance.total_paid.toLocaleString('es-AR', { minimumFractionDigits: 2 })} | Le corresponde ${balance.total_share.toLocaleString('es-AR', { minimumFractionDigits: 2 })}
+                  {balance.total_settled !== 0 && (
+                    <> | {balance.total_settled > 0 ? 'Transfirió' : 'Recibió'} ${Math.abs(balance.total_settled).toLocaleString('es-AR', { minimumFractionDigits: 2 })}</>
+                  )}
                 </p>
               </div>
               <div className="text-right">
@@ -125,8 +128,8 @@ function GroupBalances({ balances, loading }: GroupBalancesProps) {
               <div
                 key={index}
                 className={`bg-slate-800/50 border rounded-xl p-4 ${
-                  debt.payment_status === 'approved'
-                    ? 'border-green-400/50'
+                  debt.paid_amount > 0
+                    ? 'border-green-400/30'
                     : 'border-slate-700/50'
                 }`}
               >
@@ -141,15 +144,17 @@ function GroupBalances({ balances, loading }: GroupBalancesProps) {
                       {' '}a{' '}
                       <span className="font-semibold text-green-300">{debt.to_display_name}</span>
                     </p>
+                    {/* Pagos aprobados de este par: ya están descontados del monto */}
+                    {debt.paid_amount > 0 && (
+                      <p className="text-xs text-green-300/80 mt-1">
+                        Ya pagó ${debt.paid_amount.toLocaleString('es-AR', { minimumFractionDigits: 2 })} (parcialmente saldado)
+                      </p>
+                    )}
                   </div>
 
                   {/* Estado de pago / Botón MP */}
                   <div className="flex-shrink-0">
-                    {debt.payment_status === 'approved' ? (
-                      <span className="inline-flex items-center px-3 py-1.5 rounded-lg text-sm font-semibold bg-green-500/20 text-green-300 border border-green-400/30">
-                        Pagado
-                      </span>
-                    ) : debt.payment_status === 'pending' ? (
+                    {debt.payment_status === 'pending' ? (
                       <span className="inline-flex items-center px-3 py-1.5 rounded-lg text-sm font-semibold bg-yellow-500/20 text-yellow-300 border border-yellow-400/30">
                         Pago pendiente
                       </span>
@@ -177,8 +182,8 @@ function GroupBalances({ balances, loading }: GroupBalancesProps) {
                   </div>
                 </div>
 
-                {/* Datos de pago (alias/CVU) - solo si no está pagado */}
-                {debt.payment_status !== 'approved' && (debt.to_alias_bancario || debt.to_cvu) && (
+                {/* Datos de pago (alias/CVU) */}
+                {(debt.to_alias_bancario || debt.to_cvu) && (
                   <div className="mt-3 pt-3 border-t border-slate-700/50 flex flex-wrap gap-2">
                     {debt.to_alias_bancario && (
                       <button
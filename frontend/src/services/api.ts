@@ -6,12 +6,17 @@ import type {
   UserCategory,
   Movimiento,
   MovimientoCreate,
+  MovimientoRecategorize,
+  RecategorizeResult,
   GastoFijo,
+  GastoFijoUpdate,
+  JobRun,
   User,
   UserCreate,
   PasswordResetResponse,
   Contact,
   ContactCreate,
+  ContactBalance,
   SplitGroup,
   SplitGroupCreate,
   SplitGroupMember,
@@ -241,10 +246,28 @@ export const updateCategory = async (id: number, nombre: string): Promise<UserCa
   return response.data;
 };
 
+// Fusionar una categoría personalizada en otra (la origen se elimina)
+// POST /user-categories/{id}/merge-into/{targetId}
+export const mergeCategory = async (id: number, targetId: number): Promise<RecategorizeResult> => {
+  const response = await api.post(`/user-categories/${id}/merge-into/${targetId}`);
+  return response.data;
+};
+
+// Reasignar en bloque la categoría de los movimientos que cumplen los filtros
+// POST /movimientos/recategorize
+export const recategorizeMovimientos = async (data: MovimientoRecategorize): Promise<RecategorizeResult> => {
+  const response = await api.post('/movimientos/recategorize', data);
+  return response.data;
+};
+
 // ============== FUNCIONES PARA CONTACTOS ==============
 
-export const getContacts = async (): Promise<Contact[]> => {
-  const response = await api.get('/contacts/');
+// Contactos ordenados por nombre; `q` busca por prefijo de palabra (sin acentos)
+// GET /contacts/?q=ju&limit=20&offset=0
+export const getContacts = async (
+  params?: { q?: string; limit?: number; offset?: number }
+): Promise<Contact[]> => {
+  const response = await api.get('/contacts/', { params });
   return response.data;
 };
 
@@ -262,10 +285,22 @@ export const deleteContact = async (id: number): Promise<void> => {
   await api.delete(`/contacts/${id}`);
 };
 
+export const getContactBalances = async (): Promise<ContactBalance[]> => {
+  const response = await api.get('/contacts/balances');
+  return response.data;
+};
+
+export const getContactBalance = async (id: number): Promise<ContactBalance> => {
+  const response = await api.get(`/contacts/${id}/balance`);
+  return response.data;
+};
+
 // ============== FUNCIONES PARA GRUPOS DIVIDIDOS ==============
 
-export const getSplitGroups = async (): Promise<SplitGroup[]> => {
-  const response = await api.get('/split-groups/');
+export const getSplitGroups = async (includeSummary = false): Promise<SplitGroup[]> => {
+  const response = await api.get('/split-groups/', {
+    params: includeSummary ? { include: 'summary' } : undefined,
+  });
   return response.data;
 };
 
@@ -351,19 +386,43 @@ export const toggleGastoFijo = async (id: number, activo: boolean): Promise<Gast
   return response.data;
 };
 
+// Actualizar la regla de recurrencia (y/o activo) de un gasto fijo
+// PUT /gastos-fijos/{id}
+export const updateGastoFijo = async (id: number, data: GastoFijoUpdate): Promise<GastoFijo> => {
+  const response = await api.put(`/gastos-fijos/${id}`, data);
+  return response.data;
+};
+
 // Eliminar un gasto fijo (los movimientos existentes quedan desvinculados)
 // DELETE /gastos-fijos/{id}
 export const deleteGastoFijo = async (id: number): Promise<void> => {
   await api.delete(`/gastos-fijos/${id}`);
 };
 
-// Triggerear generación manual del mes actual (idempotente)
-// POST /gastos-fijos/generar-mes
-export const generarGastosFijosMes = async (): Promise<{ message: string }> => {
+// Triggerear la generación de los gastos fijos vencidos del usuario (en segundo plano).
+// Si ya hay una en curso devuelve ese mismo job.
+// POST /gastos-fijos/generar-mes → 202 con el job
+export const generarGastosFijosMes = async (): Promise<JobRun> => {
   const response = await api.post('/gastos-fijos/generar-mes');
   return response.data;
 };
 
+// Consultar el estado de un job de generación
+// GET /gastos-fijos/generar-mes/{jobId}
+export const getGeneracionGastosFijos = async (jobId: number): Promise<JobRun> => {
+  const response = await api.get(`/gastos-fijos/generar-mes/${jobId}`);
+  return response.data;
+};
+
+// Generar los meses faltantes de los gastos fijos del usuario (idempotente)
+// POST /gastos-fijos/backfill?meses_max=24
+export const backfillGastosFijos = async (mesesMax?: number): Promise<{ message: string; creados: number }> => {
+  const response = await api.post('/gastos-fijos/backfill', null, {
+    params: mesesMax ? { meses_max: mesesMax } : undefined,
+  });
+  return response.data;
+};
+
 // ============== FUNCIONES PARA PAGOS (MERCADO PAGO) ==============
 
 export const createPaymentPreference = async (data: PaymentCreate): Promise<PaymentPreferenceResponse> => {
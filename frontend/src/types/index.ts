@@ -87,8 +87,34 @@ export interface MovimientoCreate {
   es_fijo?: boolean;  // Si true, crea un GastoFijo template asociado
 }
 
+// Reasignación masiva de categoría
+export interface MovimientoRecategorize {
+  categoria_id?: number | null;        // Destino: categoría del sistema...
+  user_category_id?: number | null;    // ...o personalizada (exactamente una)
+  actual_categoria_id?: number | null;
+  actual_user_category_id?: number | null;
+  desde?: string | null;               // Inclusive
+  hasta?: string | null;               // Inclusive
+  tipo?: 'gasto' | 'ingreso' | null;
+  incluir_gastos_fijos?: boolean;
+}
+
+export interface RecategorizeResult {
+  movimientos: number;
+  gastos_fijos: number;
+}
+
 // ============== TIPOS DE GASTO FIJO ==============
 
+export type Frecuencia = 'weekly' | 'biweekly' | 'monthly' | 'yearly';
+
+export interface GastoFijoUpdate {
+  activo?: boolean;
+  frecuencia?: Frecuencia;
+  intervalo?: number;
+  dia_mes?: number | null;
+}
+
 export interface GastoFijo {
   id: number;
   user_id: number;
@@ -99,11 +125,27 @@ export interface GastoFijo {
   created_at: string;
   categoria: Category | null;
   user_category: UserCategory | null;
+  frecuencia: Frecuencia;
+  intervalo: number;              // Cada N semanas/quincenas/meses/años
+  dia_mes: number | null;         // Día del mes (monthly/yearly)
+  next_run_at: string | null;     // Próxima ocurrencia a generar
   max_importe: number | null;     // Máximo histórico (calculado)
   ultimo_importe: number | null;  // Importe del último mes (calculado)
   total_meses: number;            // Cantidad de meses registrados
 }
 
+// Job en segundo plano (ej: POST /gastos-fijos/generar-mes)
+export interface JobRun {
+  id: number;
+  job_name: string;
+  status: 'pending' | 'running' | 'success' | 'error';
+  started_at: string;
+  finished_at: string | null;
+  duration_ms: number | null;
+  rows_created: number | null;
+  error: string | null;
+}
+
 // Alias de compatibilidad (para no romper imports existentes en split)
 export type Expense = Movimiento;
 export type ExpenseCreate = MovimientoCreate;
@@ -152,6 +194,14 @@ export interface SplitGroup {
   is_active: boolean;
   created_at: string;
   members: SplitGroupMember[];
+  summary?: SplitGroupSummary | null;  // Solo con include=summary
+}
+
+export interface SplitGroupSummary {
+  total_expenses: number;
+  expense_count: number;
+  creator_net_balance: number;
+  pending_payments: number;
 }
 
 export interface SplitGroupCreate {
@@ -181,12 +231,16 @@ export interface SplitExpense {
   participants: SplitExpenseParticipant[];
 }
 
+export type SplitMode = 'equal' | 'weights' | 'percentages' | 'amounts';
+
 export interface SplitExpenseCreate {
   descripcion: string;
   importe: number;
   paid_by_member_id: number;
   fecha: string | null;
   participant_member_ids: number[];
+  split_mode?: SplitMode;
+  participant_values?: number[] | null;  // Un valor por participante (pesos, porcentajes o montos)
 }
 
 // ============== TIPOS DE BALANCES ==============
@@ -196,6 +250,7 @@ export interface MemberBalance {
   display_name: string;
   total_paid: number;
   total_share: number;
+  total_settled: number;
   net_balance: number;
   contact: Contact | null;
 }
@@ -221,6 +276,13 @@ export interface GroupBalanceSummary {
   simplified_debts: DebtTransfer[];
 }
 
+export interface ContactBalance {
+  contact_id: number;
+  nombre: string;
+  net_balance: number;  // > 0: al contacto le deben; < 0: el contacto debe
+  group_count: number;
+}
+
 // ============== TIPOS DE PAGOS (MERCADO PAGO) ==============
 
 export interface PaymentCreate {